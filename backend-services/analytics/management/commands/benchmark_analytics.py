@@ -0,0 +1,132 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from game_types.models import GameType
+from gaming_sessions.models import GamingSession
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from snacks.models import Snack
+from stations.models import Station
+from analytics.reports import (
+    SESSION_DIMENSIONS,
+    revenue_by,
+    revenue_by_payment_method,
+    rollup_revenue_by,
+    rollup_revenue_by_payment_method,
+    station_utilization,
+)
+from analytics.rollups import local_midnight, rebuild_payments, rebuild_revenue
+
+
+class Command(BaseCommand):
+    help = "Time every analytics report over generated café history (all writes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--stations', type=int, default=50)
+        parser.add_argument('--sessions-per-day', type=int, default=400)
+        parser.add_argument('--customers', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.perf_counter()
+            start, end = self._seed(
+                options['days'], options['stations'], options['sessions_per_day'], options['customers']
+            )
+            sessions = options['days'] * options['sessions_per_day']
+            self.stdout.write(f"seeded {sessions} sessions in {time.perf_counter() - started:.1f}s")
+
+            for dimension in SESSION_DIMENSIONS:
+                self._time(f"revenue by {dimension}", lambda: list(revenue_by(dimension, start, end)))
+            self._time("revenue by payment method", lambda: list(revenue_by_payment_method(start, end)))
+            self._time("station utilization", lambda: list(station_utilization(start, end)))
+
+            first_day, last_day = timezone.localdate(start), timezone.localdate(end) - timedelta(days=1)
+            self._time("rebuild rollups", lambda: [rebuild_revenue(first_day, last_day), rebuild_payments(first_day, last_day)])
+            for dimension in SESSION_DIMENSIONS:
+                self._time(f"rollup revenue by {dimension}", lambda: list(rollup_revenue_by(dimension, start, end)))
+            self._time("rollup revenue by payment method", lambda: list(rollup_revenue_by_payment_method(start, end)))
+
+            transaction.set_rollback(True)
+
+    def _seed(self, days, station_count, sessions_per_day, customer_count):
+        game_types = list(GameType.objects.all())
+        stations = Station.objects.bulk_create(
+            Station(name=f'Benchmark Station {number}', game_type=game_types[number % len(game_types)])
+            for number in range(station_count)
+        )
+        customers = User.objects.bulk_create(
+            User(username=f'benchmark-analytics-{number}') for number in range(customer_count)
+        )
+        snack = Snack.objects.create(name='Benchmark Cola', category='DRINKS', unit_price=40)
+
+        # Whole local days, so the rollup reports cover exactly the same range
+        end = local_midnight(timezone.localdate())
+        start = end - timedelta(days=days)
+        opening_hours = 14
+        slot = timedelta(hours=opening_hours) / max(sessions_per_day // station_count, 1)
+
+        def sessions():
+            for day in range(days):
+                opens = start + timedelta(days=day, hours=10)
+                for number in range(sessions_per_day):
+                    check_in_time = opens + slot * (number // station_count)
+                    yield GamingSession(
+                        user=customers[number % len(customers)],
+                        station=stations[number % len(stations)],
+                        check_in_time=check_in_time,
+                        check_out_time=check_in_time + timedelta(hours=1),
+                        player_count=1 + number % 4,
+                        calculated_gaming_cost=80 + 20 * (number % 4),
+                        total_session_cost=80 + 20 * (number % 4),
+                        session_status='COMPLETED',
+                    )
+
+        session_ids = []
+        batch = []
+        for session in sessions():
+            batch.append(session)
+            if len(batch) == 5000:
+                session_ids.extend(created.id for created in GamingSession.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            session_ids.extend(created.id for created in GamingSession.objects.bulk_create(batch))
+
+        methods = [method for method, _ in Payment.PAYMENT_METHOD_CHOICES]
+        Payment.objects.bulk_create(
+            (
+                Payment(
+                    session_id=session_id,
+                    amount_paid=100,
+                    payment_method=methods[position % len(methods)],
+                    payment_status='COMPLETED',
+                )
+                for position, session_id in enumerate(session_ids)
+            ),
+            batch_size=5000,
+        )
+        # created_at is auto_now_add, so date the payments after the fact
+        Payment.objects.filter(session__station__in=stations).update(created_at=Subquery(
+            GamingSession.objects.filter(id=OuterRef('session_id')).values('check_in_time')[:1]
+        ))
+        SessionSnack.objects.bulk_create(
+            (
+                SessionSnack(gaming_session_id=session_id, snack=snack, quantity=2,
+                             unit_price_at_time=40, total_cost=80)
+                for session_id in session_ids[::3]
+            ),
+            batch_size=5000,
+        )
+        return start, end
+
+    def _time(self, label, report):
+        started = time.perf_counter()
+        rows = report()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{label:>34}: {len(rows):6d} rows in {elapsed * 1000:8.1f} ms")
@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics.rollups import rebuild_payments, rebuild_revenue
+
+
+class Command(BaseCommand):
+    help = "Rebuild the revenue and payment rollups from --since to --until, a batch of days at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', required=True, help="First local day to rebuild (YYYY-MM-DD)")
+        parser.add_argument('--until', help="Last local day to rebuild (YYYY-MM-DD), today by default")
+        parser.add_argument('--batch-days', type=int, default=7, help="Days rebuilt per transaction")
+
+    def handle(self, *args, **options):
+        try:
+            since = date.fromisoformat(options['since'])
+            until = date.fromisoformat(options['until']) if options['until'] else timezone.localdate()
+        except ValueError as error:
+            raise CommandError(f"Invalid date: {error}")
+        if since > until:
+            raise CommandError("--since must not be after --until")
+        if options['batch_days'] < 1:
+            raise CommandError("--batch-days must be at least 1")
+
+        # Each batch replaces its days wholesale, so an interrupted run can simply be repeated
+        first_day = since
+        while first_day <= until:
+            last_day = min(first_day + timedelta(days=options['batch_days'] - 1), until)
+            hourly, daily = rebuild_revenue(first_day, last_day)
+            payments = rebuild_payments(first_day, last_day)
+            self.stdout.write(
+                f"{first_day} .. {last_day}: {hourly} hourly, {daily} daily, {payments} payment rollups"
+            )
+            first_day = last_day + timedelta(days=1)
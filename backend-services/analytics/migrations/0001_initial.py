@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('stations', '0003_populate_default_stations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('payment_method', models.CharField(max_length=20)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'payment_method'), name='daily_payment_rollup_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('gaming_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('snack_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue_rollups', to='stations.station')),
+            ],
+            options={
+                'ordering': ['day'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'station'), name='daily_rollup_day_station_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('gaming_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('snack_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hourly_revenue_rollups', to='stations.station')),
+            ],
+            options={
+                'ordering': ['hour'],
+                'constraints': [models.UniqueConstraint(fields=('hour', 'station'), name='hourly_rollup_hour_station_uniq')],
+            },
+        ),
+    ]
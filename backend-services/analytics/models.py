@@ -0,0 +1,61 @@
+from django.db import models
+from stations.models import Station
+
+
+class HourlyRevenueRollup(models.Model):
+    """
+    Session revenue per station and check-in hour.
+
+    Rows are derived data: analytics/rollups.py keeps them current as
+    sessions, snacks and payments change, and can rebuild any slice from
+    the source tables.
+    """
+    hour = models.DateTimeField()
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, null=True, related_name='hourly_revenue_rollups')
+
+    session_count = models.PositiveIntegerField(default=0)
+    gaming_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    snack_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['hour']
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'station'], name='hourly_rollup_hour_station_uniq'),
+        ]
+
+
+class DailyRevenueRollup(models.Model):
+    """Session revenue per station and local check-in day"""
+    day = models.DateField()
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, null=True, related_name='daily_revenue_rollups')
+
+    session_count = models.PositiveIntegerField(default=0)
+    gaming_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    snack_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'station'], name='daily_rollup_day_station_uniq'),
+        ]
+
+
+class DailyPaymentRollup(models.Model):
+    """Completed payments per local day and payment method"""
+    day = models.DateField()
+    payment_method = models.CharField(max_length=20)
+
+    payment_count = models.PositiveIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'payment_method'], name='daily_payment_rollup_uniq'),
+        ]
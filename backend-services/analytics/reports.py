@@ -0,0 +1,219 @@
+"""
+Revenue and utilization reports.
+
+Every report is a single GROUP BY query; shares, running totals and ranks
+are window functions over the grouped rows, so the database returns one
+row per bucket and no session, snack or payment row is ever loaded into
+Python.
+
+Revenue is counted on sessions that were not cancelled or archived,
+bucketed by check-in time: gaming revenue from calculated_gaming_cost,
+snack revenue from the session's non-archived SessionSnack rows.
+Payments are reported separately, by the day they were taken. Amounts
+are added up in whole paise (gamestop/money.py) and come back as Decimal.
+
+The rollup_* variants answer the same questions from the pre-aggregated
+rollup tables (analytics/rollups.py) instead of the source rows.
+"""
+from datetime import timedelta
+
+from django.db.models import (
+    BigIntegerField, Count, DurationField, ExpressionWrapper, F, Func, OuterRef, Q,
+    Subquery, Sum, Value, Window,
+)
+from django.db.models.functions import (
+    Coalesce, ExtractHour, Greatest, Least, Rank, TruncDate, TruncHour,
+)
+from django.utils import timezone
+
+from gamestop.money import MinorUnitsField, minor_units, money_sum
+from gaming_sessions.models import GamingSession
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from stations.models import Station
+from .models import DailyPaymentRollup, DailyRevenueRollup, HourlyRevenueRollup
+
+
+class WindowSum(Func):
+    """
+    SUM(...) usable inside Window() over an aggregate of the same query.
+
+    Django's Sum refuses to wrap another aggregate, but SUM(SUM(x)) OVER ()
+    is exactly what a share-of-total or running total over grouped rows is.
+    """
+    function = 'SUM'
+    window_compatible = True
+
+
+# Grouping key of each session revenue report
+SESSION_DIMENSIONS = {
+    'day': lambda: TruncDate('check_in_time', tzinfo=timezone.get_current_timezone()),
+    'hour': lambda: TruncHour('check_in_time', tzinfo=timezone.get_current_timezone()),
+    'hour_of_day': lambda: ExtractHour('check_in_time', tzinfo=timezone.get_current_timezone()),
+    'station': lambda: F('station__name'),
+    'service_type': lambda: F('station__game_type__service_type__name'),
+}
+
+
+def billable_sessions(start, end):
+    """Sessions that count towards revenue, checked in within [start, end)"""
+    return (
+        GamingSession.objects
+        .filter(archive=False, check_in_time__gte=start, check_in_time__lt=end)
+        .exclude(session_status='CANCELLED')
+    )
+
+
+def session_snack_total():
+    """Correlated subquery: snack revenue of the outer session, in paise"""
+    snacks = (
+        SessionSnack.objects
+        .filter(gaming_session=OuterRef('pk'), archive=False)
+        .order_by()
+        .values('gaming_session')
+        .annotate(total=Sum(minor_units('total_cost')))
+        .values('total')
+    )
+    return Coalesce(Subquery(snacks), Value(0), output_field=BigIntegerField())
+
+
+def with_share(queryset, amount, order_key):
+    """Add share of the period total, running total and rank over the grouped amount"""
+    return queryset.annotate(
+        period_total=Window(WindowSum(F(amount), output_field=MinorUnitsField())),
+        running_total=Window(WindowSum(F(amount), output_field=MinorUnitsField()), order_by=F(order_key).asc()),
+        rank=Window(Rank(), order_by=F(amount).desc()),
+    )
+
+
+def revenue_by(dimension, start, end):
+    """
+    Revenue of [start, end) grouped by one of SESSION_DIMENSIONS.
+
+    Rows: key, sessions, gaming_revenue, snack_revenue, revenue,
+    period_total, running_total (in key order) and rank (by revenue).
+    """
+    queryset = (
+        billable_sessions(start, end)
+        .annotate(key=SESSION_DIMENSIONS[dimension](), snacks=session_snack_total())
+        .values('key')
+        .annotate(
+            sessions=Count('id'),
+            gaming_revenue=money_sum('calculated_gaming_cost'),
+            snack_revenue=Sum('snacks', output_field=MinorUnitsField()),
+            revenue=Sum(minor_units('calculated_gaming_cost') + F('snacks'), output_field=MinorUnitsField()),
+        )
+    )
+    return with_share(queryset, 'revenue', 'key').order_by('key')
+
+
+def revenue_by_payment_method(start, end):
+    """
+    Completed payments taken within [start, end), grouped by method.
+
+    Rows: key, payments, revenue, period_total, running_total and rank.
+    """
+    queryset = (
+        Payment.objects
+        .filter(archive=False, payment_status='COMPLETED', created_at__gte=start, created_at__lt=end)
+        .values(key=F('payment_method'))
+        .annotate(
+            payments=Count('id'),
+            revenue=money_sum('amount_paid'),
+        )
+    )
+    return with_share(queryset, 'revenue', 'key').order_by('key')
+
+
+# Rollup table and grouping key of each revenue report read from the rollups
+ROLLUP_DIMENSIONS = {
+    'day': (DailyRevenueRollup, lambda: F('day')),
+    'hour': (HourlyRevenueRollup, lambda: F('hour')),
+    'hour_of_day': (HourlyRevenueRollup, lambda: ExtractHour('hour', tzinfo=timezone.get_current_timezone())),
+    'station': (DailyRevenueRollup, lambda: F('station__name')),
+    'service_type': (DailyRevenueRollup, lambda: F('station__game_type__service_type__name')),
+}
+
+
+def rollup_revenue_by(dimension, start, end):
+    """
+    revenue_by() read from the rollup tables.
+
+    start and end must be local midnights, the daily rollups have no finer
+    grain. Same rows as revenue_by().
+    """
+    model, key = ROLLUP_DIMENSIONS[dimension]
+    if model is DailyRevenueRollup:
+        rollups = model.objects.filter(day__gte=timezone.localdate(start), day__lt=timezone.localdate(end))
+    else:
+        rollups = model.objects.filter(hour__gte=start, hour__lt=end)
+
+    queryset = (
+        rollups
+        .annotate(key=key())
+        .values('key')
+        .annotate(
+            sessions=Sum('session_count'),
+            gaming_revenue=money_sum('gaming_total'),
+            snack_revenue=money_sum('snack_total'),
+            revenue=money_sum(F('gaming_total') + F('snack_total')),
+        )
+    )
+    return with_share(queryset, 'revenue', 'key').order_by('key')
+
+
+def rollup_revenue_by_payment_method(start, end):
+    """revenue_by_payment_method() read from the daily payment rollups"""
+    queryset = (
+        DailyPaymentRollup.objects
+        .filter(day__gte=timezone.localdate(start), day__lt=timezone.localdate(end))
+        .values(key=F('payment_method'))
+        .annotate(
+            payments=Sum('payment_count'),
+            revenue=money_sum('amount_total'),
+        )
+    )
+    return with_share(queryset, 'revenue', 'key').order_by('key')
+
+
+def station_utilization(start, end):
+    """
+    Share of [start, end) each station spent occupied.
+
+    Occupied time is the overlap of every non-cancelled session with the
+    window, summed per station in one query. The window is clipped at the
+    current time so an open-ended report does not count the future as idle.
+    Rows: station_id, station, occupied, utilization (percent) and rank.
+    """
+    end = min(end, timezone.now())
+    window_seconds = max((end - start).total_seconds(), 0)
+
+    overlaps = Q(
+        gaming_sessions_station__archive=False,
+        gaming_sessions_station__check_in_time__lt=end,
+        gaming_sessions_station__check_out_time__gt=start,
+        gaming_sessions_station__session_status__in=['ACTIVE', 'PAUSED', 'COMPLETED'],
+    )
+    overlap = ExpressionWrapper(
+        Least(F('gaming_sessions_station__check_out_time'), Value(end))
+        - Greatest(F('gaming_sessions_station__check_in_time'), Value(start)),
+        output_field=DurationField(),
+    )
+
+    rows = (
+        Station.objects
+        .filter(archive=False)
+        .values('id', 'name')
+        .annotate(occupied=Sum(overlap, filter=overlaps))
+        .annotate(rank=Window(Rank(), order_by=F('occupied').desc(nulls_last=True)))
+        .order_by('name')
+    )
+    for row in rows:
+        occupied = row['occupied'] or timedelta(0)
+        yield {
+            'station_id': row['id'],
+            'station': row['name'],
+            'occupied': occupied,
+            'utilization': round(occupied.total_seconds() * 100 / window_seconds, 2) if window_seconds else 0.0,
+            'rank': row['rank'],
+        }
@@ -0,0 +1,290 @@
+"""
+Maintenance of the rollup tables in analytics/models.py.
+
+A rebuild replaces a slice of rollup rows (a range of local days,
+optionally limited to some stations) from scratch: the source rows are
+grouped in the database, the old slice is deleted and the new rows are
+inserted in one transaction. Replaying a day therefore gives the same
+rows however often it runs, and a lost update is fixed by the next rebuild.
+
+Saves and deletes of sessions, snacks and payments (see
+analytics/signals.py) are applied as deltas instead. As in
+gaming_sessions/ledger.py, each row's rolled-up fields are remembered when
+it is loaded and a save works out only the difference: a check-in adds one
+session to its station-hour and station-day rows, a snack line or payment
+adds its amount, one UPDATE per row. The difference is applied once the
+writer's transaction has committed (transaction.on_commit, in save order),
+so the rollup rows are neither written nor locked by the booking itself
+and a savepoint that is rolled back takes its deltas along. A delta lost
+to a failure after the commit is logged and leaves drift for the next
+rebuild, as any other lost update. Only the rare changes that move a
+session to another slice, or in or out of the billable set, rebuild the
+slices it left and joined. A slice whose rows are missing or would go
+negative is rebuilt from the source too, and manage.py rebuild_rollups
+backfills history and repairs any drift.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Round, TruncDate, TruncHour
+from django.utils import timezone
+
+from gaming_sessions.models import GamingSession
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from .models import DailyPaymentRollup, DailyRevenueRollup, HourlyRevenueRollup
+from gamestop.money import MinorUnitsField, money_sum, to_money
+from .reports import billable_sessions, session_snack_total
+
+
+def local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def rebuild_revenue(first_day, last_day, station_ids=None):
+    """
+    Replace the hourly and daily revenue rollups of the local days
+    first_day..last_day, for every station or only station_ids.
+    """
+    tz = timezone.get_current_timezone()
+    start, end = local_midnight(first_day), local_midnight(last_day + timedelta(days=1))
+
+    sessions = billable_sessions(start, end)
+    if station_ids is not None:
+        sessions = sessions.filter(station_id__in=station_ids)
+    rows = (
+        sessions
+        .annotate(hour=TruncHour('check_in_time', tzinfo=tz), snacks=session_snack_total())
+        .values('hour', 'station_id')
+        .annotate(
+            session_count=Count('id'),
+            gaming_total=money_sum('calculated_gaming_cost'),
+            snack_total=Sum('snacks', output_field=MinorUnitsField()),
+        )
+        .order_by()
+    )
+    old_hourly = HourlyRevenueRollup.objects.filter(hour__gte=start, hour__lt=end)
+    old_daily = DailyRevenueRollup.objects.filter(day__gte=first_day, day__lte=last_day)
+    if station_ids is not None:
+        old_hourly = old_hourly.filter(station_id__in=station_ids)
+        old_daily = old_daily.filter(station_id__in=station_ids)
+
+    with transaction.atomic():
+        hourly = [HourlyRevenueRollup(**row) for row in rows]
+
+        # Days are folded from the hourly rows, at most 24 per station and day
+        daily = {}
+        for row in hourly:
+            key = (timezone.localtime(row.hour, tz).date(), row.station_id)
+            day = daily.setdefault(key, DailyRevenueRollup(day=key[0], station_id=key[1]))
+            day.session_count += row.session_count
+            day.gaming_total += row.gaming_total
+            day.snack_total += row.snack_total
+
+        old_hourly.delete()
+        old_daily.delete()
+        HourlyRevenueRollup.objects.bulk_create(hourly)
+        DailyRevenueRollup.objects.bulk_create(daily.values())
+    return len(hourly), len(daily)
+
+
+def rebuild_payments(first_day, last_day):
+    """Replace the payment rollups of the local days first_day..last_day"""
+    tz = timezone.get_current_timezone()
+    start, end = local_midnight(first_day), local_midnight(last_day + timedelta(days=1))
+
+    rows = (
+        Payment.objects
+        .filter(archive=False, payment_status='COMPLETED', created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('day', 'payment_method')
+        .annotate(payment_count=Count('id'), amount_total=money_sum('amount_paid'))
+        .order_by()
+    )
+    with transaction.atomic():
+        daily = [DailyPaymentRollup(**row) for row in rows]
+        DailyPaymentRollup.objects.filter(day__gte=first_day, day__lte=last_day).delete()
+        DailyPaymentRollup.objects.bulk_create(daily)
+    return len(daily)
+
+
+# Model -> fields its share of the rollups is computed from
+ROLLUP_FIELDS = {
+    GamingSession: ('check_in_time', 'station_id', 'session_status', 'archive', 'calculated_gaming_cost'),
+    SessionSnack: ('gaming_session_id', 'archive', 'total_cost'),
+    Payment: ('created_at', 'payment_method', 'payment_status', 'archive', 'amount_paid'),
+}
+
+
+def rebuild_revenue_slices(check_ins):
+    """Rebuild the station-days of many (check_in_time, station_id) pairs, one rebuild per day"""
+    stations_by_day = {}
+    for check_in_time, station_id in check_ins:
+        stations_by_day.setdefault(timezone.localdate(check_in_time), set()).add(station_id)
+
+    for day, station_ids in stations_by_day.items():
+        # A session without a station lands in the station-less rows: rebuild the whole day
+        rebuild_revenue(day, day, None if None in station_ids else sorted(station_ids))
+
+
+def _add_to_row(model, key, changes, count_field):
+    """
+    Add changes to the rollup row at key, creating it for a first entry.
+    Returns False when the row is missing and cannot be created here, or
+    when its count would go negative.
+    """
+    count = changes[count_field]
+    rows = model.objects.filter(**key)
+    guarded = rows.filter(**{f'{count_field}__gte': -count}) if count < 0 else rows
+    increments = {
+        # SQLite adds DecimalFields as floats: keep the stored total on the paisa
+        field: F(field) + value if field == count_field else Round(F(field) + value, 2)
+        for field, value in changes.items() if value
+    }
+    if guarded.update(**increments):
+        if count < 0:
+            rows.filter(**{count_field: 0}).delete()
+        return True
+    if count <= 0 or None in key.values():
+        # Nothing to start the row from, or a key the unique constraint cannot guard
+        return False
+    # First entry: an empty row (unless a concurrent first entry beat us to it), then add
+    model.objects.bulk_create([model(**key)], ignore_conflicts=True)
+    return bool(rows.update(**increments))
+
+
+def apply_revenue_change(check_in_time, station_id, session_count=0, gaming_total=0, snack_total=0):
+    """
+    Add to the hourly and daily revenue rollups of the station-hour holding
+    check_in_time. Returns False if the slice has to be rebuilt instead.
+    """
+    changes = {'session_count': session_count, 'gaming_total': gaming_total, 'snack_total': snack_total}
+    if not any(changes.values()):
+        return True
+
+    local = timezone.localtime(check_in_time)
+    hour = {'hour': local.replace(minute=0, second=0, microsecond=0), 'station_id': station_id}
+    day = {'day': local.date(), 'station_id': station_id}
+    applied = _add_to_row(HourlyRevenueRollup, hour, changes, 'session_count')
+    return _add_to_row(DailyRevenueRollup, day, changes, 'session_count') and applied
+
+
+def session_revenue(values):
+    """(check_in_time, station_id, gaming cost) a session counts with, or None when it does not count"""
+    if not values or values['archive'] or values['session_status'] == 'CANCELLED':
+        return None
+    return values['check_in_time'], values['station_id'], to_money(values['calculated_gaming_cost'])
+
+
+def session_changed(before, after):
+    """
+    Bring the revenue rollups in line with a session going from before to
+    after, each a dict of its ROLLUP_FIELDS or empty for no row.
+    """
+    old, new = session_revenue(before), session_revenue(after)
+    if old == new:
+        return
+
+    if not before:
+        # A new session has no snacks yet
+        moved = [] if apply_revenue_change(new[0], new[1], session_count=1, gaming_total=new[2]) else [new]
+    elif old is not None and new is not None and old[:2] == new[:2]:
+        moved = [] if apply_revenue_change(new[0], new[1], gaming_total=new[2] - old[2]) else [new]
+    else:
+        # Moved to another slice, or in or out of the billable set: its
+        # snacks move too, so rebuild the slices it left and joined
+        moved = [revenue for revenue in (old, new) if revenue is not None]
+    rebuild_revenue_slices(revenue[:2] for revenue in moved)
+
+
+def snack_changed(before, after):
+    """Same as session_changed, for a snack line"""
+    amounts = defaultdict(Decimal)
+    for values, sign in ((before, -1), (after, 1)):
+        if values and not values['archive'] and values['total_cost'] is not None:
+            amounts[values['gaming_session_id']] += sign * to_money(values['total_cost'])
+    amounts = {session_id: amount for session_id, amount in amounts.items() if amount}
+    if not amounts:
+        return
+
+    failed = []
+    sessions = GamingSession.objects.filter(id__in=amounts).values('id', *ROLLUP_FIELDS[GamingSession])
+    for session in sessions:
+        revenue = session_revenue(session)
+        if revenue is not None and not apply_revenue_change(*revenue[:2], snack_total=amounts[session['id']]):
+            failed.append(revenue[:2])
+    # After every delta, so a rebuilt slice is not added to again
+    rebuild_revenue_slices(failed)
+
+
+def payment_revenue(values):
+    """(local day, payment method, amount) a payment counts with, or None when it does not count"""
+    if not values or values['archive'] or values['payment_status'] != 'COMPLETED':
+        return None
+    return timezone.localdate(values['created_at']), values['payment_method'], to_money(values['amount_paid'])
+
+
+def payment_changed(before, after):
+    """Same as session_changed, for a payment"""
+    old, new = payment_revenue(before), payment_revenue(after)
+    if old == new:
+        return
+
+    failed = set()
+    for revenue, sign in ((old, -1), (new, 1)):
+        if revenue is not None:
+            day, payment_method, amount = revenue
+            key = {'day': day, 'payment_method': payment_method}
+            changes = {'payment_count': sign, 'amount_total': sign * amount}
+            if not _add_to_row(DailyPaymentRollup, key, changes, 'payment_count'):
+                failed.add(day)
+    for day in failed:
+        rebuild_payments(day, day)
+
+
+CHANGE_HANDLERS = {
+    GamingSession: session_changed,
+    SessionSnack: snack_changed,
+    Payment: payment_changed,
+}
+
+
+def rollup_values(instance):
+    return {field: getattr(instance, field) for field in ROLLUP_FIELDS[type(instance)]}
+
+
+def remember(instance):
+    """Note the row's rolled-up fields as loaded, so the next save can apply the difference"""
+    # post_init runs before from_db() clears _state.adding, so go by the pk
+    if instance.pk is None:
+        instance._rollup_values = {}
+    elif instance.get_deferred_fields() & set(ROLLUP_FIELDS[type(instance)]):
+        # Loaded with only() and missing a field: recall() reads it before saving
+        instance._rollup_values = None
+    else:
+        instance._rollup_values = rollup_values(instance)
+
+
+def recall(instance):
+    """Before a save or delete: read the stored fields if remember() could not"""
+    if getattr(instance, '_rollup_values', None) is None:
+        fields = ROLLUP_FIELDS[type(instance)]
+        instance._rollup_values = type(instance)._base_manager.filter(pk=instance.pk).values(*fields).first() or {}
+
+
+def record_change(instance, deleted=False):
+    """Apply the difference between the row's remembered and current fields to the rollups, once committed"""
+    before = instance._rollup_values
+    after = {} if deleted else rollup_values(instance)
+    instance._rollup_values = after
+    if not (before or after):
+        return
+    handler = CHANGE_HANDLERS[type(instance)]
+
+    def apply_change():
+        handler(before, after)
+
+    transaction.on_commit(apply_change, robust=True)
@@ -0,0 +1,60 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .reports import SESSION_DIMENSIONS
+
+
+class ReportRangeSerializer(serializers.Serializer):
+    """Query parameters of a report: an inclusive date range, last 30 days by default"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        today = timezone.localdate()
+        end = data.get('end') or today
+        start = data.get('start') or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError({'start': "start must not be after end."})
+
+        # Local midnight of the first day up to local midnight after the last one
+        tz = timezone.get_current_timezone()
+        data['start'] = timezone.make_aware(datetime.combine(start, time.min), tz)
+        data['end'] = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+        return data
+
+
+class RevenueQuerySerializer(ReportRangeSerializer):
+    group_by = serializers.ChoiceField(choices=[*SESSION_DIMENSIONS, 'payment_method'], default='day')
+    # live recomputes from sessions, snacks and payments instead of the rollup tables
+    source = serializers.ChoiceField(choices=['rollup', 'live'], default='rollup')
+
+
+class RevenueRowSerializer(serializers.Serializer):
+    key = serializers.ReadOnlyField()
+    sessions = serializers.IntegerField(required=False)
+    payments = serializers.IntegerField(required=False)
+    gaming_revenue = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    snack_revenue = serializers.DecimalField(max_digits=14, decimal_places=2, required=False)
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    share = serializers.SerializerMethodField()
+    running_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    rank = serializers.IntegerField()
+
+    def get_share(self, row):
+        # Percent of the period total, both sums coming from the same query
+        if not row['period_total']:
+            return 0.0
+        return round(float(row['revenue'] * 100 / row['period_total']), 2)
+
+
+class StationUtilizationSerializer(serializers.Serializer):
+    station_id = serializers.IntegerField()
+    station = serializers.CharField()
+    occupied_minutes = serializers.SerializerMethodField()
+    utilization = serializers.FloatField()
+    rank = serializers.IntegerField()
+
+    def get_occupied_minutes(self, row):
+        return round(row['occupied'].total_seconds() / 60, 1)
@@ -0,0 +1,51 @@
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from gaming_sessions.models import GamingSession
+from gaming_sessions.signals import session_timer_changed
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from . import rollups
+
+
+@receiver(post_init, sender=GamingSession)
+@receiver(post_init, sender=SessionSnack)
+@receiver(post_init, sender=Payment)
+def remember_rollup_values(sender, instance, **kwargs):
+    rollups.remember(instance)
+
+
+@receiver([pre_save, pre_delete], sender=GamingSession)
+@receiver([pre_save, pre_delete], sender=SessionSnack)
+@receiver([pre_save, pre_delete], sender=Payment)
+def recall_rollup_values(sender, instance, **kwargs):
+    rollups.recall(instance)
+
+
+@receiver(post_save, sender=GamingSession)
+@receiver(post_save, sender=SessionSnack)
+@receiver(post_save, sender=Payment)
+def update_rollups(sender, instance, **kwargs):
+    rollups.record_change(instance)
+
+
+@receiver(post_delete, sender=GamingSession)
+@receiver(post_delete, sender=SessionSnack)
+@receiver(post_delete, sender=Payment)
+def remove_from_rollups(sender, instance, **kwargs):
+    rollups.record_change(instance, deleted=True)
+
+
+@receiver(session_timer_changed, sender=GamingSession)
+def rebuild_extension_rollups(sender, session, transition, **kwargs):
+    # Extensions raise the gaming cost with an UPDATE; the other
+    # transitions (and bulk checkouts) leave every rolled-up column alone
+    if transition == 'add_time':
+        check_ins = [(session.check_in_time, session.station_id)]
+
+        def rebuild_slices():
+            rollups.rebuild_revenue_slices(check_ins)
+
+        transaction.on_commit(rebuild_slices, robust=True)
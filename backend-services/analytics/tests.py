@@ -0,0 +1,268 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from gaming_sessions.models import GamingSession
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from snacks.models import Snack
+from stations.models import Station
+from .models import DailyPaymentRollup, DailyRevenueRollup, HourlyRevenueRollup
+from .reports import (
+    SESSION_DIMENSIONS,
+    revenue_by,
+    revenue_by_payment_method,
+    rollup_revenue_by,
+    rollup_revenue_by_payment_method,
+    station_utilization,
+)
+from .rollups import CHANGE_HANDLERS, rebuild_payments
+
+
+def at(day, hour):
+    return datetime(2026, 3, day, hour, tzinfo=dt_timezone.utc)
+
+
+class ReportTestCase(TestCase):
+    start = at(1, 0)
+    end = at(3, 0)
+
+    def setUp(self):
+        # Run the rollup deltas the saves schedule on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_history()
+        # The UPDATE in create_history() skips the signals: rebuild the days
+        # it moved the payments from and to
+        rebuild_payments(timezone.localdate(), timezone.localdate())
+        rebuild_payments(at(2, 0).date(), at(2, 0).date())
+
+    def create_history(self):
+        customer = User.objects.create(username='customer')
+        self.station_1 = Station.objects.get(name='Station 1')
+        self.station_3 = Station.objects.get(name='Station 3')
+        cola = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40)
+
+        def session(station, check_in_time, hours, cost, status='COMPLETED'):
+            return GamingSession.objects.create(
+                user=customer,
+                station=station,
+                check_in_time=check_in_time,
+                check_out_time=check_in_time + timedelta(hours=hours),
+                calculated_gaming_cost=cost,
+                total_session_cost=cost,
+                session_status=status,
+            )
+
+        self.first = first = session(self.station_1, at(1, 10), 2, 100)
+        session(self.station_3, at(1, 18), 1, 150)
+        second_day = session(self.station_1, at(2, 11), 1, 80)
+        session(self.station_3, at(2, 12), 3, 500, status='CANCELLED')
+
+        self.snack = SessionSnack.objects.create(gaming_session=first, snack=cola, quantity=2, unit_price_at_time=40)
+        Payment.objects.create(session=first, amount_paid=180, payment_method='UPI', payment_status='COMPLETED')
+        Payment.objects.create(session=second_day, amount_paid=80, payment_method='CASH', payment_status='COMPLETED')
+        Payment.objects.create(session=second_day, amount_paid=80, payment_method='CARD', payment_status='FAILED')
+        Payment.objects.update(created_at=at(2, 12))
+
+
+class RevenueReportTests(ReportTestCase):
+    def test_revenue_by_day(self):
+        with self.assertNumQueries(1):
+            rows = list(revenue_by('day', self.start, self.end))
+
+        self.assertEqual([at(1, 0).date(), at(2, 0).date()], [row['key'] for row in rows])
+        first_day, second_day = rows
+        self.assertEqual(2, first_day['sessions'])
+        self.assertEqual(Decimal('250'), first_day['gaming_revenue'])
+        self.assertEqual(Decimal('80'), first_day['snack_revenue'])
+        self.assertEqual(Decimal('330'), first_day['revenue'])
+        # Window columns: the cancelled session is left out of every total
+        self.assertEqual(Decimal('410'), second_day['period_total'])
+        self.assertEqual(Decimal('410'), second_day['running_total'])
+        self.assertEqual([1, 2], [row['rank'] for row in rows])
+
+    def test_revenue_by_station(self):
+        rows = {row['key']: row for row in revenue_by('station', self.start, self.end)}
+
+        self.assertEqual(Decimal('260'), rows['Station 1']['revenue'])
+        self.assertEqual(Decimal('150'), rows['Station 3']['revenue'])
+        self.assertEqual(1, rows['Station 1']['rank'])
+
+    def test_revenue_by_payment_method(self):
+        rows = list(revenue_by_payment_method(self.start, self.end))
+
+        self.assertEqual(['CASH', 'UPI'], [row['key'] for row in rows])
+        self.assertEqual([Decimal('80'), Decimal('180')], [row['revenue'] for row in rows])
+
+    def test_amounts_add_up_to_the_paisa(self):
+        for amount in ('0.10', '0.20', '1234567.89'):
+            Payment.objects.create(
+                session=self.first, amount_paid=Decimal(amount), payment_method='CARD', payment_status='COMPLETED',
+            )
+        Payment.objects.update(created_at=at(2, 12))
+
+        rows = {row['key']: row for row in revenue_by_payment_method(self.start, self.end)}
+
+        self.assertEqual(Decimal('1234568.19'), rows['CARD']['revenue'])
+        self.assertEqual(Decimal('1234828.19'), rows['CARD']['period_total'])
+
+    def test_endpoint_renders_shares(self):
+        staff = User.objects.create_user(username='staff', password='password')
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        response = client.get('/api/analytics/revenue/', {
+            'group_by': 'service_type', 'start': '2026-03-01', 'end': '2026-03-02',
+        })
+
+        self.assertEqual(200, response.status_code)
+        shares = {row['key']: row['share'] for row in response.data['results']}
+        self.assertEqual({'Console': 100.0}, shares)
+
+    def test_endpoint_rejects_reversed_range(self):
+        staff = User.objects.create_user(username='staff', password='password')
+        client = APIClient()
+        client.force_authenticate(staff)
+
+        response = client.get('/api/analytics/revenue/', {'start': '2026-03-02', 'end': '2026-03-01'})
+
+        self.assertEqual(400, response.status_code)
+
+
+class RollupTests(ReportTestCase):
+    columns = ('key', 'sessions', 'gaming_revenue', 'snack_revenue', 'revenue', 'running_total', 'rank')
+
+    def assertRollupsMatchSource(self):
+        for dimension in SESSION_DIMENSIONS:
+            live = [[row[column] for column in self.columns] for row in revenue_by(dimension, self.start, self.end)]
+            rolled = [[row[column] for column in self.columns] for row in rollup_revenue_by(dimension, self.start, self.end)]
+            self.assertEqual(live, rolled, dimension)
+
+    def test_saves_keep_rollups_current(self):
+        self.assertRollupsMatchSource()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.snack.archive = True
+            self.snack.save()
+            self.first.session_status = 'CANCELLED'
+            self.first.save()
+
+        self.assertRollupsMatchSource()
+        self.assertEqual(1, DailyRevenueRollup.objects.get(day=at(1, 0).date()).session_count)
+
+    def test_new_session_is_added_to_its_slice(self):
+        customer = User.objects.get(username='customer')
+
+        # The insert and its history row; once committed, one UPDATE each for
+        # the hourly and daily rows (and the dashboard event's row)
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(2):
+            GamingSession.objects.create(
+                user=customer, station=self.station_1, check_in_time=at(1, 10) + timedelta(minutes=30),
+                calculated_gaming_cost=60, total_session_cost=60, session_status='ACTIVE',
+            )
+        with self.assertNumQueries(3):
+            for callback in callbacks:
+                callback()
+
+        self.assertRollupsMatchSource()
+        self.assertEqual(2, DailyRevenueRollup.objects.get(day=at(1, 0).date(), station=self.station_1).session_count)
+
+    def test_moving_a_session_updates_both_slices(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.station = self.station_3
+            self.first.check_in_time = at(2, 15)
+            self.first.save()
+
+        self.assertRollupsMatchSource()
+        self.assertFalse(DailyRevenueRollup.objects.filter(day=at(1, 0).date(), station=self.station_1).exists())
+        moved = DailyRevenueRollup.objects.get(day=at(2, 0).date(), station=self.station_3)
+        self.assertEqual((1, Decimal('100'), Decimal('80')), (moved.session_count, moved.gaming_total, moved.snack_total))
+
+    def test_payment_changes_are_applied(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.get(payment_method='UPI')
+            payment.amount_paid = Decimal('150.10')
+            payment.save()
+            Payment.objects.get(payment_method='CASH').delete()
+
+        self.assertEqual(
+            list(revenue_by_payment_method(self.start, self.end)),
+            list(rollup_revenue_by_payment_method(self.start, self.end)),
+        )
+        self.assertEqual(['UPI'], list(DailyPaymentRollup.objects.values_list('payment_method', flat=True)))
+
+    def test_rebuild_is_idempotent(self):
+        out = StringIO()
+        for _ in range(2):
+            call_command('rebuild_rollups', since='2026-03-01', until='2026-03-04', batch_days=2, stdout=out)
+
+        self.assertRollupsMatchSource()
+        self.assertEqual(3, HourlyRevenueRollup.objects.count())
+        self.assertEqual(3, DailyRevenueRollup.objects.count())
+        self.assertEqual(
+            list(revenue_by_payment_method(self.start, self.end)),
+            list(rollup_revenue_by_payment_method(self.start, self.end)),
+        )
+        self.assertEqual(2, DailyPaymentRollup.objects.count())
+
+    def test_rolled_back_changes_leave_the_rollups_alone(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.first.session_status = 'CANCELLED'
+                    self.first.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual([], callbacks)
+        self.assertEqual(1, DailyRevenueRollup.objects.get(day=at(1, 0).date(), station=self.station_1).session_count)
+
+    def test_a_failed_delta_is_logged_and_the_save_stands(self):
+        failing = mock.Mock(side_effect=DatabaseError('locked'))
+
+        with mock.patch.dict(CHANGE_HANDLERS, {Payment: failing}), \
+                self.assertLogs('django.test', 'ERROR') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            payment = Payment.objects.get(payment_method='UPI')
+            payment.amount_paid = Decimal('150.10')
+            payment.save()
+
+        self.assertIn('apply_change', logs.output[0])
+        self.assertEqual(Decimal('150.10'), Payment.objects.get(payment_method='UPI').amount_paid)
+
+    def test_rollup_report_reads_only_rollups(self):
+        with self.assertNumQueries(1):
+            rows = list(rollup_revenue_by('service_type', self.start, self.end))
+
+        self.assertEqual([('Console', Decimal('410'))], [(row['key'], row['revenue']) for row in rows])
+
+
+class StationUtilizationTests(ReportTestCase):
+    def test_occupied_time_is_clipped_to_the_window(self):
+        with self.assertNumQueries(1):
+            rows = {row['station']: row for row in station_utilization(at(1, 11), at(2, 11))}
+
+        # Station 1: one of its two hours on day 1 falls inside the window
+        self.assertEqual(timedelta(hours=1), rows['Station 1']['occupied'])
+        self.assertEqual(round(100 / 24, 2), rows['Station 1']['utilization'])
+        self.assertEqual(timedelta(hours=1), rows['Station 3']['occupied'])
+        self.assertEqual(0.0, rows['Station 2']['utilization'])
+
+
+class BenchmarkAnalyticsTests(TestCase):
+    def test_benchmark_rolls_back(self):
+        out = StringIO()
+
+        call_command('benchmark_analytics', days=3, stations=5, sessions_per_day=20, customers=5, stdout=out)
+
+        self.assertIn('station utilization', out.getvalue())
+        self.assertFalse(GamingSession.objects.exists())
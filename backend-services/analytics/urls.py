@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import RevenueReportView, StationUtilizationView
+
+urlpatterns = [
+    path('revenue/', RevenueReportView.as_view(), name='analytics-revenue'),
+    path('utilization/', StationUtilizationView.as_view(), name='analytics-utilization'),
+]
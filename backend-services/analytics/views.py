@@ -0,0 +1,60 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .reports import (
+    revenue_by,
+    revenue_by_payment_method,
+    rollup_revenue_by,
+    rollup_revenue_by_payment_method,
+    station_utilization,
+)
+from .serializers import (
+    ReportRangeSerializer,
+    RevenueQuerySerializer,
+    RevenueRowSerializer,
+    StationUtilizationSerializer,
+)
+
+
+class RevenueReportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = RevenueQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = query.validated_data['start'], query.validated_data['end']
+        group_by = query.validated_data['group_by']
+        source = query.validated_data['source']
+
+        # Charts read the rollup tables; source=live scans the source rows
+        if group_by == 'payment_method':
+            report = rollup_revenue_by_payment_method if source == 'rollup' else revenue_by_payment_method
+            rows = report(start, end)
+        else:
+            report = rollup_revenue_by if source == 'rollup' else revenue_by
+            rows = report(group_by, start, end)
+
+        return Response({
+            'group_by': group_by,
+            'source': source,
+            'start': start,
+            'end': end,
+            'results': RevenueRowSerializer(rows, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+
+class StationUtilizationView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        query = ReportRangeSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end = query.validated_data['start'], query.validated_data['end']
+
+        return Response({
+            'start': start,
+            'end': end,
+            'results': StationUtilizationSerializer(station_utilization(start, end), many=True).data,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from gamestop.cache import get_namespace
+from .models import Duration
+
+
+@receiver([post_save, post_delete], sender=Duration)
+def invalidate_durations_cache(sender, **kwargs):
+    get_namespace('durations').invalidate()
@@ -1,3 +1,125 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from gamestop.cache import CacheNamespace, get_namespace
+from .models import Duration
+
+
+class CacheNamespaceTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.namespace = CacheNamespace('tests')
+
+    def test_invalidate_moves_to_a_new_version(self):
+        self.assertEqual(1, self.namespace.get_or_set('key', lambda: 1))
+        self.assertEqual(1, self.namespace.get_or_set('key', lambda: 2))
+
+        self.namespace.invalidate()
+
+        self.assertEqual(2, self.namespace.get_or_set('key', lambda: 2))
+        self.assertEqual({'hits': 1, 'misses': 2, 'invalidations': 1}, self.namespace.stats())
+
+    def test_evicted_version_does_not_revive_old_entries(self):
+        self.namespace.set('key', 'stale')
+        cache.delete(self.namespace.version_key)
+
+        self.assertIsNone(self.namespace.get('key'))
+        self.assertEqual('fresh', self.namespace.get_or_set('key', lambda: 'fresh'))
+
+    def test_namespaces_do_not_share_keys(self):
+        other = CacheNamespace('other')
+        self.namespace.set('key', 'tests')
+        other.set('key', 'other')
+
+        self.namespace.invalidate()
+
+        self.assertIsNone(self.namespace.get('key'))
+        self.assertEqual('other', other.get('key'))
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        def read(results):
+            barrier.wait()
+            results.append(self.namespace.get_or_set('key', compute))
+
+        results = []
+        threads = [threading.Thread(target=read, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual(['value'] * 8, results)
+        self.assertEqual(7, self.namespace.stats()['hits'])
+
+
+class DurationListConditionalGetTests(TestCase):
+    url = '/api/durations/'
+
+    def setUp(self):
+        cache.clear()
+        staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+        self.etag = self.client.get(self.url)['ETag']
+
+    def get(self, etag):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_matching_etag_is_answered_from_the_cache(self):
+        with self.assertNumQueries(0):
+            response = self.get(self.etag)
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(self.etag, response['ETag'])
+        self.assertEqual(b'', response.content)
+
+    def test_edit_changes_the_etag(self):
+        duration = Duration.objects.first()
+        duration.duration += 1
+        duration.save()
+
+        self.assertEqual(200, self.get(self.etag).status_code)
+
+    def test_archive_changes_the_etag(self):
+        duration = Duration.objects.order_by('updated_at').first()
+        duration.archive = True
+        duration.save()
+
+        self.assertEqual(200, self.get(self.etag).status_code)
+
+    def test_other_pages_have_their_own_etag(self):
+        self.assertNotEqual(self.etag, self.client.get(self.url, {'page': 1})['ETag'])
+
+    def test_unknown_params_share_the_cached_page(self):
+        self.client.get(self.url)
+        misses = get_namespace('durations').stats()['misses']
+
+        with self.assertNumQueries(0):
+            for junk in range(5):
+                self.assertEqual(200, self.client.get(self.url, {'junk': junk}).status_code)
+
+        self.assertEqual(misses, get_namespace('durations').stats()['misses'])
+
+    def test_warm_list_is_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        misses = get_namespace('durations').stats()['misses']
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(misses, get_namespace('durations').stats()['misses'])
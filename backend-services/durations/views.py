@@ -1,10 +1,12 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from gamestop.conditional import CachedListMixin
 from .models import Duration
 from .serializers import DurationSerializer
 
-class DurationListCreateView(generics.ListCreateAPIView):
+class DurationListCreateView(CachedListMixin, generics.ListCreateAPIView):
+    cache_namespace = 'durations'
     queryset = Duration.objects.all()
     serializer_class = DurationSerializer
     permission_classes = [IsAuthenticated]
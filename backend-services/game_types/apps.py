@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GameTypesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'game_types'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from service_types.models import ServiceType
-from simple_history.models import HistoricalRecords
+from gamestop.history import DeferredHistoricalRecords
 
 
 class GameType(models.Model):
@@ -35,7 +35,7 @@ class GameType(models.Model):
     archive = models.BooleanField(default=False)
 
     # History tracking
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     class Meta:
         ordering = ['-id']
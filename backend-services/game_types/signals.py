@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from gamestop.cache import get_namespace
+from .models import GameType
+
+
+@receiver([post_save, post_delete], sender=GameType)
+def invalidate_game_types_cache(sender, **kwargs):
+    get_namespace('game_types').invalidate()
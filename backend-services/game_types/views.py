@@ -1,10 +1,12 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from gamestop.conditional import CachedListMixin
 from .models import GameType
 from .serializers import GameTypeSerializer
 
-class GameTypeListCreateView(generics.ListCreateAPIView):
+class GameTypeListCreateView(CachedListMixin, generics.ListCreateAPIView):
+    cache_namespace = 'game_types'
     queryset = GameType.objects.all()
     serializer_class = GameTypeSerializer
     permission_classes = [IsAuthenticated]
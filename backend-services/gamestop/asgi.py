@@ -3,14 +3,27 @@ ASGI config for gamestop project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+This is the entry point to serve: the live dashboard's event stream
+(/api/events/sessions/, see gamestop/events.py) is an async view that holds
+its connection open, which only ASGI serves without tying up a worker, e.g.
+
+    uvicorn gamestop.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gamestop.settings')
 
 application = get_asgi_application()
+
+if settings.DEBUG:
+    # What runserver would do for the admin's static files
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+
+    application = ASGIStaticFilesHandler(application)
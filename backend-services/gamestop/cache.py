@@ -0,0 +1,209 @@
+"""
+Project cache layer on top of Django's cache framework.
+
+Every app gets its own CacheNamespace. Keys are prefixed with the namespace
+name and its current version, so invalidating a namespace is a single
+counter bump in the cache: old entries are never read again and simply
+expire. Reads go through get_or_set(), which recomputes a missing value
+once even when many requests miss at the same time.
+
+The backend is whatever settings.CACHES configures (LocMemCache by
+default, or the file backend to share entries between worker processes);
+nothing here depends on Redis.
+
+VersionedValue keeps one computed value (the price matrix, the drop-down
+bundle) in a namespace and a per-process copy of it, so hot lookups cost a
+version read instead of a fetch and unpickle of the whole value.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+
+MISSING = object()
+
+# How long a process may hold the recompute lease for a key, and how often
+# the others look for its result meanwhile
+LEASE_SECONDS = 10
+LEASE_POLL_SECONDS = 0.05
+
+
+class CacheNamespace:
+    """
+    Versioned, namespaced view of a cache backend.
+
+    Hit/miss/invalidation counters are kept per process, see stats().
+    """
+
+    def __init__(self, name, alias='default', timeout=DEFAULT_TIMEOUT, stripes=64):
+        self.name = name
+        self.alias = alias
+        self.timeout = timeout
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._counters = Counter()
+        self._counters_lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def version_key(self):
+        return f"{self.name}:version"
+
+    def get_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # First use, or the version was evicted: start from a value that
+            # cannot collide with keys still cached under earlier versions
+            self.cache.add(self.version_key, time.time_ns(), timeout=None)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def make_key(self, key):
+        # Hash the caller's key so URLs and the like fit any backend's key rules
+        digest = hashlib.md5(str(key).encode(), usedforsecurity=False).hexdigest()
+        return f"{self.name}:v{self.get_version()}:{digest}"
+
+    def get(self, key, default=None):
+        value = self.cache.get(self.make_key(key), MISSING)
+        if value is MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def set(self, key, value):
+        self.cache.set(self.make_key(key), value, self.timeout)
+
+    def get_or_set(self, key, compute):
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Concurrent misses for the same key are collapsed: threads of this
+        process queue on a lock and other processes wait on a lease held in
+        the cache, then all read the value stored by the first one. If the
+        lease holder takes longer than LEASE_SECONDS the waiters compute
+        the value themselves.
+        """
+        full_key = self.make_key(key)
+        value = self.cache.get(full_key, MISSING)
+        if value is not MISSING:
+            self._count('hits')
+            return value
+
+        with self._locks[hash(full_key) % len(self._locks)]:
+            value = self.cache.get(full_key, MISSING)
+            if value is MISSING:
+                value = self._wait_for_lease(full_key)
+            if value is not MISSING:
+                self._count('hits')
+                return value
+
+            self._count('misses')
+            try:
+                value = compute()
+                self.cache.set(full_key, value, self.timeout)
+            finally:
+                self.cache.delete(f"{full_key}:lease")
+            return value
+
+    def _wait_for_lease(self, full_key):
+        """Take the recompute lease, or wait for whoever holds it to store the value"""
+        lease_key = f"{full_key}:lease"
+        deadline = time.monotonic() + LEASE_SECONDS
+        while not self.cache.add(lease_key, 1, timeout=LEASE_SECONDS):
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(LEASE_POLL_SECONDS)
+            value = self.cache.get(full_key, MISSING)
+            if value is not MISSING:
+                return value
+        return MISSING
+
+    def invalidate(self):
+        """Move to a new version now and again once the current transaction commits"""
+        self._count('invalidations')
+        self._bump()
+        transaction.on_commit(self._bump)
+
+    def _bump(self):
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            # No version stored yet (or it was evicted): start a fresh one
+            self.cache.set(self.version_key, time.time_ns(), timeout=None)
+
+    def stats(self):
+        """Hit/miss/invalidation counts of this process"""
+        with self._counters_lock:
+            return {
+                'hits': self._counters['hits'],
+                'misses': self._counters['misses'],
+                'invalidations': self._counters['invalidations'],
+            }
+
+    def _count(self, counter):
+        with self._counters_lock:
+            self._counters[counter] += 1
+
+
+class VersionedValue:
+    """
+    A value computed from the database, stored once in a CacheNamespace and
+    kept in process memory until the namespace version moves.
+
+    invalidate() bumps the namespace, so every process sharing the cache
+    backend recomputes (or re-reads) the value on its next get(). stamp,
+    when given, is a cheap query that changes whenever the value would; it
+    is read on every get() and becomes part of the version, so the value
+    also follows writes made by processes that do not share this cache.
+    """
+
+    def __init__(self, namespace, key, compute, stamp=None):
+        self.namespace = namespace
+        self.key = key
+        self.compute = compute
+        self.stamp = stamp
+        self._local = None
+
+    def get(self):
+        version, key = self.namespace.get_version(), self.key
+        if self.stamp is not None:
+            stamp = self.stamp()
+            version, key = (version, stamp), (key, stamp)
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1]
+        value = self.namespace.get_or_set(key, self.compute)
+        self._local = (version, value)
+        return value
+
+    def invalidate(self):
+        self._local = None
+        self.namespace.invalidate()
+
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+def get_namespace(name, **options):
+    """Return the process-wide CacheNamespace called name, creating it on first use"""
+    with _namespaces_lock:
+        namespace = _namespaces.get(name)
+        if namespace is None:
+            namespace = _namespaces[name] = CacheNamespace(name, **options)
+        return namespace
+
+
+def cache_stats():
+    """Counters of every namespace used by this process"""
+    with _namespaces_lock:
+        namespaces = list(_namespaces.values())
+    return {namespace.name: namespace.stats() for namespace in namespaces}
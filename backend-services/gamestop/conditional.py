@@ -0,0 +1,144 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .cache import get_namespace
+
+
+class ConditionalListMixin:
+    """
+    Answer list GETs with 304 Not Modified when the client's copy is current.
+
+    The ETag is derived from Max(updated_at) and the row count of the
+    filtered queryset (one aggregate query) plus the request path, so a
+    matching If-None-Match is answered without running the list query or
+    the serializer. Soft deletes leave the filtered queryset and change the
+    count, hard deletes do too.
+
+    Put it before the generic view in the bases; it wraps get(), so views
+    customise list() rather than get().
+    """
+    last_modified_field = 'updated_at'
+
+    def get_list_etag(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        state = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field),
+            count=Count('pk'),
+        )
+        validator = f"{request.get_full_path()}|{state['last_modified']}|{state['count']}"
+        return quote_etag(hashlib.md5(validator.encode(), usedforsecurity=False).hexdigest())
+
+    def get_conditional_headers(self, etag):
+        return {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+    def is_not_modified(self, request, etag):
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        return etag in if_none_match or '*' in if_none_match
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        headers = self.get_conditional_headers(etag)
+
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = super().get(request, *args, **kwargs)
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class PageConditionalListMixin(ConditionalListMixin):
+    """
+    Conditional GETs for paginated lists too large to aggregate per request.
+
+    The ETag is derived from the page itself: the request path (cursor
+    included), the pk and last_modified_field of every row on it and the
+    paginator's links, so a client re-reading a page costs the page query
+    and nothing else, however large the list behind it. A matching
+    If-None-Match skips rendering the page.
+
+    Views customise render_page() rather than list(); rows may be model
+    instances or dicts carrying id and last_modified_field.
+    """
+
+    def get_row_validator(self, row):
+        if isinstance(row, dict):
+            return f"{row['id']}:{row[self.last_modified_field]}"
+        return f"{row.pk}:{getattr(row, self.last_modified_field)}"
+
+    def get_page_etag(self, request, page):
+        links = self.paginator.get_paginated_response([]).data
+        rows = ','.join(self.get_row_validator(row) for row in page)
+        validator = f"{request.get_full_path()}|{sorted(links.items())}|{rows}"
+        return quote_etag(hashlib.md5(validator.encode(), usedforsecurity=False).hexdigest())
+
+    def render_page(self, page):
+        return self.get_serializer(page, many=True).data
+
+    def get(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        etag = self.get_page_etag(request, page)
+        headers = self.get_conditional_headers(etag)
+
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = self.get_paginated_response(self.render_page(page))
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class CachedListMixin(ConditionalListMixin):
+    """
+    Serve list GETs from the project cache (gamestop/cache.py).
+
+    The rendered page and its ETag are stored together under the request
+    path and the query params that shape the page (the paginator's and
+    cache_query_params), so a warm GET, conditional or not, runs no query
+    at all and made-up params cannot fill the cache. The app invalidates
+    the namespace from its signals module whenever the listed model changes.
+
+    The view must render JSON only, which is the project default.
+    """
+    cache_namespace = None
+    cache_query_params = ()
+
+    def get_cache_key(self, request):
+        names = set(self.cache_query_params)
+        if self.paginator is not None:
+            names.update(filter(None, (
+                getattr(self.paginator, 'page_query_param', None),
+                getattr(self.paginator, 'page_size_query_param', None),
+            )))
+        params = sorted((name, value) for name in names for value in request.query_params.getlist(name))
+        return f"{request.path}?{urlencode(params)}"
+
+    def render_list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        response = self.list(request, *args, **kwargs)
+        return etag, JSONRenderer().render(response.data)
+
+    def get(self, request, *args, **kwargs):
+        namespace = get_namespace(self.cache_namespace)
+        etag, body = namespace.get_or_set(
+            self.get_cache_key(request),
+            lambda: self.render_list(request, *args, **kwargs),
+        )
+        headers = self.get_conditional_headers(etag)
+
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = HttpResponse(body, content_type='application/json')
+        for header, value in headers.items():
+            response[header] = value
+        return response
@@ -0,0 +1,304 @@
+"""
+Server-Sent Events for the live session dashboard.
+
+Model signals (see gaming_sessions/signals.py) publish session and station
+changes to the hub once their transaction commits. Session events carry
+the session's dashboard row, so the dashboard patches that row in place
+instead of re-fetching its lists.
+
+The hub is an in-process broadcast: each connected dashboard holds one
+async streaming response that waits on its own queue, so an idle stream
+costs nothing but a keepalive every KEEPALIVE_SECONDS. Every event is also
+appended to a short log in the cache, under an id handed out by the cache,
+so a reconnecting dashboard resumes from its Last-Event-ID. With a cache
+shared between processes (CACHE_BACKEND=file) one relay task per process
+watches the log's last id and forwards what the other web workers and
+manage.py run_scheduler published; the streams never read the log or the
+database themselves.
+
+The view is async and the stream never ends on its own, so it has to be
+served through ASGI (gamestop/asgi.py, e.g. uvicorn gamestop.asgi:application).
+Under WSGI it answers 503.
+
+EventSource cannot send headers, so the browser first asks for a stream
+ticket with its JWT (POST /api/events/sessions/ticket/) and opens the
+stream with ?ticket=. A ticket is signed for this stream only and expires
+after TICKET_SECONDS, so URLs in access logs are useless soon after.
+"""
+import asyncio
+import json
+import os
+import platform
+import threading
+import time
+
+from django.core import signing
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+KEEPALIVE_SECONDS = 15
+RELAY_SECONDS = 1
+TICKET_SECONDS = 60
+TICKET_SALT = 'gamestop.events.session-stream'
+
+RESYNC = "event: resync\ndata: {}\n\n"
+
+
+class Subscriber:
+    def __init__(self, loop, max_pending):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.lagged = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop events and tell the client to re-fetch
+            self.lagged = True
+
+
+class EventHub:
+    """
+    In-process broadcast hub with a shared log in the cache.
+
+    publish() may be called from any thread (request threads fire the
+    signals); delivery happens on each subscriber's event loop. Events are
+    (id, type, payload) with the payload already encoded as JSON. The log
+    keeps each event for history_seconds, so a reader that resumes from an
+    id whose events are gone, or that is more than max_pending behind, is
+    told to re-fetch.
+    """
+
+    def __init__(self, name='events', alias='default', history_seconds=300, max_pending=512):
+        self.name = name
+        self.alias = alias
+        self.history_seconds = history_seconds
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._relays = {}
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def last_id_key(self):
+        return f"{self.name}:last_id"
+
+    def event_key(self, event_id):
+        return f"{self.name}:{event_id}"
+
+    @property
+    def origin(self):
+        # Events this process published were delivered here already
+        return f"{platform.node()}:{os.getpid()}"
+
+    def publish(self, event_type, data):
+        payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))
+        try:
+            event_id = self.cache.incr(self.last_id_key)
+        except ValueError:
+            self.latest_id()
+            event_id = self.cache.incr(self.last_id_key)
+        self.cache.set(self.event_key(event_id), (event_type, payload, self.origin), self.history_seconds)
+
+        self.deliver((event_id, event_type, payload))
+        return event_id
+
+    def deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Event loop already closed, the stream is going away
+                self.unsubscribe(subscriber)
+
+    def latest_id(self):
+        latest_id = self.cache.get(self.last_id_key)
+        if latest_id is None:
+            # First use, or the counter was evicted: start past every id
+            # handed out before, so old Last-Event-IDs are seen as gaps
+            self.cache.add(self.last_id_key, time.time_ns(), timeout=None)
+            latest_id = self.cache.get(self.last_id_key)
+        return latest_id
+
+    def since(self, last_event_id, latest_id=None):
+        """
+        Logged events after last_event_id as (id, type, payload, origin),
+        oldest first, or None when the reader has to re-fetch: the log was
+        reset, it is more than max_pending behind or an event has expired.
+        """
+        latest_id = self.latest_id() if latest_id is None else latest_id
+        if last_event_id > latest_id or latest_id - last_event_id > self.max_pending:
+            return None
+
+        ids = range(last_event_id + 1, latest_id + 1)
+        logged = self.cache.get_many([self.event_key(event_id) for event_id in ids])
+        events = []
+        for event_id in ids:
+            entry = logged.get(self.event_key(event_id))
+            if entry is None:
+                return None
+            events.append((event_id, *entry))
+        return events
+
+    def subscribe(self):
+        """Register the running event loop as a subscriber, and make sure it has a relay"""
+        loop = asyncio.get_running_loop()
+        subscriber = Subscriber(loop, self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            relay = self._relays.get(loop)
+            if relay is None or relay.done():
+                self._relays[loop] = loop.create_task(self.relay())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    async def relay(self):
+        """
+        Forward what other processes published, for as long as this loop
+        has subscribers. One cache read per RELAY_SECONDS, whatever the
+        number of streams.
+        """
+        loop = asyncio.get_running_loop()
+        cursor = await asyncio.to_thread(self.latest_id)
+        retried = False
+        while True:
+            await asyncio.sleep(RELAY_SECONDS)
+            with self._lock:
+                if not any(subscriber.loop is loop for subscriber in self._subscribers):
+                    self._relays.pop(loop, None)
+                    return
+
+            latest_id = await asyncio.to_thread(self.latest_id)
+            if latest_id == cursor:
+                continue
+
+            events = await asyncio.to_thread(self.since, cursor, latest_id)
+            if events is None and not retried:
+                # The publisher may have taken the id without logging the
+                # event yet: look once more before giving up on it
+                retried = True
+                continue
+            cursor, retried = latest_id, False
+            if events is None:
+                self.deliver(None)
+                continue
+            for event_id, event_type, payload, origin in events:
+                if origin != self.origin:
+                    self.deliver((event_id, event_type, payload))
+
+
+hub = EventHub()
+
+
+def format_event(event_id, event_type, payload):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
+
+
+async def event_stream(last_event_id=None, event_hub=None):
+    """Yield SSE chunks as events are published, until the client goes away"""
+    event_hub = hub if event_hub is None else event_hub
+    subscriber = event_hub.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+
+        sent = 0
+        if last_event_id is not None:
+            missed = await asyncio.to_thread(event_hub.since, last_event_id)
+            if missed is None:
+                yield RESYNC
+            elif missed:
+                sent = missed[-1][0]
+                yield ''.join(format_event(*event[:3]) for event in missed)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+
+            if subscriber.lagged or event is None:
+                subscriber.lagged = False
+                yield RESYNC
+            # Published while the missed events were being read
+            if event is not None and event[0] > sent:
+                yield format_event(*event)
+    finally:
+        event_hub.unsubscribe(subscriber)
+
+
+def issue_ticket(user):
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def authenticate(request):
+    """
+    Accept a stream ticket (?ticket=) or a JWT in the Authorization header.
+    Nothing is read from the database.
+    """
+    ticket = request.GET.get('ticket')
+    if ticket:
+        try:
+            signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_SECONDS)
+        except signing.BadSignature:
+            return False
+        return True
+
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if not raw_token:
+        return False
+    try:
+        authentication.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return False
+    return True
+
+
+class SessionEventTicketView(APIView):
+    """A short-lived ticket to open the event stream with"""
+
+    def post(self, request, *args, **kwargs):
+        return Response({'ticket': issue_ticket(request.user), 'expires_in': TICKET_SECONDS})
+
+
+async def session_events(request):
+    """Stream session create/update/checkout and station occupancy events"""
+    if not authenticate(request):
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided or are invalid.'},
+            status=401
+        )
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker would have to buffer a stream that never ends
+        return JsonResponse({'detail': 'The event stream is only served over ASGI.'}, status=503)
+
+    # Browsers resend Last-Event-ID on their own reconnects; the dashboard
+    # passes it as ?last_event_id= when it reconnects with a new ticket
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', ''))
+    except ValueError:
+        last_event_id = None
+
+    response = StreamingHttpResponse(event_stream(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
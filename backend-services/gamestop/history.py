@@ -0,0 +1,163 @@
+"""
+Deferred writes for django-simple-history.
+
+simple_history saves one historical row per save(), inside the request's
+transaction. With HISTORY_WRITE_MODE = 'deferred' the rows are built at
+save time (so history_date, history_user and the field values are exactly
+what a synchronous write would record) but only inserted after the
+transaction commits, with one bulk_create per history model:
+
+- during a request, committed rows are held until request_finished, which
+  fires once the response has been handed to the server, so every row the
+  request wrote goes out in one batch off the response path. The flush is
+  connected ahead of Django's close_old_connections so it runs on the
+  request's connection and that connection is still cleaned up after it;
+- anywhere else (management commands, the shell) they are flushed as soon
+  as the transaction has committed.
+
+Each row is handed to transaction.on_commit() on its own, so a row saved
+inside a savepoint that is rolled back is dropped along with the change it
+describes. The flush itself is queued once per transaction, behind every
+row, and only a rollback that drops all of its rows takes it along. Saves
+outside an atomic block have nothing to wait for and are written
+immediately, as in 'sync' mode.
+
+A worker killed between commit and flush loses those rows, and a failed
+flush is logged and drops them, which is why 'sync' is the default.
+"""
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import DatabaseError, close_old_connections, transaction
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+from simple_history.signals import post_create_historical_record, pre_create_historical_record
+
+
+logger = logging.getLogger(__name__)
+
+SYNC = 'sync'
+DEFERRED = 'deferred'
+
+
+def deferred_enabled():
+    return getattr(settings, 'HISTORY_WRITE_MODE', SYNC) == DEFERRED
+
+
+class DeferredHistoryWriter:
+    """Per-thread collector of historical rows waiting to be inserted"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    @property
+    def pending(self):
+        if not hasattr(self.local, 'pending'):
+            self.local.pending = []
+        return self.local.pending
+
+    def add(self, history_instance, record, using=None):
+        transaction.on_commit(lambda: self.pending.append((history_instance, record)), using=using)
+
+        # Keep a single flush at the back of the queue, so it runs after every
+        # row that survived the transaction. It belongs only to the savepoints
+        # every one of its rows was saved in: rolling one of those back drops
+        # all of the rows, while rolling back any other leaves the flush for
+        # the rest. The previous flush is a few callbacks back at most.
+        connection = transaction.get_connection(using)
+        hooks = connection.run_on_commit
+        savepoint_ids = set(connection.savepoint_ids)
+        for index in range(len(hooks) - 2, -1, -1):
+            if hooks[index][1] == self.committed:
+                savepoint_ids &= hooks[index][0]
+                del hooks[index]
+                break
+        hooks.append((savepoint_ids, self.committed, False))
+
+    def committed(self):
+        # A running request flushes once, when it finishes
+        if not getattr(self.local, 'in_request', False):
+            self.flush()
+
+    def flush(self):
+        """Insert every committed row still waiting. Returns the number written"""
+        rows, self.local.pending = self.pending, []
+        if not rows:
+            return 0
+
+        by_model = defaultdict(list)
+        for history_instance, record in rows:
+            by_model[type(history_instance)].append(history_instance)
+        try:
+            with transaction.atomic():
+                for model, instances in by_model.items():
+                    model.objects.bulk_create(instances)
+        except DatabaseError:
+            logger.exception('Lost %d deferred historical rows', len(rows))
+            raise
+
+        for history_instance, record in rows:
+            post_create_historical_record.send(sender=type(history_instance), **record)
+        return len(rows)
+
+    def request_started(self, **kwargs):
+        self.local.in_request = True
+
+    def request_finished(self, **kwargs):
+        self.local.in_request = False
+        try:
+            self.flush()
+        except DatabaseError:
+            # Already logged; the response is out and the connection still
+            # has to be cleaned up
+            pass
+
+
+writer = DeferredHistoryWriter()
+
+request_started.connect(writer.request_started, dispatch_uid='gamestop_history_request_started')
+# Flush before Django closes the request's connections, not after
+request_finished.disconnect(close_old_connections)
+request_finished.connect(writer.request_finished, dispatch_uid='gamestop_history_request_finished')
+request_finished.connect(close_old_connections)
+
+
+class DeferredHistoricalRecords(HistoricalRecords):
+    """HistoricalRecords that follows HISTORY_WRITE_MODE (see module docstring)"""
+
+    def create_historical_record(self, instance, history_type, using=None):
+        connection = transaction.get_connection(using)
+        # Many-to-many history needs the parent row's id, so it stays synchronous
+        if not deferred_enabled() or not connection.in_atomic_block or self.m2m_fields:
+            return super().create_historical_record(instance, history_type, using)
+
+        # Mirrors HistoricalRecords.create_historical_record up to the save
+        using = using if self.use_base_model_db else None
+        history_date = getattr(instance, '_history_date', timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(instance, history_type, using)
+        manager = getattr(instance, self.manager_name)
+
+        attrs = {field.attname: getattr(instance, field.attname) for field in self.fields_included(instance)}
+        if getattr(manager.model, 'history_relation', None) is not None:
+            attrs['history_relation'] = instance
+
+        history_instance = manager.model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+        record = {
+            'instance': instance,
+            'history_date': history_date,
+            'history_user': history_user,
+            'history_change_reason': history_change_reason,
+            'using': using,
+        }
+        pre_create_historical_record.send(sender=manager.model, history_instance=history_instance, **record)
+        writer.add(history_instance, dict(record, history_instance=history_instance), using=using)
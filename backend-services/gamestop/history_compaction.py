@@ -0,0 +1,171 @@
+"""
+Retention and compaction for the historical* tables.
+
+Every save of a tracked model adds a row, including saves that change
+nothing but updated_at and the two station flips of every session. The
+compactor prunes those tables in three passes, each deleting in batches
+of its own transaction so it can run against a live database:
+
+- expired: rows older than the retention window, except the newest row of
+  each object that still exists, so as_of() keeps a baseline;
+- no-op: '~' rows whose tracked values equal the previous kept row;
+- collapsed: older than the collapse window, only the last '~' row of each
+  object per local day is kept. '+' and '-' rows are always kept.
+
+Models in FULL_FIDELITY are reported but never touched.
+"""
+from datetime import timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from simple_history.models import registered_models
+
+
+# Past session costs are audited against the price history, so every
+# pricing change is kept for good
+FULL_FIDELITY = {'service_prices.ServicePrice'}
+
+# Bumped by every save, so rows that differ only here are no-ops
+IGNORED_FIELDS = {'updated_at', 'updated_by_id'}
+
+PASSES = ('expired', 'noop', 'collapsed')
+
+
+def history_models():
+    """(model label, history model) for every model with HistoricalRecords"""
+    tracked = []
+    for model in registered_models.values():
+        manager_name = getattr(model._meta, 'simple_history_manager_attribute', None)
+        if manager_name:
+            tracked.append((model._meta.label, getattr(model, manager_name).model))
+    return sorted(tracked)
+
+
+def table_bytes(table):
+    """On-disk size of a table and its indexes, or None where the backend cannot tell"""
+    queries = {
+        'postgresql': "SELECT pg_total_relation_size(%s)",
+        # dbstat is only there when SQLite was built with it
+        'sqlite': "SELECT SUM(pgsize) FROM dbstat WHERE name = %s",
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            return cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+
+
+def table_sizes():
+    """{table: (rows, bytes)} for every historical table"""
+    return {
+        history._meta.db_table: (history.objects.count(), table_bytes(history._meta.db_table))
+        for _, history in history_models()
+    }
+
+
+class HistoryCompactor:
+    def __init__(self, retention_days, collapse_after_days, batch_size=1000, dry_run=False, now=None):
+        now = now or timezone.now()
+        self.retention_cutoff = now - timedelta(days=retention_days)
+        self.collapse_cutoff = now - timedelta(days=collapse_after_days)
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def run(self):
+        """Yield (model label, {pass: rows deleted}) for every tracked model"""
+        for label, history in history_models():
+            if label in FULL_FIDELITY:
+                yield label, None
+                continue
+            counts = {'expired': self.delete_expired(history)}
+            counts.update(self.compact(history))
+            yield label, counts
+
+    def delete_expired(self, history):
+        pk = history._meta.pk.attname
+        newer = history.objects.filter(id=OuterRef('id')).filter(
+            Q(history_date__gt=OuterRef('history_date'))
+            | Q(history_date=OuterRef('history_date'), **{f'{pk}__gt': OuterRef(pk)})
+        )
+        # A '-' row is the newest of an object that no longer exists
+        expired = history.objects.filter(history_date__lt=self.retention_cutoff).filter(
+            Exists(newer) | Q(history_type='-')
+        )
+        if self.dry_run:
+            return expired.count()
+
+        deleted = 0
+        while True:
+            ids = list(expired.order_by(pk).values_list(pk, flat=True)[:self.batch_size])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                history.objects.filter(**{f'{pk}__in': ids}).delete()
+            deleted += len(ids)
+
+    def compact(self, history):
+        """
+        Drop no-op and intermediate rows, a page of objects at a time.
+
+        Rows are read per page of object ids rather than streamed, because
+        SQLite cannot delete from a table while a cursor walks it.
+        """
+        pk = history._meta.pk.attname
+        fields = [field.attname for field in history.tracked_fields if field.attname not in IGNORED_FIELDS]
+        fields.remove('id')
+        live = history.objects.filter(history_date__gte=self.retention_cutoff)
+        counts = {'noop': 0, 'collapsed': 0}
+
+        last_id = None
+        while True:
+            object_ids = live.order_by('id').values_list('id', flat=True).distinct()
+            if last_id is not None:
+                object_ids = object_ids.filter(id__gt=last_id)
+            object_ids = list(object_ids[:self.batch_size])
+            if not object_ids:
+                return counts
+            last_id = object_ids[-1]
+
+            rows = (
+                live.filter(id__in=object_ids)
+                .order_by('id', 'history_date', pk)
+                .values_list(pk, 'id', 'history_type', 'history_date', *fields)
+            )
+            doomed = []
+            for reason, history_id in self.redundant(rows):
+                counts[reason] += 1
+                doomed.append(history_id)
+            if doomed and not self.dry_run:
+                with transaction.atomic():
+                    for start in range(0, len(doomed), self.batch_size):
+                        history.objects.filter(**{f'{pk}__in': doomed[start:start + self.batch_size]}).delete()
+
+    def redundant(self, rows):
+        """Yield (pass, history id) for the rows compact() drops, given rows ordered per object"""
+        rows = list(rows)
+        kept = None
+        for index, (history_id, object_id, history_type, history_date, *values) in enumerate(rows):
+            if kept is None or kept[0] != object_id:
+                kept = (object_id, values)
+                continue
+            if history_type == '~' and values == kept[1]:
+                yield 'noop', history_id
+                continue
+
+            following = rows[index + 1] if index + 1 < len(rows) else None
+            if (
+                history_type == '~'
+                and history_date < self.collapse_cutoff
+                and following is not None
+                and following[1] == object_id
+                and following[2] == '~'
+                and following[3] < self.collapse_cutoff
+                and timezone.localdate(following[3]) == timezone.localdate(history_date)
+            ):
+                yield 'collapsed', history_id
+                continue
+            kept = (object_id, values)
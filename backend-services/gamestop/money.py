@@ -0,0 +1,62 @@
+"""
+Money handling.
+
+Amounts are Decimal rupees with two places end to end: every money column
+is a DecimalField(decimal_places=2), prices come out of the price matrix
+as Decimal and the arithmetic on them stays Decimal. to_money() is the way
+in for anything else (ints, strings, legacy floats) and rounds half up to
+the paisa.
+
+SQLite keeps DecimalField columns as REAL and adds them up as floats, so
+sums are taken over whole paise instead (money_sum()): an integer SUM is
+exact on every backend and cheaper than a numeric one on PostgreSQL.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import models
+from django.db.models import F, Sum
+from django.db.models.functions import Cast, Round
+
+
+PAISE_PER_RUPEE = 100
+PAISA = Decimal('0.01')
+
+
+def to_money(value):
+    """Decimal rupees rounded half up to the paisa; None stays None"""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        # repr() is the shortest decimal that round-trips, so 80.1 stays 80.1
+        value = repr(value)
+    return Decimal(value).quantize(PAISA, rounding=ROUND_HALF_UP)
+
+
+def to_minor_units(amount):
+    """Whole paise of an amount"""
+    return int(to_money(amount) * PAISE_PER_RUPEE)
+
+
+def from_minor_units(paise):
+    return (Decimal(paise) / PAISE_PER_RUPEE).quantize(PAISA)
+
+
+class MinorUnitsField(models.BigIntegerField):
+    """Output field of paise computed in the database, read back as Decimal rupees"""
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return from_minor_units(value)
+
+
+def minor_units(expression):
+    """SQL expression: a money column or expression as whole paise"""
+    if isinstance(expression, str):
+        expression = F(expression)
+    return Cast(Round(expression * PAISE_PER_RUPEE), models.BigIntegerField())
+
+
+def money_sum(expression, **extra):
+    """SUM of a money column or expression in whole paise, as Decimal rupees"""
+    return Sum(minor_units(expression), output_field=MinorUnitsField(), **extra)
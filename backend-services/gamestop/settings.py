@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from decouple import config
 import os
+import tempfile
 from datetime import timedelta
 
 
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
     'corsheaders',
 
     # installed apps
+    'analytics',
     'durations',
     'game_types',
     'gaming_sessions',
@@ -119,6 +121,57 @@ else:
     }
 
 
+# Cache
+# LocMemCache is per process; set CACHE_BACKEND=file to share one cache
+# between worker processes and manage.py run_scheduler on the same host, so
+# an invalidation or dashboard event in one reaches the others (see
+# gamestop/cache.py and gamestop/events.py)
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_TIMEOUT = config('CACHE_TIMEOUT', default=300, cast=int)
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_LOCATION', default=os.path.join(tempfile.gettempdir(), 'gamestop-cache')),
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gamestop',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+
+
+# History
+# 'sync' inserts each simple_history row as the model is saved; 'deferred'
+# holds them until the transaction commits and writes them with one
+# bulk_create per model, at the cost of losing them if the worker dies or
+# the flush fails (see gamestop/history.py)
+HISTORY_WRITE_MODE = config('HISTORY_WRITE_MODE', default='sync')
+# Defaults for manage.py compact_history (see gamestop/history_compaction.py)
+HISTORY_RETENTION_DAYS = config('HISTORY_RETENTION_DAYS', default=365, cast=int)
+HISTORY_COLLAPSE_AFTER_DAYS = config('HISTORY_COLLAPSE_AFTER_DAYS', default=30, cast=int)
+
+
+# Phone numbers
+# Prepended to numbers entered without one (see user_profiles/phones.py)
+PHONE_DEFAULT_COUNTRY_CODE = config('PHONE_DEFAULT_COUNTRY_CODE', default='91')
+
+
+# Session expiry
+# Defaults for manage.py run_scheduler (see gaming_sessions/expiry.py):
+# minutes past check_out_time before a session is overdue, and whether
+# overdue sessions are checked out ('complete') or marked overdue on the
+# session for staff to handle ('flag')
+SESSION_EXPIRY_GRACE_MINUTES = config('SESSION_EXPIRY_GRACE_MINUTES', default=5, cast=int)
+SESSION_EXPIRY_ACTION = config('SESSION_EXPIRY_ACTION', default='complete')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
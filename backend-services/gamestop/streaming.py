@@ -0,0 +1,18 @@
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def stream_json_array(rows, batch_size=500):
+    """Encode rows as a JSON array, yielding a batch of rows at a time"""
+    encode = JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    yield '['
+    batch = []
+    separator = ''
+    for row in rows:
+        batch.append(encode(row))
+        if len(batch) == batch_size:
+            yield separator + ','.join(batch)
+            separator = ','
+            batch = []
+    if batch:
+        yield separator + ','.join(batch)
+    yield ']'
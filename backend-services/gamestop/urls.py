@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .events import SessionEventTicketView, session_events
+
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -32,11 +34,17 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
 
+    # Live dashboard event stream (Server-Sent Events)
+    path('api/events/sessions/', session_events, name='session-events'),
+    path('api/events/sessions/ticket/', SessionEventTicketView.as_view(), name='session-events-ticket'),
+
     # apps urls
+    path('api/analytics/', include('analytics.urls')),
     path('api/durations/', include('durations.urls')),
     path('api/gaming-sessions/', include('gaming_sessions.urls')),
     path('api/payments/', include('payments.urls')),
     path('api/roles/', include('roles.urls')),
+    path('api/service-prices/', include('service_prices.urls')),
     path('api/session-snacks/', include('session_snacks.urls')),
     path('api/snacks/', include('snacks.urls')),
     path('api/user-profiles/', include('user_profiles.urls')),
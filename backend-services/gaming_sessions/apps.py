@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GamingSessionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gaming_sessions'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models import Case, DateTimeField, DurationField, ExpressionWrapper, F, Value, When
+from django.utils import timezone
+
+from stations.models import Station
+from .models import OPEN_SESSIONS, GamingSession, SessionSegment
+from .signals import sessions_checked_out
+
+
+@transaction.atomic
+def checkout_sessions(session_ids=None, user=None, overdue_at=None):
+    """
+    End many active or paused sessions at once and free their stations.
+
+    session_ids=None ends every open session. Independent of how many
+    sessions are closed this runs one SELECT, one UPDATE each for the
+    sessions and the stations, and one history INSERT each; open pauses
+    are closed in the same UPDATE and cost one more INSERT for their
+    segments. Returns the checked-out sessions; ids that are unknown or
+    no longer open are skipped.
+
+    With overdue_at only active sessions scheduled to end by then are
+    closed, and they keep their scheduled check_out_time (see
+    gaming_sessions/expiry.py).
+    """
+    sessions = (
+        GamingSession.objects
+        .select_for_update(of=('self',))
+        .select_related('station')
+        .filter(OPEN_SESSIONS, archive=False)
+        .order_by('id')
+    )
+    if session_ids is not None:
+        sessions = sessions.filter(id__in=session_ids)
+    if overdue_at is not None:
+        # A paused session's check_out_time is not due until it resumes
+        sessions = sessions.filter(session_status='ACTIVE', check_out_time__lte=overdue_at)
+    sessions = list(sessions)
+    if not sessions:
+        return []
+
+    now = timezone.now()
+    session_updates = {
+        'session_status': 'COMPLETED',
+        'updated_by': user,
+        'updated_at': now,
+    }
+    if overdue_at is None:
+        session_updates['check_out_time'] = now
+    paused = [session for session in sessions if session.paused_at is not None]
+    db_updates = dict(session_updates)
+    if paused:
+        # The open pause ends now; the rest is the same for every row
+        db_updates['paused_at'] = None
+        db_updates['paused_duration'] = Case(
+            When(paused_at__isnull=False, then=ExpressionWrapper(
+                F('paused_duration') + (Value(now, output_field=DateTimeField()) - F('paused_at')),
+                output_field=DurationField(),
+            )),
+            default=F('paused_duration'),
+        )
+    # Every row gets the same values, so a single UPDATE ... WHERE id IN
+    # does what bulk_update would without a CASE per row and field
+    GamingSession.objects.filter(id__in=[session.id for session in sessions]).update(**db_updates)
+    for session in sessions:
+        for field, value in session_updates.items():
+            setattr(session, field, value)
+    if paused:
+        SessionSegment.objects.bulk_create([
+            SessionSegment(session=session, created_by=user, kind='PAUSE', started_at=session.paused_at, ended_at=now)
+            for session in paused
+        ])
+        for session in paused:
+            session.paused_duration += now - session.paused_at
+            session.paused_at = None
+    GamingSession.history.bulk_history_create(sessions, update=True, default_user=user)
+
+    stations = list({session.station.id: session.station for session in sessions if session.station}.values())
+    if stations:
+        station_updates = {'is_active': True, 'updated_by': user, 'updated_at': now}
+        Station.objects.filter(id__in=[station.id for station in stations]).update(**station_updates)
+        for station in stations:
+            for field, value in station_updates.items():
+                setattr(station, field, value)
+        Station.history.bulk_history_create(stations, update=True, default_user=user)
+
+    sessions_checked_out.send(sender=GamingSession, sessions=sessions, stations=stations)
+    return sessions
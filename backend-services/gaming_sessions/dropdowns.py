@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+
+from durations.models import Duration
+from gamestop.cache import VersionedValue, get_namespace
+from service_prices.pricing import price_matrix
+from stations.models import Station
+from .serializers import ActiveStatationDropDownSerializer, DurationDropdownSerializer
+
+
+class DropDownBundle:
+    """
+    Pre-rendered payload of the new-session modal drop-downs.
+
+    Built from stations, durations and the price matrix on first use,
+    shared through the 'dropdowns' cache namespace and kept until one of
+    those tables changes (see gaming_sessions/signals.py). The version is
+    a hash of the content, so it only moves when the drop-downs actually
+    differ.
+
+    Stations are also revalidated against the database on every get():
+    occupancy flips in every worker and in the run_scheduler process, and
+    those may not share a cache with this one.
+    """
+
+    def __init__(self):
+        self._value = VersionedValue(get_namespace('dropdowns'), 'bundle', self._build, stamp=self._stamp)
+
+    def _stamp(self):
+        stations = Station.objects.order_by().aggregate(latest=Max('updated_at'), count=Count('id'))
+        return stations['latest'], stations['count']
+
+    def _build(self):
+        active_stations = (
+            Station.objects
+            .filter(is_active=True)
+            .select_related('game_type__service_type')
+        )
+        durations = Duration.objects.filter(archive=False)
+
+        payload = {
+            'active_stations': ActiveStatationDropDownSerializer(active_stations, many=True).data,
+            'durations': DurationDropdownSerializer(durations, many=True).data,
+            'number_of_players': list(price_matrix.player_counts()),
+        }
+        content = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+        version = hashlib.sha1(content.encode(), usedforsecurity=False).hexdigest()[:16]
+
+        body = json.dumps({'version': version, 'changed': True, **json.loads(content)}, separators=(',', ':'))
+        return version, body.encode()
+
+    def get(self):
+        """Return (version, rendered JSON body)"""
+        return self._value.get()
+
+    def invalidate(self):
+        """Drop the bundle in every process sharing the cache"""
+        self._value.invalidate()
+
+
+dropdown_bundle = DropDownBundle()
@@ -0,0 +1,168 @@
+"""
+Automatic expiry of overdue sessions.
+
+check_out_time is stamped at check-in (and moved by extensions and
+pauses), but nothing used to act when it passed, so stations stayed
+occupied until someone noticed. ExpiryScheduler keeps a min-heap of
+(check_out_time, session id) for every active session and sleeps until
+the earliest one. Due sessions are handed to checkout_sessions() in
+batches, which re-checks the deadline under the row lock and frees the
+stations. A session whose deadline moved since it was scheduled is simply
+put back with the new one.
+
+With action=FLAG overdue sessions stay open instead: they are stamped
+with overdue_at (one conditional UPDATE per batch) and the dashboards are
+told, so staff can end or extend them; extending or resuming a session
+clears the flag.
+
+The scheduler runs in its own process (manage.py run_scheduler) and
+learns about new check-ins, extensions and resumed pauses by re-reading
+the active sessions every refresh_interval; that query only walks the
+gs_open_idx partial index.
+"""
+import heapq
+import threading
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .checkout import checkout_sessions
+from .models import GamingSession
+from .signals import sessions_flagged_overdue
+
+COMPLETE = 'complete'
+FLAG = 'flag'
+
+
+class ExpiryScheduler:
+    """
+    action=COMPLETE checks overdue sessions out at their scheduled time;
+    action=FLAG stamps them overdue once and leaves them open. A session
+    is overdue grace after its check_out_time.
+    """
+
+    def __init__(self, clock=timezone.now, grace=timedelta(0), batch_size=100,
+                 refresh_interval=timedelta(seconds=60), action=COMPLETE):
+        self.clock = clock
+        self.grace = grace
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.action = action
+        self.heap = []
+        # session id -> the deadline its live heap entry carries; older
+        # entries for the same id are skipped when they surface
+        self.deadlines = {}
+        self.next_refresh = None
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, session_id, deadline):
+        if self.deadlines.get(session_id) == deadline:
+            return
+        self.deadlines[session_id] = deadline
+        heapq.heappush(self.heap, (deadline, session_id))
+
+    def scheduled_sessions(self):
+        """The sessions that have a deadline to wait for"""
+        sessions = GamingSession.objects.filter(session_status='ACTIVE', archive=False).exclude(check_out_time=None)
+        if self.action == FLAG:
+            # Flagged already; extending or resuming clears the flag
+            sessions = sessions.filter(overdue_at=None)
+        return sessions
+
+    def load(self):
+        """(Re)build the heap from the active sessions"""
+        active = dict(self.scheduled_sessions().values_list('id', 'check_out_time'))
+        for session_id in set(self.deadlines) - set(active):
+            del self.deadlines[session_id]
+        for session_id, deadline in active.items():
+            self.schedule(session_id, deadline)
+        # Drop the entries left behind so the heap stays the size of the dashboard
+        self.heap = [(deadline, session_id) for deadline, session_id in self.heap
+                     if self.deadlines.get(session_id) == deadline]
+        heapq.heapify(self.heap)
+        self.next_refresh = self.clock() + self.refresh_interval
+
+    def next_wakeup(self):
+        """When tick() next has something to do"""
+        if self.heap and self.heap[0][0] + self.grace < self.next_refresh:
+            return self.heap[0][0] + self.grace
+        return self.next_refresh
+
+    def pop_due(self, now):
+        """Remove and return the ids of every session overdue at now, earliest first"""
+        due = []
+        while self.heap and self.heap[0][0] + self.grace <= now:
+            deadline, session_id = heapq.heappop(self.heap)
+            if self.deadlines.get(session_id) == deadline:
+                del self.deadlines[session_id]
+                due.append(session_id)
+        return due
+
+    def tick(self):
+        """Refresh if it is time to, then handle every overdue session. Returns the ids acted on"""
+        now = self.clock()
+        if self.next_refresh is None or now >= self.next_refresh:
+            self.load()
+
+        due = self.pop_due(now)
+        handled = []
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            if self.action == FLAG:
+                handled.extend(self.flag(batch, now))
+            else:
+                handled.extend(self.expire(batch, now))
+        return handled
+
+    def reschedule(self, session_ids):
+        """Put back the sessions extended, paused or closed by hand since they were scheduled"""
+        if not session_ids:
+            return
+        rescheduled = self.scheduled_sessions().filter(id__in=session_ids).values_list('id', 'check_out_time')
+        for session_id, deadline in rescheduled:
+            self.schedule(session_id, deadline)
+
+    def expire(self, session_ids, now):
+        sessions = checkout_sessions(session_ids, overdue_at=now - self.grace)
+        expired = [session.id for session in sessions]
+        self.reschedule(set(session_ids) - set(expired))
+        return expired
+
+    @transaction.atomic
+    def flag(self, session_ids, now):
+        """Stamp overdue_at on the sessions still overdue and not flagged yet, and tell the dashboards"""
+        sessions = list(
+            GamingSession.objects
+            .select_for_update()
+            .filter(
+                id__in=session_ids, session_status='ACTIVE', archive=False,
+                overdue_at=None, check_out_time__lte=now - self.grace,
+            )
+            .order_by('id')
+        )
+        flagged = [session.id for session in sessions]
+        if sessions:
+            GamingSession.objects.filter(id__in=flagged).update(overdue_at=now, updated_at=now)
+            for session in sessions:
+                session.overdue_at = session.updated_at = now
+            GamingSession.history.bulk_history_create(sessions, update=True)
+            sessions_flagged_overdue.send(sender=GamingSession, sessions=sessions)
+
+        self.reschedule(set(session_ids) - set(flagged))
+        return flagged
+
+    def run(self, stop=None, report=None):
+        """Tick until stop (a threading.Event) is set, passing the ids each tick handled to report"""
+        stop = stop or threading.Event()
+        self.load()
+        while not stop.is_set():
+            # A long-lived worker must not hold on to a dropped connection
+            close_old_connections()
+            handled = self.tick()
+            if handled and report:
+                report(handled)
+            wait = (self.next_wakeup() - self.clock()).total_seconds()
+            stop.wait(max(wait, 0))
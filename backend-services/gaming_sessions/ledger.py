@@ -0,0 +1,127 @@
+"""
+Running totals of a session's bill.
+
+    total_session_cost = calculated_gaming_cost + snacks
+    balance_due        = total_session_cost - completed payments
+
+where only non-archived SessionSnack and Payment rows count. Each row's
+share of those totals (its ledger entry) is remembered when it is loaded;
+saving or deleting it applies only the difference, as one
+UPDATE ... SET total_session_cost = total_session_cost + delta, which also
+moves updated_at so list ETags change. Nothing re-sums child rows and two
+terminals adding items at once cannot overwrite each other's total.
+
+The receivers live in gaming_sessions/signals.py. Queryset update() and
+bulk_create() skip them; rebuild_ledger() recomputes sessions from their
+rows after such writes.
+"""
+from decimal import Decimal
+
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from .models import GamingSession
+
+
+ZERO = Decimal('0.00')
+
+# Model -> fields its ledger entry is computed from
+ENTRY_FIELDS = {
+    SessionSnack: ('gaming_session_id', 'total_cost', 'archive'),
+    Payment: ('session_id', 'amount_paid', 'payment_status', 'archive'),
+}
+
+
+def entry(instance):
+    """(session id, amount this row adds to the bill) as stored right now"""
+    if isinstance(instance, SessionSnack):
+        if instance.archive or instance.total_cost is None:
+            return instance.gaming_session_id, ZERO
+        return instance.gaming_session_id, instance.total_cost
+    if instance.archive or instance.payment_status != 'COMPLETED':
+        return instance.session_id, ZERO
+    return instance.session_id, instance.amount_paid
+
+
+def remember(instance):
+    """Note the row's entry as loaded, so the next save can apply the difference"""
+    # post_init runs before from_db() clears _state.adding, so go by the pk
+    if instance.pk is None:
+        instance._ledger_entry = (None, ZERO)
+    elif instance.get_deferred_fields() & set(ENTRY_FIELDS[type(instance)]):
+        # Loaded with only() and missing a field: recall() reads it before saving
+        instance._ledger_entry = None
+    else:
+        instance._ledger_entry = entry(instance)
+
+
+def recall(instance):
+    """Before a save or delete: read the stored entry if remember() could not"""
+    if getattr(instance, '_ledger_entry', None) is None:
+        fields = ENTRY_FIELDS[type(instance)]
+        stored = type(instance).objects.filter(pk=instance.pk).only(*fields).first()
+        instance._ledger_entry = entry(stored) if stored is not None else (None, ZERO)
+
+
+def post(session_id, amount, is_payment, user_id=None):
+    """
+    Move a session's totals by amount: a snack adds to the bill, a payment
+    pays it off. Returns True if the session changed.
+    """
+    if session_id is None or not amount:
+        return False
+    if is_payment:
+        updates = {'balance_due': F('balance_due') - amount}
+    else:
+        updates = {
+            'total_session_cost': F('total_session_cost') + amount,
+            'balance_due': F('balance_due') + amount,
+        }
+    updates['updated_at'] = timezone.now()
+    if user_id is not None:
+        updates['updated_by_id'] = user_id
+    return bool(GamingSession.objects.filter(id=session_id).update(**updates))
+
+
+def record_change(instance, deleted=False):
+    """
+    Apply the difference between the row's remembered and current entry.
+    Returns the ids of the sessions whose totals moved.
+    """
+    is_payment = isinstance(instance, Payment)
+    user_id = instance.updated_by_id
+    old_session_id, old_amount = instance._ledger_entry
+    new_session_id, new_amount = (None, ZERO) if deleted else entry(instance)
+
+    if old_session_id == new_session_id:
+        postings = [(new_session_id, new_amount - old_amount)]
+    else:
+        # Moved to another session
+        postings = [(old_session_id, -old_amount), (new_session_id, new_amount)]
+    instance._ledger_entry = (new_session_id, new_amount)
+    return [
+        session_id for session_id, amount in postings
+        if post(session_id, amount, is_payment, user_id)
+    ]
+
+
+def rebuild_ledger(sessions):
+    """Recompute total_session_cost and balance_due of sessions (a queryset) from their rows"""
+    snacks = (
+        SessionSnack.objects.filter(gaming_session=OuterRef('pk'), archive=False)
+        .order_by().values('gaming_session').annotate(total=Sum('total_cost')).values('total')
+    )
+    payments = (
+        Payment.objects.filter(session=OuterRef('pk'), archive=False, payment_status='COMPLETED')
+        .order_by().values('session').annotate(total=Sum('amount_paid')).values('total')
+    )
+    snack_total = Coalesce(Subquery(snacks), Value(ZERO))
+    payment_total = Coalesce(Subquery(payments), Value(ZERO))
+    return sessions.update(
+        total_session_cost=F('calculated_gaming_cost') + snack_total,
+        balance_due=F('calculated_gaming_cost') + snack_total - payment_total,
+        updated_at=timezone.now(),
+    )
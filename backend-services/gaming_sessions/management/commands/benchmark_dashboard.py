@@ -0,0 +1,64 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from durations.models import Duration
+from gamestop.streaming import stream_json_array
+from stations.models import Station
+from gaming_sessions.models import GamingSession
+from gaming_sessions.query_plans import dashboard_rows
+from gaming_sessions.serializers import GamingSessionActiveDashboardSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare serializer and projection rows/sec for the past sessions list (all writes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=10000)
+        parser.add_argument('--customers', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['sessions'], options['customers'])
+            queryset = GamingSession.objects.filter(session_status='COMPLETED', archive=False)
+
+            started = time.perf_counter()
+            JSONRenderer().render(GamingSessionActiveDashboardSerializer(queryset, many=True).data)
+            self._report('serializer', options['sessions'], time.perf_counter() - started)
+
+            started = time.perf_counter()
+            ''.join(stream_json_array(dashboard_rows(queryset)))
+            self._report('projection', options['sessions'], time.perf_counter() - started)
+
+            transaction.set_rollback(True)
+
+    def _seed(self, sessions, customers):
+        users = User.objects.bulk_create(
+            User(username=f'benchmark-customer-{number}') for number in range(customers)
+        )
+        stations = list(Station.objects.all())
+        duration = Duration.objects.filter(archive=False).first()
+        now = timezone.now()
+        GamingSession.objects.bulk_create(
+            (
+                GamingSession(
+                    user=users[number % len(users)],
+                    station=stations[number % len(stations)],
+                    duration=duration,
+                    check_in_time=now,
+                    check_out_time=now,
+                    calculated_gaming_cost=100,
+                    total_session_cost=100,
+                    session_status='COMPLETED',
+                )
+                for number in range(sessions)
+            ),
+            batch_size=1000,
+        )
+
+    def _report(self, label, rows, elapsed):
+        self.stdout.write(f"{label:>10}: {rows / elapsed:10.0f} rows/sec ({elapsed * 1000:.0f} ms)")
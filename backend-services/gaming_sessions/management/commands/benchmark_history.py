@@ -0,0 +1,86 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from game_types.models import GameType
+from gamestop.history import DEFERRED, SYNC, writer
+from stations.models import Station
+from gaming_sessions.models import GamingSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Time session create/update transactions with synchronous and deferred history writes. "
+        "Each pair runs as one simulated request, so deferred rows are flushed after the timed part "
+        "like they would be after the response. The transactions really commit; everything created "
+        "is deleted again afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=200)
+
+    def handle(self, *args, **options):
+        customer = User.objects.create(username='benchmark-history-customer')
+        station = Station.objects.create(name='Benchmark history station', game_type=GameType.objects.first())
+        session_ids = []
+        try:
+            for mode in (SYNC, DEFERRED):
+                with override_settings(HISTORY_WRITE_MODE=mode):
+                    created, updated, flushed = self._run(customer, station, options['sessions'], session_ids)
+                self._report(mode, 'create', created)
+                self._report(mode, 'update', updated)
+                self._report(mode, 'flush', flushed)
+        finally:
+            self._clean_up(customer, station, session_ids)
+
+    def _run(self, customer, station, sessions, session_ids):
+        created, updated, flushed = [], [], []
+        for _ in range(sessions):
+            writer.request_started()
+
+            # Check-in: the session row plus the station it occupies
+            started = time.perf_counter()
+            with transaction.atomic():
+                session = GamingSession.objects.create(
+                    user=customer, station=station, check_in_time=timezone.now(), calculated_gaming_cost=100,
+                )
+                station.is_active = False
+                station.save()
+            created.append(time.perf_counter() - started)
+            session_ids.append(session.id)
+
+            # Check-out: both rows change again
+            started = time.perf_counter()
+            with transaction.atomic():
+                session.session_status = 'COMPLETED'
+                session.check_out_time = timezone.now()
+                session.total_session_cost = 100
+                session.save()
+                station.is_active = True
+                station.save()
+            updated.append(time.perf_counter() - started)
+
+            # After the response: the deferred rows of both transactions
+            started = time.perf_counter()
+            writer.request_finished()
+            flushed.append(time.perf_counter() - started)
+        return created, updated, flushed
+
+    def _clean_up(self, customer, station, session_ids):
+        GamingSession.objects.filter(id__in=session_ids).delete()
+        GamingSession.history.filter(id__in=session_ids).delete()
+        station_id = station.id
+        station.delete()
+        Station.history.filter(id=station_id).delete()
+        customer.delete()
+
+    def _report(self, mode, label, timings):
+        p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+        self.stdout.write(
+            f"{mode:>8} {label}: mean {statistics.mean(timings) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms"
+        )
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gamestop.history_compaction import PASSES, HistoryCompactor, table_sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Prune the historical* tables: drop rows past the retention window, no-op updates, "
+        "and intermediate updates older than the collapse window. Pricing history is kept in full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.HISTORY_RETENTION_DAYS)
+        parser.add_argument('--collapse-after-days', type=int, default=settings.HISTORY_COLLAPSE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows (or objects) per delete transaction")
+        parser.add_argument('--dry-run', action='store_true', help="Count what would be deleted without deleting")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options['collapse_after_days'] > options['retention_days']:
+            raise CommandError("--collapse-after-days must not exceed --retention-days")
+
+        before = table_sizes()
+        compactor = HistoryCompactor(
+            options['retention_days'],
+            options['collapse_after_days'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        for label, counts in compactor.run():
+            if counts is None:
+                self.stdout.write(f"{label}: kept in full")
+            else:
+                self.stdout.write(f"{label}: " + ', '.join(f"{counts[name]} {name}" for name in PASSES))
+        after = table_sizes()
+
+        self.stdout.write(f"{'table':<40} {'rows before':>12} {'rows after':>12} {'size before':>12} {'size after':>12}")
+        for table, (rows, size) in before.items():
+            rows_after, size_after = after[table]
+            self.stdout.write(
+                f"{table:<40} {rows:>12} {rows_after:>12} {self._size(size):>12} {self._size(size_after):>12}"
+            )
+        if options['dry_run']:
+            self.stdout.write("Dry run: nothing was deleted")
+
+    def _size(self, size):
+        return '-' if size is None else f"{size / 1024:.0f} KiB"
@@ -0,0 +1,93 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from durations.models import Duration
+from stations.models import Station
+from gaming_sessions.models import OPEN_SESSIONS, GamingSession
+from gaming_sessions.query_plans import DASHBOARD_ROW_FIELDS
+
+
+SESSION_TABLE = GamingSession._meta.db_table
+
+# Plan lines that read the whole sessions table
+SEQUENTIAL_SCAN_PATTERNS = {
+    'postgresql': re.compile(rf'Seq Scan on {SESSION_TABLE}\b'),
+    'sqlite': re.compile(rf'SCAN {SESSION_TABLE}\b(?!.*USING)'),
+}
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot gaming session queries on a seeded dataset and fail on sequential scans (all writes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=20000)
+        parser.add_argument('--customers', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Unsupported database vendor: {connection.vendor}")
+
+        failures = []
+        with transaction.atomic():
+            customer, station = self._seed(options['sessions'], options['customers'])
+
+            for label, queryset in self._hot_queries(customer, station):
+                plan = queryset.explain()
+                sequential = bool(pattern.search(plan))
+                if sequential:
+                    failures.append(label)
+
+                status = self.style.ERROR('SEQ SCAN') if sequential else self.style.SUCCESS('ok')
+                self.stdout.write(f"[{status}] {label}")
+                if options['verbosity'] > 1 or sequential:
+                    self.stdout.write(plan)
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Sequential scan on {SESSION_TABLE} in: {', '.join(failures)}")
+
+    def _hot_queries(self, customer, station):
+        sessions = GamingSession.objects
+        now = timezone.now()
+        return [
+            ('active dashboard', sessions.filter(OPEN_SESSIONS, archive=False).values_list(
+                *[lookup for _, lookup in DASHBOARD_ROW_FIELDS]
+            )),
+            ('past sessions page', sessions.filter(session_status='COMPLETED', archive=False)
+                .exclude(check_out_time=None).order_by('-check_out_time', '-id')[:21]),
+            ('customer history', sessions.filter(user=customer, archive=False).order_by('-check_in_time')[:20]),
+            ('station active session', sessions.filter(station=station, session_status='ACTIVE')),
+            ('day range', sessions.filter(check_in_time__gte=now - timedelta(days=1), check_in_time__lt=now)),
+        ]
+
+    def _seed(self, sessions, customers):
+        users = User.objects.bulk_create(
+            User(username=f'explain-customer-{number}') for number in range(customers)
+        )
+        stations = list(Station.objects.all())
+        duration = Duration.objects.filter(archive=False).first()
+        now = timezone.now()
+
+        def session(number):
+            check_in_time = now - timedelta(minutes=30 * number)
+            active = number < len(stations)
+            return GamingSession(
+                user=users[number % len(users)],
+                station=stations[number % len(stations)],
+                duration=duration,
+                check_in_time=check_in_time,
+                check_out_time=check_in_time + timedelta(hours=1),
+                session_status='ACTIVE' if active else 'COMPLETED',
+            )
+
+        GamingSession.objects.bulk_create((session(number) for number in range(sessions)), batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {SESSION_TABLE}')
+        return users[0], stations[0]
@@ -0,0 +1,52 @@
+import signal
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from gaming_sessions.expiry import COMPLETE, FLAG, ExpiryScheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the session expiry worker: check out sessions once they are past their check_out_time "
+        "and free their stations, or with --action flag mark them overdue for staff to end or "
+        "extend. Runs in the foreground until SIGINT/SIGTERM. Use CACHE_BACKEND=file so its "
+        "events and cache invalidations reach the web processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=settings.SESSION_EXPIRY_GRACE_MINUTES)
+        parser.add_argument('--action', choices=[COMPLETE, FLAG], default=settings.SESSION_EXPIRY_ACTION)
+        parser.add_argument('--batch-size', type=int, default=100, help="Sessions checked out per transaction")
+        parser.add_argument('--refresh-seconds', type=int, default=60, help="How often to re-read the active sessions")
+        parser.add_argument('--once', action='store_true', help="Handle what is overdue now and exit")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options['grace_minutes'] < 0 or options['refresh_seconds'] < 1:
+            raise CommandError("--grace-minutes must not be negative and --refresh-seconds must be at least 1")
+
+        scheduler = ExpiryScheduler(
+            grace=timedelta(minutes=options['grace_minutes']),
+            batch_size=options['batch_size'],
+            refresh_interval=timedelta(seconds=options['refresh_seconds']),
+            action=options['action'],
+        )
+
+        if options['once']:
+            handled = scheduler.tick()
+            self.stdout.write(f"{options['action']}: {len(handled)} overdue session(s)")
+            return
+
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+
+        self.stdout.write(f"Expiry scheduler started ({options['action']}, {options['grace_minutes']} min grace)")
+        scheduler.run(stop, report=lambda handled: self.stdout.write(
+            f"{options['action']}: {len(handled)} overdue session(s) {handled}"
+        ))
+        self.stdout.write("Expiry scheduler stopped")
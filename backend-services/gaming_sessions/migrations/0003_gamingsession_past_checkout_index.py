@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('durations', '0002_populate_default_durations'),
+        ('gaming_sessions', '0002_alter_gamingsession_notes_and_more'),
+        ('stations', '0003_populate_default_stations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamingsession',
+            index=models.Index(condition=models.Q(('archive', False), ('session_status', 'COMPLETED')), fields=['-check_out_time', '-id'], name='gs_past_checkout_idx'),
+        ),
+    ]
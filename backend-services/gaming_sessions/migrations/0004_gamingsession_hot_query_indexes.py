@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('durations', '0002_populate_default_durations'),
+        ('gaming_sessions', '0003_gamingsession_past_checkout_index'),
+        ('stations', '0003_populate_default_stations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamingsession',
+            index=models.Index(condition=models.Q(('archive', False), ('session_status', 'ACTIVE')), fields=['-id'], name='gs_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamingsession',
+            index=models.Index(fields=['user', '-check_in_time'], name='gs_user_check_in_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamingsession',
+            index=models.Index(fields=['station', 'session_status'], name='gs_station_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gamingsession',
+            index=models.Index(fields=['check_in_time'], name='gs_check_in_idx'),
+        ),
+    ]
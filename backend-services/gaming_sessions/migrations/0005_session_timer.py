@@ -0,0 +1,95 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:19
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('durations', '0002_populate_default_durations'),
+        ('gaming_sessions', '0004_gamingsession_hot_query_indexes'),
+        ('stations', '0003_populate_default_stations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PAUSE', 'PAUSE'), ('EXTEND', 'EXTEND')], max_length=10)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+            ],
+            options={
+                'ordering': ['started_at', 'id'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='gamingsession',
+            name='gs_active_idx',
+        ),
+        migrations.AddField(
+            model_name='gamingsession',
+            name='extended_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='gamingsession',
+            name='paused_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gamingsession',
+            name='paused_duration',
+            field=models.DurationField(default=datetime.timedelta(0)),
+        ),
+        migrations.AddField(
+            model_name='historicalgamingsession',
+            name='extended_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='historicalgamingsession',
+            name='paused_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalgamingsession',
+            name='paused_duration',
+            field=models.DurationField(default=datetime.timedelta(0)),
+        ),
+        migrations.AlterField(
+            model_name='gamingsession',
+            name='session_status',
+            field=models.CharField(choices=[('ACTIVE', 'ACTIVE'), ('PAUSED', 'PAUSED'), ('COMPLETED', 'COMPLETED'), ('CANCELLED', 'CANCELLED')], default='ACTIVE', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='historicalgamingsession',
+            name='session_status',
+            field=models.CharField(choices=[('ACTIVE', 'ACTIVE'), ('PAUSED', 'PAUSED'), ('COMPLETED', 'COMPLETED'), ('CANCELLED', 'CANCELLED')], default='ACTIVE', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='gamingsession',
+            index=models.Index(condition=models.Q(models.Q(('session_status', 'ACTIVE'), ('session_status', 'PAUSED'), _connector='OR'), ('archive', False)), fields=['-id'], name='gs_open_idx'),
+        ),
+        migrations.AddField(
+            model_name='sessionsegment',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='session_segments_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sessionsegment',
+            name='session',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='gaming_sessions.gamingsession'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionsegment',
+            index=models.Index(fields=['session', 'started_at'], name='segment_session_idx'),
+        ),
+    ]
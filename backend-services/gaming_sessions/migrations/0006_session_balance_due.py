@@ -0,0 +1,68 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:26
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_totals(apps, schema_editor):
+    """
+    Bring every session's totals in line with the ledger: snacks were never
+    added to total_session_cost, and nothing has been paid off yet. One
+    UPDATE per batch of session ids (same sums as ledger.rebuild_ledger).
+    """
+    GamingSession = apps.get_model('gaming_sessions', 'GamingSession')
+    SessionSnack = apps.get_model('session_snacks', 'SessionSnack')
+    Payment = apps.get_model('payments', 'Payment')
+
+    snacks = (
+        SessionSnack.objects.filter(gaming_session=OuterRef('pk'), archive=False)
+        .order_by().values('gaming_session').annotate(total=Sum('total_cost')).values('total')
+    )
+    payments = (
+        Payment.objects.filter(session=OuterRef('pk'), archive=False, payment_status='COMPLETED')
+        .order_by().values('session').annotate(total=Sum('amount_paid')).values('total')
+    )
+    snack_total = Coalesce(Subquery(snacks), Value(Decimal('0.00')))
+    payment_total = Coalesce(Subquery(payments), Value(Decimal('0.00')))
+
+    last_id = 0
+    while True:
+        ids = list(
+            GamingSession.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            return
+        last_id = ids[-1]
+        GamingSession.objects.filter(id__in=ids).update(
+            total_session_cost=F('calculated_gaming_cost') + snack_total,
+            balance_due=F('calculated_gaming_cost') + snack_total - payment_total,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gaming_sessions', '0005_session_timer'),
+        ('payments', '0001_initial'),
+        ('session_snacks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamingsession',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='historicalgamingsession',
+            name='balance_due',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gaming_sessions', '0007_live_event'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='LiveEvent',
+        ),
+    ]
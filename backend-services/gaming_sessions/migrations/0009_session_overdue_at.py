@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gaming_sessions', '0008_delete_liveevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gamingsession',
+            name='overdue_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='historicalgamingsession',
+            name='overdue_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
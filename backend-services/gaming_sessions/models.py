@@ -1,16 +1,28 @@
+from datetime import timedelta
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from stations.models import Station
 from durations.models import Duration
-from simple_history.models import HistoricalRecords
+from gamestop.history import DeferredHistoricalRecords
+
+
+# Sessions still holding their station. Spelled as ORed equalities rather
+# than __in: SQLite only matches bound parameters against the gs_open_idx
+# predicate term by term.
+OPEN_SESSIONS = models.Q(session_status='ACTIVE') | models.Q(session_status='PAUSED')
 
 class GamingSession(models.Model):
     # Choices
     SESSION_STATUS_CHOICES = [
         ('ACTIVE', 'ACTIVE'),
+        ('PAUSED', 'PAUSED'),
         ('COMPLETED', 'COMPLETED'),
         ('CANCELLED', 'CANCELLED'),
     ]
+    # See OPEN_SESSIONS
+    OPEN_STATUSES = ('ACTIVE', 'PAUSED')
 
     # Relations
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='gaming_sessions_created')
@@ -25,20 +37,87 @@ class GamingSession(models.Model):
     player_count = models.PositiveIntegerField(default=1)
     calculated_gaming_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     total_session_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Still to be paid: total_session_cost less completed payments (see gaming_sessions/ledger.py)
+    balance_due = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     session_status = models.CharField(max_length=20, choices=SESSION_STATUS_CHOICES, default='ACTIVE')
     is_walk_in_customer = models.BooleanField(default=False)
     notes = models.TextField(blank=True, default='')
 
+    # Timer state, moved by gaming_sessions/timer.py: the open pause (if any),
+    # the total of closed pauses and the minutes added on top of the booking
+    paused_at = models.DateTimeField(null=True, blank=True)
+    paused_duration = models.DurationField(default=timedelta(0))
+    extended_minutes = models.PositiveIntegerField(default=0)
+    # When the expiry worker found the session past its check_out_time with
+    # SESSION_EXPIRY_ACTION = 'flag' (see gaming_sessions/expiry.py); cleared
+    # whenever the scheduled end moves
+    overdue_at = models.DateTimeField(null=True, blank=True)
+
     # Audit fields
     archive = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     # Add this line for simple history
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     class Meta:
         ordering = ['-id']
+        indexes = [
+            # Live dashboard: the handful of active and paused sessions, newest first
+            models.Index(
+                fields=['-id'],
+                condition=models.Q(OPEN_SESSIONS, archive=False),
+                name='gs_open_idx',
+            ),
+            # Keyset pagination of the past sessions list
+            models.Index(
+                fields=['-check_out_time', '-id'],
+                condition=models.Q(session_status='COMPLETED', archive=False),
+                name='gs_past_checkout_idx',
+            ),
+            # Per-customer and per-station history
+            models.Index(fields=['user', '-check_in_time'], name='gs_user_check_in_idx'),
+            models.Index(fields=['station', 'session_status'], name='gs_station_status_idx'),
+            # Time-range reports
+            models.Index(fields=['check_in_time'], name='gs_check_in_idx'),
+        ]
 
     def __str__(self):
         return f"Session {self.id} - {self.user.username} ({self.station.name})"
+
+    def billed_time(self, now=None):
+        """Time played so far: check-in to now (or check-out) minus every pause"""
+        now = now or timezone.now()
+        end = self.check_out_time if self.session_status == 'COMPLETED' else now
+        paused = self.paused_duration
+        if self.paused_at is not None:
+            paused += now - self.paused_at
+        return max(end - self.check_in_time - paused, timedelta(0))
+
+
+class SessionSegment(models.Model):
+    """
+    Append-only trail of a session's timer: one row per closed pause or
+    extension. Rows are written once and never updated; the running
+    totals live on the session, so billing never re-reads this table.
+    """
+    KIND_CHOICES = [
+        ('PAUSE', 'PAUSE'),
+        ('EXTEND', 'EXTEND'),
+    ]
+
+    session = models.ForeignKey(GamingSession, on_delete=models.CASCADE, related_name='segments')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='session_segments_created')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    started_at = models.DateTimeField()
+    # End of a pause; extensions are instant
+    ended_at = models.DateTimeField(null=True, blank=True)
+    minutes = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['started_at', 'id']
+        indexes = [
+            models.Index(fields=['session', 'started_at'], name='segment_session_idx'),
+        ]
@@ -0,0 +1,110 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CheckOutKeysetPagination(BasePagination):
+    """
+    Keyset pagination over (check_out_time, id), newest first.
+
+    A cursor holds the (check_out_time, id) of the row a page stops at, so
+    every page is an index range scan on the matching composite index and
+    deep pages cost the same as the first one. Rows come from the view's
+    get_rows(queryset) and must be dicts carrying check_out_time and id.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = queryset.exclude(check_out_time=None)
+        if reverse:
+            queryset = queryset.order_by('check_out_time', 'id')
+        else:
+            queryset = queryset.order_by('-check_out_time', '-id')
+
+        if position is not None:
+            check_out_time, session_id = position
+            if reverse:
+                queryset = queryset.filter(
+                    Q(check_out_time__gt=check_out_time) |
+                    Q(check_out_time=check_out_time, id__gt=session_id)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(check_out_time__lt=check_out_time) |
+                    Q(check_out_time=check_out_time, id__lt=session_id)
+                )
+
+        # One extra row tells us whether there is anything beyond this page
+        rows = list(view.get_rows(queryset[:page_size + 1]))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        has_following = has_more if not reverse else position is not None
+        has_preceding = position is not None if not reverse else has_more
+        self.next_position = self.row_position(rows[-1]) if rows and has_following else None
+        self.previous_position = self.row_position(rows[0]) if rows and has_preceding else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.encode_cursor(self.next_position, reverse=False),
+            'previous': self.encode_cursor(self.previous_position, reverse=True),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def row_position(self, row):
+        return row['check_out_time'], row['id']
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            check_out_time = parse_datetime(tokens['p'][0])
+            session_id = int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if check_out_time is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (check_out_time, session_id), reverse
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+
+        check_out_time, session_id = position
+        tokens = {'p': check_out_time.isoformat(), 'i': session_id}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
@@ -0,0 +1,107 @@
+from django.db.models import Prefetch
+
+from payments.models import Payment
+from session_snacks.models import SessionSnack
+from .serializers import GamingSessionActiveDashboardSerializer, GamingSessionDetailSerializer
+
+
+def detail_plan(queryset):
+    """
+    Everything GamingSessionDetailSerializer reads, in three queries:
+    the session with its user and station joined, then its snacks and
+    its payments.
+    """
+    return (
+        queryset
+        .select_related('user', 'station__game_type__service_type')
+        .only(
+            'id', 'user', 'station', 'check_in_time', 'check_out_time',
+            'session_status', 'calculated_gaming_cost', 'total_session_cost', 'balance_due', 'notes',
+            'user__username', 'user__first_name', 'user__last_name',
+            'station__name', 'station__game_type__service_type__name',
+        )
+        .prefetch_related(
+            Prefetch(
+                'session_snacks',
+                queryset=SessionSnack.objects.select_related('snack').only(
+                    'id', 'gaming_session', 'quantity', 'unit_price_at_time', 'total_cost', 'snack__name'
+                ),
+            ),
+            Prefetch(
+                'payments',
+                queryset=Payment.objects.only(
+                    'id', 'session', 'amount_paid', 'payment_method',
+                    'payment_status', 'transaction_reference', 'created_at'
+                ),
+            ),
+        )
+    )
+
+
+# Columns of the active/past dashboard rows, in GamingSessionActiveDashboardSerializer order
+DASHBOARD_ROW_FIELDS = (
+    ('id', 'id'),
+    ('user', 'user'),
+    ('user__username', 'user__username'),
+    ('station', 'station'),
+    ('station__name', 'station__name'),
+    ('gaming_service__service_type', 'station__game_type__service_type__name'),
+    ('session_status', 'session_status'),
+    ('check_in_time', 'check_in_time'),
+    ('check_out_time', 'check_out_time'),
+    ('paused_at', 'paused_at'),
+    ('overdue_at', 'overdue_at'),
+    ('calculated_gaming_cost', 'calculated_gaming_cost'),
+    ('total_session_cost', 'total_session_cost'),
+)
+
+# Rendered by the serializer's own fields, so timezone, datetime format and
+# decimal places come out exactly as GamingSessionActiveDashboardSerializer's
+DASHBOARD_FORMATTED_FIELDS = (
+    'check_in_time', 'check_out_time', 'paused_at', 'overdue_at', 'calculated_gaming_cost', 'total_session_cost',
+)
+
+
+def dashboard_values(queryset, chunk_size=2000, extra=()):
+    """
+    Yield the dashboard rows as plain dicts of database values, built from
+    a single SELECT ... JOIN without instantiating any model. extra names
+    more model fields to add to each row.
+    """
+    fields = (*DASHBOARD_ROW_FIELDS, *((name, name) for name in extra))
+    names = [name for name, _ in fields]
+    rows = queryset.values_list(*[lookup for _, lookup in fields])
+    for values in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(names, values))
+
+
+def render_dashboard_rows(rows):
+    """Yield rows from dashboard_values() as the payload, datetimes and decimals rendered by the serializer's fields"""
+    serializer_fields = GamingSessionActiveDashboardSerializer().fields
+    formatters = [(name, serializer_fields[name].to_representation) for name in DASHBOARD_FORMATTED_FIELDS]
+    for row in rows:
+        for name, to_representation in formatters:
+            if row[name] is not None:
+                row[name] = to_representation(row[name])
+        yield row
+
+
+def dashboard_rows(queryset, chunk_size=2000, extra=()):
+    """Yield the dashboard payload of queryset, see dashboard_values()"""
+    return render_dashboard_rows(dashboard_values(queryset, chunk_size, extra))
+
+
+# Serializer class -> function shaping the queryset it is fed from.
+# Serializers that write back to the instance have no plan, so they never
+# receive deferred fields.
+QUERY_PLANS = {
+    GamingSessionDetailSerializer: detail_plan,
+}
+
+
+def apply_query_plan(queryset, serializer_class):
+    """Attach the select_related/prefetch_related/only() plan for serializer_class"""
+    plan = QUERY_PLANS.get(serializer_class)
+    if plan is None:
+        return queryset
+    return plan(queryset)
@@ -6,22 +6,30 @@ from stations.models import Station
 from payments.models import Payment
 from session_snacks.models import SessionSnack
 from durations.models import Duration
-from game_types.models import GameType
-from service_types.models import ServiceType
+from service_prices.pricing import price_matrix
 
 class GamingSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = GamingSession
         fields = [
             'id', 'user', 'station', 'duration', 'notes', 'check_in_time',
-            'check_out_time', 'calculated_gaming_cost', 'total_session_cost',
+            'check_out_time', 'calculated_gaming_cost', 'total_session_cost', 'balance_due',
             'session_status', 'is_walk_in_customer', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'check_out_time', 'calculated_gaming_cost',
-            'total_session_cost', 'created_at', 'updated_at'
+            'total_session_cost', 'balance_due', 'created_at', 'updated_at'
         ]
 
+    def update(self, instance, validated_data):
+        # Write only the fields being changed: the totals belong to the
+        # ledger, and a full-row save would undo postings made since the
+        # session was loaded (see ledger.py)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
 class GamingSessionCreateSerializer(serializers.Serializer):
     user_id = serializers.IntegerField(write_only=True)
     service_type_id = serializers.IntegerField(write_only=True)
@@ -47,55 +55,46 @@ class GamingSessionCreateSerializer(serializers.Serializer):
             'number_of_players': {'required': False, 'default': 1},
         }
 
-    def validate_user_id(self, value):
-        """Validate that the user exists"""
-        try:
-            User.objects.get(id=value)
-        except User.DoesNotExist:
-            raise serializers.ValidationError(f"User with id {value} does not exist.")
+    def validate_number_of_players(self, value):
+        """Validate that number of players is positive"""
+        if value <= 0:
+            raise serializers.ValidationError("Number of players must be at least 1.")
         return value
 
-    def validate_service_type_id(self, value):
-        """Validate that the service type exists"""
-        try:
-            ServiceType.objects.get(id=value)
-        except ServiceType.DoesNotExist:
-            raise serializers.ValidationError(f"Service type with id {value} does not exist.")
-        return value
+    def validate(self, data):
+        """
+        Resolve every referenced row once. The resolved user, station and
+        duration are handed on to pricing and the insert.
+        """
+        errors = {}
 
-    def validate_game_type_id(self, value):
-        """Validate that the game type exists"""
-        try:
-            GameType.objects.get(id=value)
-        except GameType.DoesNotExist:
-            raise serializers.ValidationError(f"Game type with id {value} does not exist.")
-        return value
+        user = User.objects.only('id').filter(id=data['user_id']).first()
+        if user is None:
+            errors['user_id'] = f"User with id {data['user_id']} does not exist."
 
-    def validate_station_id(self, value):
-        """Validate that the station exists and is not occupied"""
-        try:
-            station = Station.objects.get(id=value)
-            if not station.is_active:
-                raise serializers.ValidationError(
-                    f"Station {station.name} is already occupied."
-                )
-        except Station.DoesNotExist:
-            raise serializers.ValidationError(f"Station with id {value} does not exist.")
-        return value
+        # Service types, game types and durations come from the in-memory price matrix
+        if price_matrix.service_type_name(data['service_type_id']) is None:
+            errors['service_type_id'] = f"Service type with id {data['service_type_id']} does not exist."
 
-    def validate_duration_id(self, value):
-        """Validate that the duration exists"""
-        try:
-            Duration.objects.get(id=value)
-        except Duration.DoesNotExist:
-            raise serializers.ValidationError(f"Duration with id {value} does not exist.")
-        return value
+        if not price_matrix.game_type_exists(data['game_type_id']):
+            errors['game_type_id'] = f"Game type with id {data['game_type_id']} does not exist."
 
-    def validate_number_of_players(self, value):
-        """Validate that number of players is positive"""
-        if value <= 0:
-            raise serializers.ValidationError("Number of players must be at least 1.")
-        return value
+        # Whether it is free is settled by booking it (see perform_create)
+        station = Station.objects.filter(id=data['station_id']).first()
+        if station is None:
+            errors['station_id'] = f"Station with id {data['station_id']} does not exist."
+
+        duration = price_matrix.get_duration(data['duration_id'])
+        if duration is None:
+            errors['duration_id'] = f"Duration with id {data['duration_id']} does not exist."
+
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        data['user'] = user
+        data['station'] = station
+        data['duration'] = duration
+        return data
 
 class DurationDropdownSerializer(serializers.ModelSerializer):
     type = serializers.CharField(source='get_type_display', read_only=True)
@@ -107,7 +106,7 @@ class DurationDropdownSerializer(serializers.ModelSerializer):
 class GamingSessionActiveDashboardSerializer(serializers.ModelSerializer):
     user__username = serializers.CharField(source="user.username", read_only=True)
     station__name = serializers.CharField(source="station.name", read_only=True)
-    gaming_service__service_type = serializers.CharField(source="station.gaming_service.service_type", read_only=True)
+    gaming_service__service_type = serializers.CharField(source="station.game_type.service_type", read_only=True)
 
     class Meta:
         model = GamingSession
@@ -121,6 +120,8 @@ class GamingSessionActiveDashboardSerializer(serializers.ModelSerializer):
             'session_status',
             'check_in_time',
             'check_out_time',
+            'paused_at',
+            'overdue_at',
             'calculated_gaming_cost',
             'total_session_cost',
         )
@@ -142,7 +143,7 @@ class GamingSessionDetailSerializer(serializers.ModelSerializer):
     customer_username = serializers.CharField(source='user.username', read_only=True)
     customer_full_name = serializers.SerializerMethodField()
     station_name = serializers.CharField(source='station.name', read_only=True)
-    game_service = serializers.CharField(source='station.gaming_service.service_type', read_only=True)
+    game_service = serializers.CharField(source='station.game_type.service_type', read_only=True)
 
     # Services & Snacks - using nested serializers
     gaming_service_item = serializers.SerializerMethodField()
@@ -175,6 +176,7 @@ class GamingSessionDetailSerializer(serializers.ModelSerializer):
             'check_out_time',
             'calculated_gaming_cost',
             'total_session_cost',
+            'balance_due',
             'notes',
         ]
 
@@ -187,7 +189,7 @@ class GamingSessionDetailSerializer(serializers.ModelSerializer):
     def get_gaming_service_item(self, obj):
         """Format gaming service as an item with quantity, price, total"""
         return {
-            'item_name': f"Gaming Session ({obj.station.gaming_service.service_type})",
+            'item_name': f"Gaming Session ({obj.station.game_type.service_type})",
             'quantity': 1,
             'unit_price': str(obj.calculated_gaming_cost),
             'total_cost': str(obj.calculated_gaming_cost)
@@ -210,3 +212,19 @@ class ActiveStatationDropDownSerializer(serializers.ModelSerializer):
             'service_type_name',
             'is_active'
         ]
+
+class GamingSessionBulkCheckoutSerializer(serializers.Serializer):
+    session_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    all_active = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        if data['all_active'] == ('session_ids' in data):
+            raise serializers.ValidationError("Send either session_ids or all_active, not both.")
+        return data
+
+class GamingSessionAddTimeSerializer(serializers.Serializer):
+    additional_minutes = serializers.IntegerField(source='minutes', min_value=1, max_value=24 * 60)
+
+class GamingSessionAddItemSerializer(serializers.Serializer):
+    snack_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
@@ -0,0 +1,148 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from durations.models import Duration
+from game_types.models import GameType
+from gamestop.events import hub
+from payments.models import Payment
+from service_prices.models import ServicePrice
+from service_prices.signals import prices_imported
+from service_types.models import ServiceType
+from session_snacks.models import SessionSnack
+from stations.models import Station
+from stations.signals import occupancy_changed
+from . import ledger
+from .dropdowns import dropdown_bundle
+from .models import GamingSession
+from .query_plans import dashboard_rows
+
+
+# Sent by gaming_sessions.checkout after a bulk checkout. The queryset
+# updates bypass post_save, so listeners subscribe here.
+# Arguments: sessions and stations (lists, already updated in memory)
+sessions_checked_out = Signal()
+
+# Sent by gaming_sessions.expiry after flagging overdue sessions, with a
+# queryset update. Arguments: sessions (a list, already updated in memory)
+sessions_flagged_overdue = Signal()
+
+# Sent by gaming_sessions.timer after a pause, resume, extension or added
+# item. The transitions are queryset updates, so listeners subscribe here.
+# Arguments: session (re-read after the update) and transition (its name)
+session_timer_changed = Signal()
+
+
+def session_rows(session_ids):
+    """
+    The sessions' rows exactly as the active and past lists render them, so
+    a dashboard can patch its copy. archive tells it to drop the row.
+    """
+    return dashboard_rows(GamingSession.objects.filter(id__in=session_ids), extra=('archive',))
+
+
+def station_payload(station):
+    return {
+        'id': station.id,
+        'name': station.name,
+        'is_active': station.is_active,
+    }
+
+
+def publish_on_commit(event_type, data):
+    """Only broadcast changes that actually land"""
+    transaction.on_commit(partial(hub.publish, event_type, data))
+
+
+def publish_sessions_on_commit(event_type, session_ids):
+    """Broadcast the sessions' rows, read in one query once the change has landed"""
+    if not session_ids:
+        return
+
+    def publish():
+        for row in session_rows(session_ids):
+            hub.publish(event_type, row)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=GamingSession)
+def publish_session_change(sender, instance, created, **kwargs):
+    if created:
+        event_type = 'session.created'
+    elif instance.session_status == 'COMPLETED':
+        event_type = 'session.checked_out'
+    else:
+        event_type = 'session.updated'
+
+    publish_sessions_on_commit(event_type, [instance.id])
+
+
+@receiver(session_timer_changed, sender=GamingSession)
+def publish_timer_change(sender, session, **kwargs):
+    publish_sessions_on_commit('session.updated', [session.id])
+
+
+@receiver(sessions_flagged_overdue, sender=GamingSession)
+def publish_overdue_flags(sender, sessions, **kwargs):
+    publish_sessions_on_commit('session.updated', [session.id for session in sessions])
+
+
+@receiver(post_save, sender=Station)
+@receiver(occupancy_changed, sender=Station)
+def publish_station_change(sender, instance, **kwargs):
+    publish_on_commit('station.updated', station_payload(instance))
+
+
+@receiver(sessions_checked_out, sender=GamingSession)
+def publish_bulk_checkout(sender, sessions, stations, **kwargs):
+    publish_sessions_on_commit('session.checked_out', [session.id for session in sessions])
+    for station in stations:
+        publish_on_commit('station.updated', station_payload(station))
+
+
+@receiver([post_save, post_delete], sender=Station)
+@receiver(occupancy_changed, sender=Station)
+@receiver(sessions_checked_out, sender=GamingSession)
+@receiver([post_save, post_delete], sender=Duration)
+@receiver([post_save, post_delete], sender=GameType)
+@receiver([post_save, post_delete], sender=ServiceType)
+@receiver([post_save, post_delete], sender=ServicePrice)
+@receiver(prices_imported, sender=ServicePrice)
+def invalidate_dropdown_bundle(sender, **kwargs):
+    dropdown_bundle.invalidate()
+
+
+@receiver(pre_save, sender=GamingSession)
+def open_session_balance(sender, instance, **kwargs):
+    # Nothing is paid when a session starts
+    if instance._state.adding and not instance.balance_due:
+        instance.balance_due = instance.total_session_cost
+
+
+@receiver(post_init, sender=SessionSnack)
+@receiver(post_init, sender=Payment)
+def remember_ledger_entry(sender, instance, **kwargs):
+    ledger.remember(instance)
+
+
+@receiver([pre_save, pre_delete], sender=SessionSnack)
+@receiver([pre_save, pre_delete], sender=Payment)
+def recall_ledger_entry(sender, instance, **kwargs):
+    ledger.recall(instance)
+
+
+# Postings tell the dashboards about the sessions' new totals
+
+@receiver(post_save, sender=SessionSnack)
+@receiver(post_save, sender=Payment)
+def post_ledger_change(sender, instance, **kwargs):
+    publish_sessions_on_commit('session.updated', ledger.record_change(instance))
+
+
+@receiver(post_delete, sender=SessionSnack)
+@receiver(post_delete, sender=Payment)
+def post_ledger_removal(sender, instance, **kwargs):
+    publish_sessions_on_commit('session.updated', ledger.record_change(instance, deleted=True))
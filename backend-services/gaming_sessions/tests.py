@@ -1,3 +1,1371 @@
-from django.test import TestCase
+import asyncio
+import json
+from collections import Counter
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from operator import itemgetter
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.signals import request_finished
+from django.db import OperationalError, connection, transaction
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from durations.models import Duration
+from gamestop.events import EventHub, event_stream, hub, session_events
+from gamestop.history import writer
+from gamestop.history_compaction import HistoryCompactor
+from game_types.models import GameType
+from payments.models import Payment
+from service_types.models import ServiceType
+from service_prices.pricing import price_matrix
+from session_snacks.models import SessionSnack
+from snacks.models import Snack
+from stations.models import Station
+from stations.occupancy import occupy_station
+from service_prices.models import ServicePrice
+from . import ledger, timer
+from .dropdowns import DropDownBundle, dropdown_bundle
+from .expiry import FLAG, ExpiryScheduler
+from .ledger import rebuild_ledger
+from .models import GamingSession, SessionSegment
+from .serializers import GamingSessionActiveDashboardSerializer
+from .utils import calculate_gaming_cost
+from .views import GamingSessionRetrieveUpdateDestroyView
+
+
+class CalculateGamingCostTests(TestCase):
+    def setUp(self):
+        price_matrix.invalidate()
+        self.one_hour = Duration.objects.get(type='HOUR', duration=1.0)
+
+    def test_console_is_priced_per_player(self):
+        console = ServiceType.objects.get(name='Console')
+        ps4 = GameType.objects.get(name='PS4')
+
+        self.assertEqual(Decimal('100.00'), calculate_gaming_cost(console.id, ps4.id, self.one_hour.id, 2))
+        with self.assertRaises(ValidationError):
+            calculate_gaming_cost(console.id, ps4.id, self.one_hour.id, 5)
+
+    def test_other_services_fall_back_to_flat_price(self):
+        table_games = ServiceType.objects.get(name='Table Games')
+        pool = GameType.objects.get(name='8 Ball')
+
+        self.assertEqual(200.0, calculate_gaming_cost(table_games.id, pool.id, self.one_hour.id, 1))
+
+    def test_unknown_service_type(self):
+        with self.assertRaises(ValidationError):
+            calculate_gaming_cost(0, 0, self.one_hour.id, 1)
+
+
+class GamingSessionCreateTests(TestCase):
+    def setUp(self):
+        price_matrix.invalidate()
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.customer = User.objects.create_user(username='customer', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+        self.console = ServiceType.objects.get(name='Console')
+        self.ps4 = GameType.objects.get(name='PS4')
+        self.one_hour = Duration.objects.get(type='HOUR', duration=1.0)
+
+    def check_in(self, station, **overrides):
+        payload = {
+            'user_id': self.customer.id,
+            'service_type_id': self.console.id,
+            'game_type_id': self.ps4.id,
+            'station_id': station.id,
+            'duration_id': self.one_hour.id,
+            'number_of_players': 2,
+        }
+        payload.update(overrides)
+        return self.client.post('/api/gaming-sessions/', payload, format='json')
+
+    def test_check_in_runs_a_fixed_number_of_queries(self):
+        stations = list(Station.objects.filter(game_type=self.ps4)[:2])
+        self.check_in(stations[0])
+
+        # The booking: savepoint, user, station, occupy + history, session +
+        # history, release
+        with self.captureOnCommitCallbacks() as callbacks, self.assertNumQueries(8):
+            response = self.check_in(stations[1])
+
+        # Once committed: the station's first hourly and daily rollup rows
+        # (update, insert, update each), and the session's row for its event
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        concerns = [
+            'rollup' if 'analytics_' in query['sql'] else 'event' if query['sql'].startswith('SELECT') else 'other'
+            for query in queries
+        ]
+        self.assertEqual({'rollup': 6, 'event': 1}, dict(Counter(concerns)))
+
+        self.assertEqual(201, response.status_code)
+        session = GamingSession.objects.get(station=stations[1])
+        self.assertEqual(['+'], list(session.history.values_list('history_type', flat=True)))
+        self.assertEqual(100, session.calculated_gaming_cost)
+        self.assertFalse(Station.objects.get(id=stations[1].id).is_active)
+
+    def test_invalid_references_are_reported_per_field(self):
+        station = Station.objects.filter(game_type=self.ps4).first()
+
+        response = self.check_in(station, user_id=0, duration_id=0)
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'user_id', 'duration_id'}, set(response.data))
+        self.assertFalse(GamingSession.objects.exists())
+
+
+    def test_occupied_station_is_a_conflict(self):
+        station = Station.objects.filter(game_type=self.ps4).first()
+        self.assertEqual(201, self.check_in(station).status_code)
+
+        response = self.check_in(station)
+
+        self.assertEqual(409, response.status_code)
+        self.assertEqual(1, GamingSession.objects.filter(station=station).count())
+
+
+class ConcurrentCheckInTests(TransactionTestCase):
+    attempts = 6
+
+    def setUp(self):
+        price_matrix.invalidate()
+        service_type = ServiceType.objects.create(name='Race Console')
+        game_type = GameType.objects.create(name='Race PS5', service_type=service_type)
+        duration = Duration.objects.create(type='HOUR', duration=1.0)
+        ServicePrice.objects.create(
+            service_type=service_type, game_type=game_type, duration=duration,
+            player_count=1, max_player_count=4, price=100,
+        )
+        self.station = Station.objects.create(name='Race Station', game_type=game_type)
+        self.staff = User.objects.create_user(username='staff', password='password')
+        # One customer per terminal tells the check-ins apart
+        self.customers = [User.objects.create(username=f'customer {number}') for number in range(self.attempts)]
+        self.payload = {
+            'service_type_id': service_type.id,
+            'game_type_id': game_type.id,
+            'station_id': self.station.id,
+            'duration_id': duration.id,
+            'number_of_players': 2,
+        }
+
+    def retry(self, call):
+        while True:
+            try:
+                return call()
+            except OperationalError:
+                # SQLite reports lock contention instead of waiting
+                time.sleep(0.001)
+
+    def test_parallel_check_ins_book_a_station_once(self):
+        barrier = threading.Barrier(self.attempts)
+        statuses = []
+
+        def check_in(customer):
+            client = APIClient()
+            client.force_authenticate(self.staff)
+            payload = {**self.payload, 'user_id': customer.id}
+            booked = GamingSession.objects.filter(user=customer)
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        statuses.append(client.post('/api/gaming-sessions/', payload, format='json').status_code)
+                        return
+                    except OperationalError:
+                        # Rolled back, unless the lock was hit after the commit
+                        if self.retry(booked.exists):
+                            statuses.append(201)
+                            return
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=check_in, args=(customer,)) for customer in self.customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([201] + [409] * (self.attempts - 1), sorted(statuses))
+        self.assertEqual(1, GamingSession.objects.filter(station=self.station).count())
+        self.assertFalse(Station.objects.get(id=self.station.id).is_active)
+
+
+class GamingSessionDetailTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.customer = User.objects.create_user(
+            username='customer', password='password', first_name='Sam', last_name='Rao'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+        self.session = GamingSession.objects.create(
+            user=self.customer,
+            station=Station.objects.get(name='Station 3'),
+            duration=Duration.objects.get(type='HOUR', duration=1.0),
+            check_in_time=timezone.now(),
+            calculated_gaming_cost=120,
+            total_session_cost=120,
+        )
+        self.snack = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40)
+
+    def add_extras(self, count):
+        for _ in range(count):
+            SessionSnack.objects.create(
+                gaming_session=self.session, snack=self.snack, quantity=2, unit_price_at_time=40
+            )
+            Payment.objects.create(session=self.session, amount_paid=50, payment_method='UPI')
+
+    def get_detail(self):
+        return self.client.get(f'/api/gaming-sessions/{self.session.id}/')
+
+    def test_detail_payload(self):
+        self.add_extras(1)
+
+        response = self.get_detail()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('Sam Rao', response.data['customer_full_name'])
+        self.assertEqual('Station 3', response.data['station_name'])
+        self.assertEqual('Console', response.data['game_service'])
+        self.assertEqual('Cola', response.data['snacks_items'][0]['item_name'])
+        self.assertEqual(1, len(response.data['payment_history']))
+
+    def load_then_post(self, amount):
+        """Run the detail view with a snack posted to the ledger after it loads the session"""
+        get_object = GamingSessionRetrieveUpdateDestroyView.get_object
+
+        def load(view):
+            session = get_object(view)
+            # Another terminal adds a snack between this request's load and save
+            ledger.post(session.id, amount, is_payment=False)
+            return session
+
+        return mock.patch.object(GamingSessionRetrieveUpdateDestroyView, 'get_object', load)
+
+    def test_edit_keeps_ledger_postings_made_meanwhile(self):
+        with self.load_then_post(Decimal('40')):
+            response = self.client.patch(
+                f'/api/gaming-sessions/{self.session.id}/', {'notes': 'Wants the window seat'}, format='json'
+            )
+
+        self.assertEqual(200, response.status_code)
+        self.session.refresh_from_db()
+        self.assertEqual('Wants the window seat', self.session.notes)
+        self.assertEqual((Decimal('160'), Decimal('160')), (self.session.total_session_cost, self.session.balance_due))
+
+    def test_new_duration_moves_the_totals_by_the_difference(self):
+        two_hours = Duration.objects.get(type='HOUR', duration=2.0)
+        game_type = self.session.station.game_type
+        ServicePrice.objects.create(
+            service_type=game_type.service_type, game_type=game_type, duration=two_hours,
+            player_count=1, max_player_count=4, price=200,
+        )
+
+        with self.load_then_post(Decimal('40')):
+            response = self.client.patch(
+                f'/api/gaming-sessions/{self.session.id}/', {'duration': two_hours.id}, format='json'
+            )
+
+        self.assertEqual(200, response.status_code)
+        self.session.refresh_from_db()
+        self.assertEqual(200, self.session.calculated_gaming_cost)
+        self.assertEqual((240, 240), (self.session.total_session_cost, self.session.balance_due))
+
+    def test_archive_keeps_ledger_postings_made_meanwhile(self):
+        with self.load_then_post(Decimal('40')):
+            response = self.client.delete(f'/api/gaming-sessions/{self.session.id}/')
+
+        self.assertEqual(204, response.status_code)
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.archive)
+        self.assertEqual(Decimal('160'), self.session.total_session_cost)
+
+    def test_detail_query_count_does_not_grow_with_extras(self):
+        # session with user and station joined, snacks, payments
+        with self.assertNumQueries(3):
+            self.get_detail()
+
+        self.add_extras(5)
+
+        with self.assertNumQueries(3):
+            response = self.get_detail()
+        self.assertEqual(5, len(response.data['snacks_items']))
+        self.assertEqual(5, len(response.data['payment_history']))
+
+
+class GamingSessionDashboardListTests(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+        duration = Duration.objects.get(type='HOUR', duration=1.0)
+        for number, station in enumerate(Station.objects.all()):
+            customer = User.objects.create(username=f'customer{number}')
+            for status in ('ACTIVE', 'COMPLETED', 'COMPLETED'):
+                GamingSession.objects.create(
+                    user=customer,
+                    station=station,
+                    duration=duration,
+                    check_in_time=timezone.now(),
+                    check_out_time=timezone.now(),
+                    calculated_gaming_cost=120,
+                    total_session_cost=135.5,
+                    session_status=status,
+                )
+
+    def get_rows(self, url):
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        return json.loads(b''.join(response.streaming_content))
+
+    def serialized(self, status):
+        sessions = GamingSession.objects.filter(session_status=status, archive=False)
+        data = GamingSessionActiveDashboardSerializer(sessions, many=True).data
+        return json.loads(json.dumps(data))
+
+    def test_active_rows_match_the_serializer(self):
+        # ETag aggregate, then the projection
+        with self.assertNumQueries(2):
+            rows = self.get_rows('/api/gaming-sessions/active/')
+
+        self.assertEqual(Station.objects.count(), len(rows))
+        self.assertEqual(self.serialized('ACTIVE'), rows)
+        self.assertEqual('135.50', rows[0]['total_session_cost'])
+
+    @override_settings(
+        TIME_ZONE='Asia/Kolkata',
+        REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S.%f%z'},
+    )
+    def test_active_rows_format_datetimes_like_the_serializer(self):
+        GamingSession.objects.filter(session_status='ACTIVE').update(
+            check_in_time=timezone.now().replace(microsecond=123456)
+        )
+
+        rows = self.get_rows('/api/gaming-sessions/active/')
+
+        self.assertEqual(self.serialized('ACTIVE'), rows)
+        self.assertTrue(rows[0]['check_in_time'].endswith('.123456+0530'))
+
+        # The past list still pages on the raw check_out_time
+        response = self.client.get('/api/gaming-sessions/past/', {'page_size': 1})
+        self.assertRegex(response.data['results'][0]['check_out_time'], r'\+0530$')
+        self.assertEqual(200, self.client.get(response.data['next']).status_code)
+
+    def test_past_rows_match_the_serializer(self):
+        # The page itself, no aggregate over the whole past list
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/gaming-sessions/past/')
+
+        rows = json.loads(response.content)['results']
+        self.assertEqual(2 * Station.objects.count(), len(rows))
+        expected = self.serialized('COMPLETED')
+        expected.sort(key=lambda row: (row['check_out_time'], row['id']), reverse=True)
+        self.assertEqual(expected, rows)
+
+    def test_unchanged_active_list_is_not_modified(self):
+        etag = self.client.get('/api/gaming-sessions/active/')['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/gaming-sessions/active/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+        session = GamingSession.objects.filter(session_status='ACTIVE').first()
+        session.session_status = 'COMPLETED'
+        session.save()
+
+        response = self.client.get('/api/gaming-sessions/active/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+
+class GamingSessionPastPaginationTests(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+        customer = User.objects.create(username='customer')
+        station = Station.objects.get(name='Station 1')
+        check_out_time = timezone.now()
+        for number in range(7):
+            GamingSession.objects.create(
+                user=customer,
+                station=station,
+                check_in_time=check_out_time,
+                # Pairs of sessions share a check-out time to exercise the id tie-break
+                check_out_time=check_out_time - timedelta(minutes=number // 2),
+                session_status='COMPLETED',
+            )
+        self.expected_ids = list(
+            GamingSession.objects.order_by('-check_out_time', '-id').values_list('id', flat=True)
+        )
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        return response.data
+
+    def test_next_cursors_walk_every_session_once(self):
+        seen = []
+        url = '/api/gaming-sessions/past/?page_size=3'
+        while url:
+            page = self.get_page(url)
+            seen.extend(row['id'] for row in page['results'])
+            url = page['next']
+
+        self.assertEqual(self.expected_ids, seen)
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        first = self.get_page('/api/gaming-sessions/past/?page_size=3')
+        second = self.get_page(first['next'])
+
+        self.assertIsNone(first['previous'])
+        self.assertEqual(first['results'], self.get_page(second['previous'])['results'])
+
+    def test_deep_page_is_a_single_query(self):
+        first = self.get_page('/api/gaming-sessions/past/?page_size=3')
+        second = self.get_page(first['next'])
+
+        with self.assertNumQueries(1):
+            third = self.get_page(second['next'])
+        self.assertEqual(self.expected_ids[6:], [row['id'] for row in third['results']])
+        self.assertIsNone(third['next'])
+
+    def test_unchanged_page_is_not_modified(self):
+        url = '/api/gaming-sessions/past/?page_size=3'
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+        # A change to a row on the page, and a newer session pushing onto it
+        session = GamingSession.objects.get(id=self.expected_ids[0])
+        session.notes = 'edited'
+        session.save()
+        edited = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, edited.status_code)
+
+        GamingSession.objects.create(
+            user=session.user, station=session.station, check_in_time=timezone.now(),
+            check_out_time=timezone.now() + timedelta(minutes=5), session_status='COMPLETED',
+        )
+        self.assertEqual(200, self.client.get(url, HTTP_IF_NONE_MATCH=edited['ETag']).status_code)
+
+    def test_rows_beyond_the_page_do_not_change_its_etag(self):
+        url = '/api/gaming-sessions/past/?page_size=3'
+        etag = self.client.get(url)['ETag']
+
+        session = GamingSession.objects.get(id=self.expected_ids[-1])
+        session.notes = 'edited'
+        session.save()
+
+        self.assertEqual(304, self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/gaming-sessions/past/?cursor=not-a-cursor')
+
+        self.assertEqual(404, response.status_code)
+
+
+class GamingSessionDropDownTests(TestCase):
+    def setUp(self):
+        price_matrix.invalidate()
+        dropdown_bundle.invalidate()
+        staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(staff)
+
+    def get_bundle(self, version=None):
+        params = {'version': version} if version else {}
+        response = self.client.get('/api/gaming-sessions/drop-downs/', params)
+        self.assertEqual(200, response.status_code)
+        return response.json()
+
+    def test_current_version_gets_an_empty_answer(self):
+        bundle = self.get_bundle()
+
+        self.assertTrue(bundle['changed'])
+        self.assertEqual(6, len(bundle['active_stations']))
+        self.assertEqual({'version': bundle['version'], 'changed': False}, self.get_bundle(bundle['version']))
+
+    def test_player_counts_come_from_prices(self):
+        self.assertEqual([1, 2, 3, 4], self.get_bundle()['number_of_players'])
+
+        price = ServicePrice.objects.filter(archive=False).first()
+        price.max_player_count = 6
+        price.save()
+
+        self.assertEqual([1, 2, 3, 4, 5, 6], self.get_bundle()['number_of_players'])
+
+    def test_occupying_a_station_moves_the_version(self):
+        version = self.get_bundle()['version']
+
+        occupy_station(Station.objects.get(name='Station 1'))
+
+        bundle = self.get_bundle(version)
+        self.assertTrue(bundle['changed'])
+        self.assertNotEqual(version, bundle['version'])
+        self.assertNotIn('Station 1', [station['name'] for station in bundle['active_stations']])
+
+    def test_invalidation_reaches_other_processes(self):
+        # Another worker's bundle: only the cache backend links the two
+        other = DropDownBundle()
+        version, _ = other.get()
+
+        occupy_station(Station.objects.get(name='Station 1'))
+
+        new_version, body = other.get()
+        self.assertNotEqual(version, new_version)
+        self.assertNotIn('Station 1', [station['name'] for station in json.loads(body)['active_stations']])
+
+    def test_station_changes_from_other_processes_move_the_version(self):
+        version = self.get_bundle()['version']
+
+        # A checkout by run_scheduler: no invalidation reaches this process's cache
+        Station.objects.filter(name='Station 1').update(is_active=False, updated_at=timezone.now())
+
+        bundle = self.get_bundle(version)
+        self.assertTrue(bundle['changed'])
+        self.assertNotIn('Station 1', [station['name'] for station in bundle['active_stations']])
+
+    def test_warm_bundle_costs_one_query_per_request(self):
+        version = self.get_bundle()['version']
+
+        # Only the stations revalidation
+        with self.assertNumQueries(2):
+            self.get_bundle()
+            self.get_bundle(version)
+
+
+class GamingSessionBulkCheckoutTests(TestCase):
+    url = '/api/gaming-sessions/checkout/'
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+        self.customer = User.objects.create(username='customer')
+
+    def start_sessions(self, stations):
+        sessions = []
+        for station in stations:
+            occupy_station(station)
+            sessions.append(GamingSession.objects.create(
+                user=self.customer, station=station, check_in_time=timezone.now()
+            ))
+        return sessions
+
+    def test_query_count_does_not_grow_with_sessions(self):
+        stations = list(Station.objects.order_by('id'))
+        self.start_sessions(stations[:2])
+        # savepoint, select, session update + history, station update + history, release
+        with self.assertNumQueries(7):
+            self.assertEqual(200, self.client.post(self.url, {'all_active': True}, format='json').status_code)
+
+        self.start_sessions(stations)
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, {'all_active': True}, format='json')
+
+        self.assertEqual(len(stations), response.data['count'])
+        self.assertFalse(GamingSession.objects.filter(session_status='ACTIVE').exists())
+        self.assertFalse(Station.objects.filter(is_active=False).exists())
+
+    def test_history_rows_are_written_in_bulk(self):
+        stations = list(Station.objects.order_by('id')[:3])
+        sessions = self.start_sessions(stations)
+
+        self.client.post(self.url, {'session_ids': [session.id for session in sessions]}, format='json')
+
+        for session in sessions:
+            latest = session.history.first()
+            self.assertEqual('~', latest.history_type)
+            self.assertEqual('COMPLETED', latest.session_status)
+            self.assertEqual(self.staff.id, latest.history_user_id)
+        for station in stations:
+            self.assertTrue(station.history.first().is_active)
+
+    def test_unknown_and_finished_sessions_are_skipped(self):
+        active, finished = self.start_sessions(Station.objects.order_by('id')[:2])
+        finished.session_status = 'COMPLETED'
+        finished.save()
+
+        response = self.client.post(self.url, {'session_ids': [active.id, finished.id, 0]}, format='json')
+
+        self.assertEqual([active.id], response.data['checked_out'])
+        self.assertEqual([0, finished.id], response.data['skipped'])
+
+    def test_either_ids_or_all_active(self):
+        for payload in ({}, {'session_ids': [1], 'all_active': True}):
+            self.assertEqual(400, self.client.post(self.url, payload, format='json').status_code)
+
+    def test_events_are_published_on_commit(self):
+        session, = self.start_sessions(Station.objects.order_by('id')[:1])
+
+        with mock.patch.object(hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, {'all_active': True}, format='json')
+
+        self.assertEqual(
+            ['session.checked_out', 'station.updated'],
+            [call.args[0] for call in publish.call_args_list]
+        )
+        self.assertEqual(session.id, publish.call_args_list[0].args[1]['id'])
+
+
+class GamingSessionTimerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+        self.start = timezone.now().replace(microsecond=0) - timedelta(minutes=30)
+        self.station = Station.objects.order_by('id').first()
+        occupy_station(self.station)
+        self.session = GamingSession.objects.create(
+            user=User.objects.create(username='customer'),
+            station=self.station,
+            duration=Duration.objects.get(type='HOUR', duration=1.0),
+            check_in_time=self.start,
+            check_out_time=self.start + timedelta(hours=1),
+            calculated_gaming_cost=80,
+            total_session_cost=80,
+        )
+
+    def url(self, action):
+        return f'/api/gaming-sessions/{self.session.id}/{action}/'
+
+    def at(self, minutes):
+        return mock.patch('django.utils.timezone.now', return_value=self.start + timedelta(minutes=minutes))
+
+    def test_pause_and_resume_move_the_scheduled_end(self):
+        with self.at(40):
+            response = self.client.put(self.url('pause'))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('PAUSED', response.data['session_status'])
+        self.assertEqual(40 * 60, response.data['billed_seconds'])
+
+        with self.at(55):
+            response = self.client.put(self.url('resume'))
+
+        self.session.refresh_from_db()
+        self.assertEqual('ACTIVE', self.session.session_status)
+        self.assertIsNone(self.session.paused_at)
+        self.assertEqual(timedelta(minutes=15), self.session.paused_duration)
+        self.assertEqual(self.start + timedelta(minutes=75), self.session.check_out_time)
+        self.assertEqual(40 * 60, response.data['billed_seconds'])
+        segment, = self.session.segments.all()
+        self.assertEqual(('PAUSE', self.start + timedelta(minutes=40)), (segment.kind, segment.started_at))
+
+    def test_transitions_from_the_wrong_state_conflict(self):
+        self.assertEqual(409, self.client.put(self.url('resume')).status_code)
+        self.client.put(self.url('pause'))
+        self.assertEqual(409, self.client.put(self.url('pause')).status_code)
+        self.assertEqual(404, self.client.put('/api/gaming-sessions/0/pause/').status_code)
+
+    def test_pause_is_a_single_conditional_update(self):
+        # savepoint, update, re-read, history insert, release
+        with self.assertNumQueries(5):
+            self.client.put(self.url('pause'))
+
+    def test_extra_time_is_billed_pro_rata(self):
+        response = self.client.put(self.url('add-time'), {'additional_minutes': 15}, format='json')
+
+        self.assertEqual('100.00', response.data['total_session_cost'])
+        self.session.refresh_from_db()
+        self.assertEqual(15, self.session.extended_minutes)
+        self.assertEqual(self.start + timedelta(minutes=75), self.session.check_out_time)
+        # Same rate for the next extension: 100 over 75 minutes
+        self.client.put(self.url('add-time'), {'additional_minutes': 30}, format='json')
+        self.session.refresh_from_db()
+        self.assertEqual(140, self.session.calculated_gaming_cost)
+        self.assertEqual([20, 40], [segment.amount for segment in self.session.segments.all()])
+        self.assertEqual(400, self.client.put(self.url('add-time'), {'additional_minutes': 0}, format='json').status_code)
+
+    def test_items_go_on_the_bill(self):
+        cola = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40, stock_quantity=3)
+
+        response = self.client.post(self.url('add-item'), {'snack_id': cola.id, 'quantity': 2}, format='json')
+
+        self.assertEqual('160.00', response.data['total_session_cost'])
+        self.assertEqual(80, SessionSnack.objects.get(gaming_session=self.session).total_cost)
+        self.assertEqual(1, Snack.objects.get(id=cola.id).stock_quantity)
+        self.assertEqual(400, self.client.post(self.url('add-item'), {'snack_id': 0}, format='json').status_code)
+
+        # Out of stock: nothing goes on the bill
+        response = self.client.post(self.url('add-item'), {'snack_id': cola.id, 'quantity': 2}, format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(1, SessionSnack.objects.filter(gaming_session=self.session).count())
+        self.session.refresh_from_db()
+        self.assertEqual(160, self.session.total_session_cost)
+
+    def test_ending_a_paused_session_closes_the_pause(self):
+        with self.at(20):
+            self.client.put(self.url('pause'))
+        with self.at(50):
+            response = self.client.put(self.url('end'))
+
+        self.assertEqual('COMPLETED', response.data['session_status'])
+        self.assertEqual(20 * 60, response.data['billed_seconds'])
+        self.session.refresh_from_db()
+        self.assertEqual(timedelta(minutes=30), self.session.paused_duration)
+        self.assertEqual(1, SessionSegment.objects.filter(session=self.session, kind='PAUSE').count())
+        self.assertTrue(Station.objects.get(id=self.station.id).is_active)
+        self.assertEqual(409, self.client.put(self.url('end')).status_code)
+
+    def test_paused_sessions_stay_on_the_dashboard(self):
+        self.client.put(self.url('pause'))
+
+        rows = json.loads(b''.join(self.client.get('/api/gaming-sessions/active/').streaming_content))
+
+        self.assertEqual([('PAUSED', True)], [(row['session_status'], row['paused_at'] is not None) for row in rows])
+
+    def test_transitions_publish_session_updates(self):
+        with mock.patch.object(hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.put(self.url('pause'))
+
+        self.assertEqual(['session.updated'], [call.args[0] for call in publish.call_args_list])
+        self.assertIsNotNone(publish.call_args.args[1]['paused_at'])
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+class SessionExpiryTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock(timezone.now().replace(microsecond=0))
+        self.customer = User.objects.create(username='customer')
+        self.duration = Duration.objects.get(type='HOUR', duration=1.0)
+        self.stations = list(Station.objects.order_by('id'))
+
+    def start(self, station, minutes):
+        occupy_station(station)
+        return GamingSession.objects.create(
+            user=self.customer,
+            station=station,
+            duration=self.duration,
+            check_in_time=self.clock.now,
+            check_out_time=self.clock.now + timedelta(minutes=minutes),
+            calculated_gaming_cost=80,
+        )
+
+    def scheduler(self, **kwargs):
+        kwargs.setdefault('refresh_interval', timedelta(hours=1))
+        return ExpiryScheduler(clock=self.clock, **kwargs)
+
+    def test_sessions_expire_in_deadline_order_at_their_check_out_time(self):
+        late, early, middle = (self.start(station, minutes) for station, minutes in zip(self.stations, (30, 10, 20)))
+        scheduler = self.scheduler()
+
+        self.assertEqual([], scheduler.tick())
+        self.assertEqual(early.check_out_time, scheduler.next_wakeup())
+        self.clock.advance(minutes=25)
+        self.assertEqual([early.id, middle.id], scheduler.tick())
+
+        early.refresh_from_db()
+        self.assertEqual(('COMPLETED', self.clock.now - timedelta(minutes=15)), (early.session_status, early.check_out_time))
+        self.assertTrue(Station.objects.get(id=early.station_id).is_active)
+        self.assertEqual('ACTIVE', GamingSession.objects.get(id=late.id).session_status)
+        self.assertEqual(1, len(scheduler))
+
+    def test_extended_and_paused_sessions_are_not_cut_short(self):
+        extended, paused = self.start(self.stations[0], 10), self.start(self.stations[1], 10)
+        scheduler = self.scheduler()
+        scheduler.tick()
+        timer.add_time(extended.id, 30)
+        timer.pause(paused.id)
+
+        self.clock.advance(minutes=15)
+        self.assertEqual([], scheduler.tick())
+        self.assertEqual(extended.check_out_time + timedelta(minutes=30), scheduler.next_wakeup())
+
+        self.clock.advance(minutes=30)
+        self.assertEqual([extended.id], scheduler.tick())
+        self.assertEqual('PAUSED', GamingSession.objects.get(id=paused.id).session_status)
+
+    def test_new_check_ins_are_picked_up_on_refresh(self):
+        scheduler = self.scheduler(refresh_interval=timedelta(minutes=5))
+        scheduler.tick()
+        session = self.start(self.stations[0], 1)
+
+        self.clock.advance(minutes=2)
+        self.assertEqual([], scheduler.tick())
+        self.clock.advance(minutes=3)
+        self.assertEqual([session.id], scheduler.tick())
+
+    def test_grace_period_and_batches(self):
+        sessions = [self.start(station, 10) for station in self.stations[:3]]
+        scheduler = self.scheduler(grace=timedelta(minutes=5), batch_size=2)
+
+        self.clock.advance(minutes=12)
+        self.assertEqual([], scheduler.tick())
+        self.clock.advance(minutes=3)
+        # Two batches of: savepoint, select, session update + history, station update + history, release
+        with self.assertNumQueries(14):
+            self.assertEqual(sorted(session.id for session in sessions), sorted(scheduler.tick()))
+
+    def test_flag_leaves_sessions_open_and_flags_them_once(self):
+        session = self.start(self.stations[0], 10)
+        scheduler = self.scheduler(refresh_interval=timedelta(minutes=5), action=FLAG)
+
+        self.clock.advance(minutes=11)
+        with mock.patch.object(hub, 'publish') as publish, self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual([session.id], scheduler.tick())
+        self.clock.advance(minutes=10)
+        self.assertEqual([], scheduler.tick())
+
+        session.refresh_from_db()
+        self.assertEqual('ACTIVE', session.session_status)
+        self.assertEqual(self.clock.now - timedelta(minutes=10), session.overdue_at)
+        self.assertEqual(self.clock.now - timedelta(minutes=10), session.history.latest().overdue_at)
+        publish.assert_called_once()
+        (event_type, row), _ = publish.call_args
+        self.assertEqual(('session.updated', session.id), (event_type, row['id']))
+        self.assertEqual(GamingSessionActiveDashboardSerializer(session).data['overdue_at'], row['overdue_at'])
+
+    def test_extending_a_flagged_session_clears_the_flag_and_schedules_it_again(self):
+        session = self.start(self.stations[0], 10)
+        scheduler = self.scheduler(refresh_interval=timedelta(minutes=5), action=FLAG)
+        self.clock.advance(minutes=11)
+        scheduler.tick()
+
+        timer.add_time(session.id, 30)
+
+        self.assertIsNone(GamingSession.objects.get(id=session.id).overdue_at)
+        self.clock.advance(minutes=30)
+        self.assertEqual([session.id], scheduler.tick())
+
+    def test_run_sleeps_until_the_next_deadline(self):
+        session = self.start(self.stations[0], 10)
+        scheduler = self.scheduler()
+        waits = []
+
+        class Stop:
+            def is_set(stop):
+                return len(waits) == 2
+
+            def wait(stop, seconds):
+                waits.append(seconds)
+                self.clock.advance(seconds=seconds)
+
+        scheduler.run(Stop())
+
+        self.assertEqual([600, 3000], waits)
+        self.assertEqual('COMPLETED', GamingSession.objects.get(id=session.id).session_status)
+
+    def test_command_once(self):
+        self.start(self.stations[0], -10)
+        out = StringIO()
+
+        call_command('run_scheduler', once=True, grace_minutes=0, stdout=out)
+
+        self.assertIn('complete: 1 overdue session(s)', out.getvalue())
+
+
+class SessionLedgerTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+        self.session = GamingSession.objects.create(
+            user=User.objects.create(username='customer'),
+            station=Station.objects.order_by('id').first(),
+            check_in_time=timezone.now(),
+            calculated_gaming_cost=100,
+            total_session_cost=100,
+        )
+        self.cola = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40)
+
+    def totals(self):
+        self.session.refresh_from_db()
+        return self.session.total_session_cost, self.session.balance_due
+
+    def test_new_sessions_owe_their_total(self):
+        self.assertEqual((100, 100), self.totals())
+
+    def test_snacks_add_to_the_bill_and_archiving_takes_them_off(self):
+        snack = SessionSnack.objects.create(gaming_session=self.session, snack=self.cola, quantity=2, unit_price_at_time=40)
+        self.assertEqual((180, 180), self.totals())
+
+        snack.quantity = 3
+        snack.save()
+        self.assertEqual((220, 220), self.totals())
+
+        self.client.delete(f'/api/session-snacks/{snack.id}/')
+        self.assertEqual((100, 100), self.totals())
+        self.assertEqual('100.00', self.client.get(f'/api/gaming-sessions/{self.session.id}/').data['balance_due'])
+
+    def test_only_completed_payments_pay_off_the_balance(self):
+        payment = Payment.objects.create(session=self.session, amount_paid=60, payment_method='UPI')
+        self.assertEqual((100, 100), self.totals())
+
+        payment.payment_status = 'COMPLETED'
+        payment.save()
+        self.assertEqual((100, 40), self.totals())
+
+        payment.archive = True
+        payment.save()
+        self.assertEqual((100, 100), self.totals())
+
+    def test_each_change_is_one_relative_update(self):
+        snack = SessionSnack.objects.create(gaming_session=self.session, snack=self.cola, quantity=1, unit_price_at_time=40)
+
+        with CaptureQueriesContext(connection) as queries:
+            SessionSnack.objects.get(id=snack.id).delete()
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "gaming_sessions_gamingsession"')]
+        self.assertEqual(1, len(updates))
+        self.assertIn('"total_session_cost" + ', updates[0])
+
+    def test_stale_copies_do_not_lose_updates(self):
+        # Two terminals each add an item without seeing the other's
+        first = SessionSnack(gaming_session=self.session, snack=self.cola, quantity=1, unit_price_at_time=40)
+        second = SessionSnack(gaming_session=self.session, snack=self.cola, quantity=2, unit_price_at_time=40)
+        first.save()
+        second.save()
+
+        self.assertEqual((220, 220), self.totals())
+
+    def test_rows_loaded_without_their_amounts_are_read_back(self):
+        snack = SessionSnack.objects.create(gaming_session=self.session, snack=self.cola, quantity=2, unit_price_at_time=40)
+
+        partial = SessionSnack.objects.only('id', 'gaming_session').get(id=snack.id)
+        partial.archive = True
+        partial.save()
+
+        self.assertEqual((100, 100), self.totals())
+
+    def test_postings_change_the_dashboard_etag_and_publish(self):
+        etag = self.client.get('/api/gaming-sessions/active/')['ETag']
+        Snack.objects.filter(id=self.cola.id).update(stock_quantity=5)
+
+        with mock.patch.object(hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/session-snacks/', {
+                    'gaming_session': self.session.id, 'snack': self.cola.id, 'quantity': 1,
+                    'unit_price_at_time': '40.00', 'total_cost': '0.00',
+                }, format='json')
+        self.assertEqual(201, response.status_code)
+
+        self.assertEqual(('session.updated', '140.00'), (
+            publish.call_args.args[0], str(publish.call_args.args[1]['total_session_cost'])
+        ))
+        self.assertEqual(self.staff.id, GamingSession.objects.get(id=self.session.id).updated_by_id)
+        response = self.client.get('/api/gaming-sessions/active/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
+    def test_rebuild_after_bulk_writes(self):
+        SessionSnack.objects.bulk_create([
+            SessionSnack(gaming_session=self.session, snack=self.cola, quantity=1, unit_price_at_time=40, total_cost=40)
+        ])
+        Payment.objects.bulk_create([
+            Payment(session=self.session, amount_paid=30, payment_method='CASH', payment_status='COMPLETED')
+        ])
+
+        rebuild_ledger(GamingSession.objects.filter(id=self.session.id))
+
+        self.assertEqual((140, 110), self.totals())
+
+
+@override_settings(HISTORY_WRITE_MODE='deferred')
+class DeferredHistoryTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='customer')
+        self.station = Station.objects.get(name='Station 1')
+
+    def start_and_end_session(self):
+        session = GamingSession.objects.create(user=self.customer, station=self.station, check_in_time=timezone.now())
+        session.session_status = 'COMPLETED'
+        session.save()
+        return session
+
+    def test_rows_wait_for_commit_and_go_out_in_one_insert(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            session = self.start_and_end_session()
+        self.assertFalse(session.history.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+
+        inserts = [query for query in queries if 'INSERT INTO "gaming_sessions_historicalgamingsession"' in query['sql']]
+        self.assertEqual(1, len(inserts))
+
+        self.assertEqual(
+            [('~', 'COMPLETED'), ('+', 'ACTIVE')],
+            list(session.history.values_list('history_type', 'session_status')),
+        )
+
+    def test_rows_of_a_rolled_back_savepoint_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            session = GamingSession.objects.create(user=self.customer, station=self.station, check_in_time=timezone.now())
+            try:
+                with transaction.atomic():
+                    session.notes = 'never saved'
+                    session.save()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        # The rolled-back row was the last one saved, the flush still ran
+        self.assertEqual([''], [record.notes for record in session.history.all()])
+        self.assertEqual([], writer.pending)
+
+    def test_failed_flush_is_logged_and_raised(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            session = self.start_and_end_session()
+
+        with mock.patch.object(session.history.model.objects, 'bulk_create', side_effect=OperationalError):
+            with self.assertLogs('gamestop.history', 'ERROR') as logs, self.assertRaises(OperationalError):
+                for callback in callbacks:
+                    callback()
+
+        self.assertIn('Lost 2 deferred historical rows', logs.output[0])
+        self.assertEqual([], writer.pending)
+
+    def test_requests_flush_when_they_finish(self):
+        writer.request_started()
+        with self.captureOnCommitCallbacks(execute=True):
+            session = self.start_and_end_session()
+        self.assertFalse(session.history.exists())
+
+        writer.request_finished()
+
+        self.assertEqual(2, session.history.count())
+
+    @override_settings(HISTORY_WRITE_MODE='sync')
+    def test_sync_mode_writes_with_the_save(self):
+        session = self.start_and_end_session()
+
+        self.assertEqual(2, session.history.count())
+
+
+@override_settings(HISTORY_WRITE_MODE='deferred')
+class DeferredHistoryRequestTests(TransactionTestCase):
+    def test_request_flushes_before_its_connection_is_closed(self):
+        writer.request_started()
+        with transaction.atomic():
+            service_type = ServiceType.objects.create(name='Deferred Console')
+        self.assertFalse(service_type.history.exists())
+
+        calls = []
+        flush = writer.flush
+        with mock.patch.object(writer, 'flush', lambda: calls.append('flush') or flush()), \
+                mock.patch.object(connection, 'close_if_unusable_or_obsolete', lambda: calls.append('close')):
+            request_finished.send(sender=None)
+
+        self.assertEqual(['flush', 'close'], calls)
+        self.assertEqual(1, service_type.history.count())
+
+
+class BenchmarkHistoryTests(TestCase):
+    def test_benchmark_cleans_up(self):
+        out = StringIO()
+
+        call_command('benchmark_history', sessions=3, stdout=out)
+
+        self.assertIn('deferred update', out.getvalue())
+        self.assertFalse(GamingSession.objects.exists())
+        self.assertFalse(Station.objects.filter(name='Benchmark history station').exists())
+
+
+class HistoryCompactionTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.station = Station.objects.get(name='Station 1')
+        Station.history.all().delete()
+
+    def record(self, days_ago, hour=12, history_type='~', **changes):
+        for field, value in changes.items():
+            setattr(self.station, field, value)
+        day = timezone.localtime(self.now - timedelta(days=days_ago)).replace(hour=0, minute=0, second=0, microsecond=0)
+        # A fresh updated_at on every row, as real saves would leave
+        self.station.updated_at = day + timedelta(hours=hour)
+        Station.history.model.objects.create(
+            history_date=day + timedelta(hours=hour),
+            history_type=history_type,
+            **{field.attname: getattr(self.station, field.attname) for field in Station.history.model.tracked_fields},
+        )
+
+    def compact(self, **options):
+        compactor = HistoryCompactor(retention_days=365, collapse_after_days=30, now=self.now, **options)
+        return dict(compactor.run())
+
+    def test_no_op_updates_are_dropped(self):
+        self.record(5, history_type='+', is_active=True)
+        self.record(4)
+        self.record(3, is_active=False)
+
+        counts = self.compact()
+
+        self.assertEqual({'expired': 0, 'noop': 1, 'collapsed': 0}, counts['stations.Station'])
+        self.assertEqual([False, True], list(self.station.history.values_list('is_active', flat=True)))
+
+    def test_old_flips_collapse_to_the_last_row_of_the_day(self):
+        self.record(50, history_type='+', is_active=True)
+        self.record(40, hour=10, is_active=False)
+        self.record(40, hour=11, is_active=True, description='Renamed')
+        self.record(40, hour=12, is_active=False)
+        # Recent flips keep full detail
+        self.record(2, hour=10, is_active=True)
+        self.record(2, hour=11, is_active=False)
+
+        counts = self.compact(batch_size=2)
+
+        self.assertEqual({'expired': 0, 'noop': 0, 'collapsed': 2}, counts['stations.Station'])
+        self.assertEqual(
+            [('~', False), ('~', True), ('~', False), ('+', True)],
+            list(self.station.history.values_list('history_type', 'is_active')),
+        )
+
+    def test_expired_rows_go_but_each_object_keeps_its_newest(self):
+        self.record(500, history_type='+')
+        self.record(400, description='Still the latest')
+        other = Station.objects.get(name='Station 2')
+        Station.history.bulk_history_create([other])
+        Station.history.filter(id=other.id).update(history_date=self.now - timedelta(days=500))
+
+        counts = self.compact(batch_size=1)
+
+        self.assertEqual(1, counts['stations.Station']['expired'])
+        self.assertEqual(['Still the latest'], [row.description for row in self.station.history.all()])
+        self.assertEqual(1, other.history.count())
+
+    def test_pricing_history_is_left_alone(self):
+        price = ServicePrice.objects.first()
+        ServicePrice.history.bulk_history_create([price, price, price])
+
+        counts = self.compact()
+
+        self.assertIsNone(counts['service_prices.ServicePrice'])
+        self.assertEqual(3, price.history.count())
+
+    def test_command_reports_table_sizes_and_can_dry_run(self):
+        self.record(5, history_type='+')
+        self.record(4)
+        out = StringIO()
+
+        call_command('compact_history', dry_run=True, stdout=out)
+
+        self.assertIn('stations_historicalstation', out.getvalue())
+        self.assertIn('1 noop', out.getvalue())
+        self.assertEqual(2, self.station.history.count())
+
+        call_command('compact_history', stdout=StringIO())
+        self.assertEqual(1, self.station.history.count())
+
+
+class ExplainHotQueriesTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = StringIO()
+
+        call_command('explain_hot_queries', sessions=500, customers=50, stdout=out)
+
+        self.assertNotIn('SEQ SCAN', out.getvalue())
+        self.assertFalse(GamingSession.objects.exists())
+
+
+class OtherProcessHub(EventHub):
+    origin = 'elsewhere:1'
+
+
+class EventHubTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_readers_get_events_after_their_cursor(self):
+        first = hub.publish('session.created', {'id': 1})
+        hub.publish('station.updated', {'id': 2, 'is_active': False})
+
+        self.assertEqual(
+            [(first + 1, 'station.updated', '{"id":2,"is_active":false}', hub.origin)],
+            hub.since(first),
+        )
+        self.assertEqual(2, len(hub.since(first - 1)))
+
+    def test_readers_too_far_behind_are_told_to_resync(self):
+        event_hub = EventHub(name='tests', max_pending=2)
+        first = event_hub.publish('session.updated', {'id': 0})
+        for number in range(1, 4):
+            event_hub.publish('session.updated', {'id': number})
+
+        self.assertIsNone(event_hub.since(first))
+        self.assertEqual(2, len(event_hub.since(first + 1)))
+
+        cache.delete(event_hub.event_key(first + 3))
+        self.assertIsNone(event_hub.since(first + 1))
+
+    def test_evicted_counter_does_not_reuse_ids(self):
+        first = hub.publish('session.updated', {'id': 1})
+        cache.delete(hub.last_id_key)
+
+        self.assertGreater(hub.publish('session.updated', {'id': 2}), first)
+        self.assertIsNone(hub.since(first))
+
+
+class SessionEventSignalTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='customer')
+        self.station = Station.objects.get(name='Station 1')
+
+    def test_session_and_station_changes_publish_on_commit(self):
+        with mock.patch.object(hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                session = GamingSession.objects.create(
+                    user=self.customer, station=self.station, check_in_time=timezone.now()
+                )
+                occupy_station(self.station)
+            publish.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(
+            ['session.created', 'station.updated'],
+            [call.args[0] for call in publish.call_args_list]
+        )
+        # The row as the dashboard lists render it
+        self.assertEqual(
+            (session.id, 'Station 1', False),
+            itemgetter('id', 'station__name', 'archive')(publish.call_args_list[0].args[1]),
+        )
+        self.assertFalse(publish.call_args_list[1].args[1]['is_active'])
+
+    def test_checkout_publishes_checked_out(self):
+        session = GamingSession.objects.create(
+            user=self.customer, station=self.station, check_in_time=timezone.now()
+        )
+
+        with mock.patch.object(hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                session.session_status = 'COMPLETED'
+                session.save()
+
+        self.assertEqual('session.checked_out', publish.call_args.args[0])
+
+
+class SessionEventStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.staff = User.objects.create_user(username='staff', password='password')
+
+    def ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        response = client.post('/api/events/sessions/ticket/')
+        self.assertEqual(200, response.status_code)
+        return response.data['ticket']
+
+    def open(self, request):
+        return async_to_sync(session_events)(request)
+
+    def test_requires_a_valid_ticket_or_header(self):
+        self.assertEqual(401, self.open(self.factory.get('/api/events/sessions/')).status_code)
+        self.assertEqual(401, self.open(self.factory.get('/api/events/sessions/?ticket=nonsense')).status_code)
+
+        # Access tokens are no longer accepted in the URL
+        token = AccessToken.for_user(self.staff)
+        self.assertEqual(401, self.open(self.factory.get(f'/api/events/sessions/?token={token}')).status_code)
+        response = self.open(self.factory.get('/api/events/sessions/', headers={'Authorization': f'Bearer {token}'}))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('text/event-stream', response['Content-Type'])
+
+    def test_tickets_expire(self):
+        ticket = self.ticket()
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 120):
+            response = self.open(self.factory.get('/api/events/sessions/', {'ticket': ticket}))
+        self.assertEqual(401, response.status_code)
+
+    def test_wsgi_requests_are_turned_away(self):
+        response = self.open(RequestFactory().get('/api/events/sessions/', {'ticket': self.ticket()}))
+
+        self.assertEqual(503, response.status_code)
+
+
+class EventStreamTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.hub = EventHub(name='stream-tests')
+
+    async def next_chunk(self, stream, timeout=1):
+        return await asyncio.wait_for(anext(stream), timeout)
+
+    async def test_streams_events_published_from_other_threads(self):
+        stream = event_stream(event_hub=self.hub)
+        self.assertEqual('retry: 3000\n\n', await self.next_chunk(stream))
+
+        event_id = await asyncio.to_thread(self.hub.publish, 'station.updated', {'id': 7, 'is_active': True})
+
+        self.assertEqual(
+            f'id: {event_id}\nevent: station.updated\ndata: {{"id":7,"is_active":true}}\n\n',
+            await self.next_chunk(stream),
+        )
+        with mock.patch('gamestop.events.KEEPALIVE_SECONDS', 0.01):
+            self.assertEqual(': keepalive\n\n', await self.next_chunk(stream))
+
+        await stream.aclose()
+        self.assertFalse(self.hub._subscribers)
+
+    async def test_reconnect_resumes_after_last_event_id(self):
+        first = self.hub.publish('session.updated', {'id': 1})
+        self.hub.publish('session.updated', {'id': 2})
+
+        stream = event_stream(last_event_id=first, event_hub=self.hub)
+        await self.next_chunk(stream)
+        self.assertIn('data: {"id":2}', await self.next_chunk(stream))
+        await stream.aclose()
+
+        # An id from before a reset of the log
+        stream = event_stream(last_event_id=first + 100, event_hub=self.hub)
+        await self.next_chunk(stream)
+        self.assertEqual('event: resync\ndata: {}\n\n', await self.next_chunk(stream))
+        await stream.aclose()
+
+    @mock.patch('gamestop.events.RELAY_SECONDS', 0.01)
+    async def test_relay_forwards_events_from_other_processes_once(self):
+        stream = event_stream(event_hub=self.hub)
+        await self.next_chunk(stream)
+        # Let the relay take its cursor
+        await asyncio.sleep(0.05)
+
+        other = OtherProcessHub(name='stream-tests')
+        elsewhere = await asyncio.to_thread(other.publish, 'session.updated', {'id': 1})
+        self.assertIn(f'id: {elsewhere}\n', await self.next_chunk(stream))
+
+        here = await asyncio.to_thread(self.hub.publish, 'session.updated', {'id': 2})
+        self.assertIn(f'id: {here}\n', await self.next_chunk(stream))
+        # Already delivered in process, the relay leaves it alone
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.next_chunk(stream, timeout=0.1)
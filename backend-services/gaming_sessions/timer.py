@@ -0,0 +1,179 @@
+"""
+Server-side session timer.
+
+A session moves ACTIVE <-> PAUSED until it is checked out. Every
+transition is a single conditional UPDATE whose WHERE clause carries the
+state it expects, so two terminals pressing pause at once cannot both win
+and billing never depends on what a browser tab thinks the time is.
+
+The session row keeps the running totals (paused_duration,
+extended_minutes and the costs); each closed pause and each extension is
+also appended to SessionSegment as a trail. Billed time is derived from
+the row alone, see GamingSession.billed_time().
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from gamestop.money import to_money
+from snacks.models import Snack
+from snacks.stock import move_stock
+from session_snacks.models import SessionSnack
+from .checkout import checkout_sessions
+from .models import GamingSession, SessionSegment
+from .signals import session_timer_changed
+
+
+class InvalidTransition(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The session cannot make this transition from its current status.'
+    default_code = 'invalid_transition'
+
+
+def _sessions(session_id):
+    return GamingSession.objects.filter(id=session_id, archive=False)
+
+
+def _refuse(session_id, action):
+    """Explain why a conditional UPDATE matched nothing"""
+    session_status = _sessions(session_id).values_list('session_status', flat=True).first()
+    if session_status is None:
+        raise NotFound(f"Gaming session with id {session_id} does not exist.")
+    raise InvalidTransition(f"Cannot {action} a {session_status.lower()} session.")
+
+
+def _changed(session_id, user, transition):
+    """Re-read the session after a transition, record it and tell listeners"""
+    session = GamingSession.objects.select_related('user', 'station__game_type__service_type').get(id=session_id)
+    GamingSession.history.bulk_history_create([session], update=True, default_user=user)
+    session_timer_changed.send(sender=GamingSession, session=session, transition=transition)
+    return session
+
+
+def booked_minutes(session):
+    """Minutes paid for so far: the booked duration plus every extension"""
+    duration = session.duration
+    if duration is None:
+        return None
+    minutes = duration.duration * 60 if duration.type == 'HOUR' else duration.duration
+    return Decimal(str(minutes)) + session.extended_minutes
+
+
+@transaction.atomic
+def pause(session_id, user=None):
+    now = timezone.now()
+    changed = _sessions(session_id).filter(session_status='ACTIVE').update(
+        session_status='PAUSED',
+        paused_at=now,
+        updated_by=user,
+        updated_at=now,
+    )
+    if not changed:
+        _refuse(session_id, 'pause')
+    return _changed(session_id, user, 'pause')
+
+
+@transaction.atomic
+def resume(session_id, user=None):
+    """Close the open pause and push the scheduled end out by its length"""
+    paused_at = _sessions(session_id).filter(session_status='PAUSED').values_list('paused_at', flat=True).first()
+    if paused_at is None:
+        _refuse(session_id, 'resume')
+
+    now = timezone.now()
+    pause_length = max(now - paused_at, timedelta(0))
+    # Matching paused_at as well means a pause/resume that slipped in
+    # between the read and here makes this one a no-op instead of a double count
+    changed = _sessions(session_id).filter(session_status='PAUSED', paused_at=paused_at).update(
+        session_status='ACTIVE',
+        paused_at=None,
+        paused_duration=F('paused_duration') + pause_length,
+        check_out_time=F('check_out_time') + pause_length,
+        overdue_at=None,
+        updated_by=user,
+        updated_at=now,
+    )
+    if not changed:
+        _refuse(session_id, 'resume')
+
+    SessionSegment.objects.create(
+        session_id=session_id, created_by=user, kind='PAUSE', started_at=paused_at, ended_at=now,
+    )
+    return _changed(session_id, user, 'resume')
+
+
+@transaction.atomic
+def add_time(session_id, minutes, user=None):
+    """
+    Extend an open session by minutes, billed pro rata at the rate of
+    what has been booked so far.
+    """
+    session = _sessions(session_id).select_related('duration').filter(
+        session_status__in=GamingSession.OPEN_STATUSES
+    ).first()
+    if session is None:
+        _refuse(session_id, 'extend')
+    booked = booked_minutes(session)
+    if not booked:
+        raise ValidationError({'additional_minutes': "The session has no booked duration to price extra time from."})
+
+    amount = to_money(session.calculated_gaming_cost * minutes / booked)
+    now = timezone.now()
+    changed = _sessions(session_id).filter(session_status__in=GamingSession.OPEN_STATUSES).update(
+        check_out_time=F('check_out_time') + timedelta(minutes=minutes),
+        overdue_at=None,
+        extended_minutes=F('extended_minutes') + minutes,
+        calculated_gaming_cost=F('calculated_gaming_cost') + amount,
+        total_session_cost=F('total_session_cost') + amount,
+        balance_due=F('balance_due') + amount,
+        updated_by=user,
+        updated_at=now,
+    )
+    if not changed:
+        _refuse(session_id, 'extend')
+
+    SessionSegment.objects.create(
+        session_id=session_id, created_by=user, kind='EXTEND', started_at=now, minutes=minutes, amount=amount,
+    )
+    return _changed(session_id, user, 'add_time')
+
+
+@transaction.atomic
+def add_item(session_id, snack_id, quantity, user=None):
+    """Put snacks on an open session's bill at today's price, taking them out of stock"""
+    snack = Snack.objects.filter(id=snack_id, archive=False, is_available=True).first()
+    if snack is None:
+        raise ValidationError({'snack_id': f"Snack with id {snack_id} does not exist or is unavailable."})
+
+    now = timezone.now()
+    # Only claims the open session; the ledger adds the item to the bill
+    changed = _sessions(session_id).filter(session_status__in=GamingSession.OPEN_STATUSES).update(
+        updated_by=user,
+        updated_at=now,
+    )
+    if not changed:
+        _refuse(session_id, 'add items to')
+
+    move_stock((None, 0), (snack.id, quantity), user)
+    SessionSnack.objects.create(
+        created_by=user,
+        updated_by=user,
+        gaming_session_id=session_id,
+        snack=snack,
+        quantity=quantity,
+        unit_price_at_time=snack.unit_price,
+    )
+    return _changed(session_id, user, 'add_item')
+
+
+@transaction.atomic
+def end(session_id, user=None):
+    """Check out one session; a paused one is billed up to its pause"""
+    if not checkout_sessions([session_id], user):
+        _refuse(session_id, 'end')
+    return GamingSession.objects.select_related('user', 'station__game_type__service_type').get(id=session_id)
@@ -5,12 +5,24 @@ from .views import (
     GamingSessionListActiveView,
     GamingSessionListPastView,
     GamingSessionListDropDownView,
+    GamingSessionBulkCheckoutView,
+    GamingSessionPauseView,
+    GamingSessionResumeView,
+    GamingSessionEndView,
+    GamingSessionAddTimeView,
+    GamingSessionAddItemView,
 )
 
 urlpatterns = [
     path('', GamingSessionListCreateView.as_view(), name='GamingSession-list-create'),
     path('<int:pk>/', GamingSessionRetrieveUpdateDestroyView.as_view(), name='GamingSession-retrieve-update-destroy'),
+    path('<int:pk>/pause/', GamingSessionPauseView.as_view(), name='GamingSession-pause'),
+    path('<int:pk>/resume/', GamingSessionResumeView.as_view(), name='GamingSession-resume'),
+    path('<int:pk>/end/', GamingSessionEndView.as_view(), name='GamingSession-end'),
+    path('<int:pk>/add-time/', GamingSessionAddTimeView.as_view(), name='GamingSession-add-time'),
+    path('<int:pk>/add-item/', GamingSessionAddItemView.as_view(), name='GamingSession-add-item'),
     path('active/', GamingSessionListActiveView.as_view(), name='GamingSession-list-active'),
     path('past/', GamingSessionListPastView.as_view(), name='GamingSession-list-past'),
     path('drop-downs/', GamingSessionListDropDownView.as_view(), name='GamingSession-list-dropdown'),
+    path('checkout/', GamingSessionBulkCheckoutView.as_view(), name='GamingSession-bulk-checkout'),
 ]
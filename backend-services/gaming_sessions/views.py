@@ -2,16 +2,23 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from gamestop.conditional import ConditionalListMixin, PageConditionalListMixin
+from gamestop.streaming import stream_json_array
 from datetime import timedelta
 
 # Models Import
-from .models import GamingSession
-from durations.models import Duration
-from stations.models import Station
-from django.contrib.auth.models import User
+from .models import OPEN_SESSIONS, GamingSession
+from stations.occupancy import StationOccupied, occupy_station, release_station
 
 
 # Utils Import
+from . import ledger, timer
+from .checkout import checkout_sessions
+from .dropdowns import dropdown_bundle
+from .pagination import CheckOutKeysetPagination
+from .query_plans import apply_query_plan, dashboard_rows, dashboard_values, render_dashboard_rows
 from .utils import (
     calculate_gaming_cost,
     calculate_times
@@ -22,12 +29,13 @@ from .serializers import (
     GamingSessionSerializer,
     GamingSessionActiveDashboardSerializer,
     GamingSessionDetailSerializer,
-    DurationDropdownSerializer,
-    ActiveStatationDropDownSerializer,
-    GamingSessionCreateSerializer
+    GamingSessionCreateSerializer,
+    GamingSessionBulkCheckoutSerializer,
+    GamingSessionAddTimeSerializer,
+    GamingSessionAddItemSerializer,
 )
 
-class GamingSessionListCreateView(generics.ListCreateAPIView):
+class GamingSessionListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = GamingSession.objects.all()
     serializer_class = GamingSessionSerializer
     permission_classes = [IsAuthenticated]
@@ -40,33 +48,38 @@ class GamingSessionListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         return GamingSession.objects.filter(archive=False)
 
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        # Validation, pricing and the insert share one transaction
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        # Get the IDs from validated data
-        user_id = serializer.validated_data.get('user_id')
+        # Rows resolved once during validation
+        user = serializer.validated_data.get('user')
+        station = serializer.validated_data.get('station')
+        duration = serializer.validated_data.get('duration')
+
         service_type_id = serializer.validated_data.get('service_type_id')
         game_type_id = serializer.validated_data.get('game_type_id')
-        station_id = serializer.validated_data.get('station_id')
-        duration_id = serializer.validated_data.get('duration_id')
         notes = serializer.validated_data.get('notes', '') or ''
         number_of_players = serializer.validated_data.get('number_of_players')
 
-        # Fetch the actual model instances
-        user = User.objects.get(id=user_id)
-        station = Station.objects.get(id=station_id)
-        duration = Duration.objects.get(id=duration_id)
+        # Book the station first: of concurrent check-ins only one can win, the rest get a 409
+        if not occupy_station(station, self.request.user):
+            raise StationOccupied(f"Station {station.name} is already occupied.")
 
         # Calculate check in and checkout time based on the duration
-        check_in_time, check_out_time = calculate_times(duration_id)
+        check_in_time, check_out_time = calculate_times(duration)
 
         # Calculate gaming cost
         calculated_gaming_cost = calculate_gaming_cost(
             service_type_id,
             game_type_id,
-            duration_id,
+            duration.id,
             number_of_players
         )
 
-        # Total session cost (for now same as gaming cost, can add extras later)
+        # Snacks and payments move the totals from here on (see ledger.py)
         total_session_cost = calculated_gaming_cost
 
         # Create the gaming session manually
@@ -85,11 +98,6 @@ class GamingSessionListCreateView(generics.ListCreateAPIView):
             notes=notes,
         )
 
-        # Mark the station as occupied
-        if gaming_session and gaming_session.station:
-            gaming_session.station.is_active = False
-            gaming_session.station.save()
-
         return gaming_session
 
     def list(self, request):
@@ -108,81 +116,159 @@ class GamingSessionRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVi
             return GamingSessionDetailSerializer
         return GamingSessionSerializer
 
+    def get_queryset(self):
+        return apply_query_plan(GamingSession.objects.all(), self.get_serializer_class())
+
     def perform_update(self, serializer):
         instance = serializer.instance
 
-        # If duration or check_in_time is being updated, recalculate checkout time and costs
+        # If duration is being updated, recalculate checkout time and costs
         if 'duration' in serializer.validated_data and instance.duration != serializer.validated_data['duration']:
-            check_in_time = serializer.validated_data.get('check_in_time', instance.check_in_time)
-            duration = serializer.validated_data.get('duration', instance.duration)
+            duration = serializer.validated_data['duration']
             station = serializer.validated_data.get('station', instance.station)
 
             # Recalculate checkout time
             check_in_time, check_out_time = calculate_times(duration)
 
             # Recalculate gaming cost
-            calculated_gaming_cost = calculate_gaming_cost(station, duration)
-            total_session_cost += calculated_gaming_cost
-
-            serializer.save(
-                updated_by=self.request.user,
-                check_out_time=check_out_time,
-                calculated_gaming_cost=calculated_gaming_cost,
-                total_session_cost=total_session_cost
+            calculated_gaming_cost = calculate_gaming_cost(
+                station.game_type.service_type_id,
+                station.game_type_id,
+                duration.id,
+                instance.player_count
             )
+            difference = calculated_gaming_cost - instance.calculated_gaming_cost
+
+            with transaction.atomic():
+                serializer.save(
+                    updated_by=self.request.user,
+                    check_out_time=check_out_time,
+                    overdue_at=None,
+                    calculated_gaming_cost=calculated_gaming_cost
+                )
+                # The totals move by the difference, on top of any concurrent posting
+                ledger.post(instance.id, difference, is_payment=False, user_id=self.request.user.id)
         else:
             serializer.save(updated_by=self.request.user)
 
     def perform_destroy(self, instance):
         # When archiving a session, mark station as available
         if instance.station:
-            instance.station.is_occupied = False
-            instance.station.save()
+            release_station(instance.station, self.request.user)
 
         instance.archive = True
         instance.updated_by = self.request.user
-        instance.save()
+        # Leave the ledger columns alone (see ledger.py)
+        instance.save(update_fields=['archive', 'updated_by', 'updated_at'])
 
-class GamingSessionListActiveView(generics.ListAPIView):
+class GamingSessionListActiveView(ConditionalListMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = GamingSessionActiveDashboardSerializer
 
     def get_queryset(self):
-        return GamingSession.objects.filter(session_status='ACTIVE', archive=False)
-
-    def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return GamingSession.objects.filter(OPEN_SESSIONS, archive=False)
+
+    def list(self, request, *args, **kwargs):
+        # Projected rows streamed straight to JSON, no model instances
+        rows = dashboard_rows(self.get_queryset())
+        return StreamingHttpResponse(
+            stream_json_array(rows),
+            content_type='application/json',
+            status=status.HTTP_200_OK
+        )
 
-class GamingSessionListPastView(generics.ListAPIView):
+class GamingSessionListPastView(PageConditionalListMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = GamingSessionActiveDashboardSerializer
+    pagination_class = CheckOutKeysetPagination
 
     def get_queryset(self):
         return GamingSession.objects.filter(session_status='COMPLETED', archive=False)
 
-    def get(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def get_rows(self, queryset):
+        # Projected rows, no model instances; rendered once the cursors are
+        # taken. updated_at only feeds the page's ETag.
+        return dashboard_values(queryset, extra=(self.last_modified_field,))
+
+    def render_page(self, page):
+        for row in page:
+            del row[self.last_modified_field]
+        return list(render_dashboard_rows(page))
 
 class GamingSessionListDropDownView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        active_stations = Station.objects.filter(is_active=True)
-        durations = Duration.objects.filter(archive=False)
-        number_of_players = [1,2,3,4]
-
-        # Serialize the data
-        durations_serializer = DurationDropdownSerializer(durations, many=True)
-        stations_serializer = ActiveStatationDropDownSerializer(active_stations, many=True)
-
-        reponse = {
-            'active_stations': stations_serializer.data,
-            'durations': durations_serializer.data,
-            'number_of_players': number_of_players
+        # Pre-rendered bundle, rebuilt only when stations, durations or prices change
+        version, body = dropdown_bundle.get()
+
+        # The client already holds this version: nothing to send
+        if request.query_params.get('version') == version:
+            return Response({'version': version, 'changed': False}, status=status.HTTP_200_OK)
+
+        return HttpResponse(body, content_type='application/json', status=status.HTTP_200_OK)
+
+class GamingSessionBulkCheckoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = GamingSessionBulkCheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # End the listed sessions, or every active one, in one transaction
+        session_ids = serializer.validated_data.get('session_ids')
+        sessions = checkout_sessions(session_ids, request.user)
+
+        checked_out = [session.id for session in sessions]
+        response = {
+            'checked_out': checked_out,
+            'count': len(checked_out),
         }
+        if session_ids is not None:
+            response['skipped'] = sorted(set(session_ids) - set(checked_out))
+
+        return Response(response, status=status.HTTP_200_OK)
+
+class GamingSessionTimerView(APIView):
+    """
+    Runs one timer transition and answers with the session's dashboard row.
+
+    Subclasses set transition to the gaming_sessions.timer function to run;
+    it is called as transition(pk, user=..., **validated input), the input
+    coming from input_serializer_class when the transition takes any.
+    """
+    permission_classes = [IsAuthenticated]
+    transition = None
+    input_serializer_class = None
+
+    def put(self, request, pk, *args, **kwargs):
+        arguments = {}
+        if self.input_serializer_class is not None:
+            serializer = self.input_serializer_class(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            arguments = serializer.validated_data
+        session = self.transition(pk, user=request.user, **arguments)
+
+        data = GamingSessionActiveDashboardSerializer(session).data
+        data['billed_seconds'] = int(session.billed_time().total_seconds())
+        return Response(data, status=status.HTTP_200_OK)
+
+class GamingSessionPauseView(GamingSessionTimerView):
+    transition = staticmethod(timer.pause)
+
+class GamingSessionResumeView(GamingSessionTimerView):
+    transition = staticmethod(timer.resume)
+
+class GamingSessionEndView(GamingSessionTimerView):
+    transition = staticmethod(timer.end)
+
+class GamingSessionAddTimeView(GamingSessionTimerView):
+    transition = staticmethod(timer.add_time)
+    input_serializer_class = GamingSessionAddTimeSerializer
+
+class GamingSessionAddItemView(GamingSessionTimerView):
+    transition = staticmethod(timer.add_item)
+    input_serializer_class = GamingSessionAddItemSerializer
 
-        return Response(reponse, status=status.HTTP_200_OK)
+    def post(self, request, pk, *args, **kwargs):
+        return self.put(request, pk, *args, **kwargs)
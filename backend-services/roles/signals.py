@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from gamestop.cache import get_namespace
+from .models import Role
+
+
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_roles_cache(sender, **kwargs):
+    get_namespace('roles').invalidate()
@@ -1,10 +1,12 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from gamestop.conditional import CachedListMixin
 from .models import Role
 from .serializers import RoleSerializer
 
-class RoleListCreateView(generics.ListCreateAPIView):
+class RoleListCreateView(CachedListMixin, generics.ListCreateAPIView):
+    cache_namespace = 'roles'
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = [IsAuthenticated]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ServicePricesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'service_prices'
+
+    def ready(self):
+        from . import signals  # noqa: F401
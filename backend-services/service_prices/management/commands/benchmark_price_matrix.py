@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from durations.models import Duration
+from game_types.models import GameType
+from service_types.models import ServiceType
+from service_prices.models import ServicePrice
+from service_prices.pricing import price_matrix
+
+
+PLAYER_RANGES = [(1, 1), (2, 2), (3, 3), (4, 8)]
+
+
+class Command(BaseCommand):
+    help = "Time price matrix lookups as the ServicePrice table grows (all writes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+        parser.add_argument('--lookups', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            service_type = ServiceType.objects.create(name='Benchmark Console')
+            durations = list(Duration.objects.filter(archive=False))
+            rows_per_game_type = len(durations) * len(PLAYER_RANGES)
+
+            game_types = []
+            for size in sorted(options['sizes']):
+                while len(game_types) * rows_per_game_type < size:
+                    game_types.append(self._add_game_type(service_type, len(game_types), durations))
+
+                price_matrix.invalidate()
+                keys = [
+                    (service_type.id, random.choice(game_types).id, random.choice(durations).id, random.randint(1, 8))
+                    for _ in range(options['lookups'])
+                ]
+                price_matrix.get_price(*keys[0])
+
+                started = time.perf_counter()
+                for key in keys:
+                    price_matrix.get_price(*key)
+                elapsed = time.perf_counter() - started
+
+                self.stdout.write(
+                    f"{ServicePrice.objects.count():>7} prices: "
+                    f"{elapsed / len(keys) * 1e9:8.1f} ns/lookup"
+                )
+
+            transaction.set_rollback(True)
+        price_matrix.invalidate()
+
+    def _add_game_type(self, service_type, number, durations):
+        game_type = GameType.objects.create(name=f'Benchmark {number}', service_type=service_type)
+        ServicePrice.objects.bulk_create(
+            ServicePrice(
+                service_type=service_type,
+                game_type=game_type,
+                duration=duration,
+                player_count=low,
+                max_player_count=high,
+                price=10 * low,
+            )
+            for duration in durations
+            for low, high in PLAYER_RANGES
+        )
+        return game_type
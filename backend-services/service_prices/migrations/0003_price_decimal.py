@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:23
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+from gamestop.money import to_money
+
+
+BATCH_SIZE = 1000
+
+
+def round_prices_to_paise(apps, schema_editor):
+    """
+    Round every stored float price (and its history) half up to the paisa
+    before the column becomes a decimal, so the type change itself never
+    has to round and 79.99999999 lands as 80.00 on every backend.
+    """
+    for model_name in ('ServicePrice', 'HistoricalServicePrice'):
+        model = apps.get_model('service_prices', model_name)
+        pk = model._meta.pk.attname
+        last_pk = 0
+        while True:
+            batch = list(
+                model.objects.filter(**{f'{pk}__gt': last_pk}).order_by(pk).only(pk, 'price')[:BATCH_SIZE]
+            )
+            if not batch:
+                break
+            last_pk = getattr(batch[-1], pk)
+
+            changed = []
+            for row in batch:
+                rounded = float(to_money(row.price))
+                if rounded != row.price:
+                    row.price = rounded
+                    changed.append(row)
+            model.objects.bulk_update(changed, ['price'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service_prices', '0002_populate_default_service_prices'),
+    ]
+
+    operations = [
+        migrations.RunPython(round_prices_to_paise, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='historicalserviceprice',
+            name='price',
+            field=models.DecimalField(decimal_places=2, help_text='Price for this service configuration', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0'))]),
+        ),
+        migrations.AlterField(
+            model_name='serviceprice',
+            name='price',
+            field=models.DecimalField(decimal_places=2, help_text='Price for this service configuration', max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0'))]),
+        ),
+    ]
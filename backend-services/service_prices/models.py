@@ -1,10 +1,12 @@
+from decimal import Decimal
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from service_types.models import ServiceType
 from game_types.models import GameType
 from durations.models import Duration
-from simple_history.models import HistoricalRecords
+from gamestop.history import DeferredHistoricalRecords
 
 
 class ServicePrice(models.Model):
@@ -39,8 +41,10 @@ class ServicePrice(models.Model):
         validators=[MinValueValidator(1)],
         help_text="Maximum player count for this pricing"
     )
-    price = models.FloatField(
-        validators=[MinValueValidator(0)],
+    price = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[MinValueValidator(Decimal('0'))],
         help_text="Price for this service configuration"
     )
 
@@ -62,7 +66,7 @@ class ServicePrice(models.Model):
     archive = models.BooleanField(default=False)
 
     # History tracking
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     class Meta:
         ordering = ['-id']
@@ -0,0 +1,144 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+from durations.models import Duration
+from game_types.models import GameType
+from gamestop.cache import VersionedValue, get_namespace
+from service_types.models import ServiceType
+from .models import ServicePrice
+
+
+PricingData = namedtuple('PricingData', ['service_types', 'game_type_ids', 'durations', 'indexes', 'player_counts'])
+
+
+class PlayerCountIndex:
+    """
+    Interval index over the player-count ranges priced for one
+    (service_type, game_type, duration).
+
+    Overlapping ranges are flattened into disjoint segments when the index
+    is built, the narrowest range winning, so a lookup is a single bisect.
+    """
+
+    def __init__(self, ranges):
+        # ranges: iterable of (min_players, max_players, price) in id order
+        ranges = list(ranges)
+        boundaries = sorted({low for low, _, _ in ranges} | {high + 1 for _, high, _ in ranges})
+
+        starts, ends, prices = [], [], []
+        for start, next_start in zip(boundaries, boundaries[1:]):
+            covering = [
+                (high - low, position, price)
+                for position, (low, high, price) in enumerate(ranges)
+                if low <= start <= high
+            ]
+            if not covering:
+                continue
+            price = min(covering)[2]
+            if ends and ends[-1] == start - 1 and prices[-1] == price:
+                ends[-1] = next_start - 1
+                continue
+            starts.append(start)
+            ends.append(next_start - 1)
+            prices.append(price)
+
+        self._starts = tuple(starts)
+        self._ends = tuple(ends)
+        self._prices = tuple(prices)
+        self.default = ranges[0][2] if ranges else None
+
+    def get(self, player_count):
+        """Return the price whose range holds player_count, or None"""
+        position = bisect_right(self._starts, player_count) - 1
+        if position >= 0 and player_count <= self._ends[position]:
+            return self._prices[position]
+        return None
+
+
+class PriceMatrix:
+    """
+    In-memory index of the whole pricing grid.
+
+    The matrix is loaded lazily on the first lookup, shared through the
+    'price_matrix' cache namespace and invalidated whenever pricing data
+    changes (see service_prices/signals.py), so check-ins resolve their
+    price without touching the database and every process sharing the
+    cache sees the change. The lookup tables it is keyed on (service
+    types, game types, durations) ride along.
+    """
+
+    def __init__(self):
+        self._value = VersionedValue(get_namespace('price_matrix'), 'matrix', self._load)
+
+    def _load(self):
+        service_types = dict(
+            ServiceType.objects.order_by().values_list('id', 'name')
+        )
+        game_type_ids = frozenset(GameType.objects.order_by().values_list('id', flat=True))
+        durations = {duration.id: duration for duration in Duration.objects.order_by()}
+
+        ranges = {}
+        prices = (
+            ServicePrice.objects
+            .filter(archive=False)
+            .order_by('id')
+            .values_list(
+                'service_type_id', 'game_type_id', 'duration_id',
+                'player_count', 'max_player_count', 'price'
+            )
+        )
+        for service_type_id, game_type_id, duration_id, player_count, max_player_count, price in prices:
+            # A missing minimum means "up to max_player_count" (see is_valid_for_player_count)
+            ranges.setdefault((service_type_id, game_type_id, duration_id), []).append(
+                (player_count or 1, max_player_count, price)
+            )
+
+        indexes = {key: PlayerCountIndex(key_ranges) for key, key_ranges in ranges.items()}
+        player_counts = tuple(sorted({
+            count
+            for key_ranges in ranges.values()
+            for low, high, _ in key_ranges
+            for count in range(low, high + 1)
+        }))
+        return PricingData(service_types, game_type_ids, durations, indexes, player_counts)
+
+    def _get_data(self):
+        return self._value.get()
+
+    def service_type_name(self, service_type_id):
+        """Return the service type name, or None if it does not exist"""
+        return self._get_data().service_types.get(service_type_id)
+
+    def game_type_exists(self, game_type_id):
+        """Return True if the game type exists"""
+        return game_type_id in self._get_data().game_type_ids
+
+    def get_duration(self, duration_id):
+        """Return the Duration, or None if it does not exist"""
+        return self._get_data().durations.get(duration_id)
+
+    def player_counts(self):
+        """Every player count some active price covers, ascending"""
+        return self._get_data().player_counts
+
+    def get_price(self, service_type_id, game_type_id, duration_id, player_count=None):
+        """
+        Return the configured price, or None if nothing matches.
+
+        With a player_count, the price whose player range holds it is
+        returned. Without one, the first price configured for
+        (service_type, game_type, duration) is used.
+        """
+        index = self._get_data().indexes.get((service_type_id, game_type_id, duration_id))
+        if index is None:
+            return None
+        if player_count is None:
+            return index.default
+        return index.get(player_count)
+
+    def invalidate(self):
+        """Drop the matrix now and again once the current transaction commits"""
+        self._value.invalidate()
+
+
+price_matrix = PriceMatrix()
@@ -5,3 +5,13 @@ class ServicePriceSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServicePrice
         fields = '__all__'
+
+class ServicePriceImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=['csv', 'json'], required=False)
+
+    def validate(self, data):
+        # Fall back to the file extension when no format is given
+        if 'file_format' not in data:
+            data['file_format'] = 'json' if data['file'].name.lower().endswith('.json') else 'csv'
+        return data
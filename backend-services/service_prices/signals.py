@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from durations.models import Duration
+from game_types.models import GameType
+from service_types.models import ServiceType
+from .models import ServicePrice
+from .pricing import price_matrix
+
+
+# Sent by service_prices.transfer after a bulk import. bulk_create skips
+# post_save, so listeners subscribe here.
+# Arguments: created and updated (row counts)
+prices_imported = Signal()
+
+
+@receiver(prices_imported, sender=ServicePrice)
+@receiver([post_save, post_delete], sender=ServicePrice)
+@receiver([post_save, post_delete], sender=ServiceType)
+@receiver([post_save, post_delete], sender=GameType)
+@receiver([post_save, post_delete], sender=Duration)
+def invalidate_price_matrix(sender, **kwargs):
+    """Any change to the pricing grid or its lookup tables drops the matrix"""
+    price_matrix.invalidate()
@@ -1,3 +1,189 @@
+import csv
+import io
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from durations.models import Duration
+from game_types.models import GameType
+from service_types.models import ServiceType
+from .models import ServicePrice
+from .pricing import PlayerCountIndex, PriceMatrix, price_matrix
+
+
+class PlayerCountIndexTests(TestCase):
+    def test_resolves_the_range_holding_the_count(self):
+        index = PlayerCountIndex([(1, 1, 50.0), (2, 3, 80.0), (5, 8, 120.0)])
+
+        self.assertEqual(50.0, index.get(1))
+        self.assertEqual(80.0, index.get(2))
+        self.assertEqual(80.0, index.get(3))
+        self.assertIsNone(index.get(4))
+        self.assertEqual(120.0, index.get(8))
+        self.assertIsNone(index.get(9))
+
+    def test_narrowest_overlapping_range_wins(self):
+        index = PlayerCountIndex([(1, 8, 100.0), (2, 2, 70.0)])
+
+        self.assertEqual(100.0, index.get(1))
+        self.assertEqual(70.0, index.get(2))
+        self.assertEqual(100.0, index.get(3))
+        self.assertEqual(100.0, index.get(8))
+
+
+class PriceMatrixTests(TestCase):
+    def setUp(self):
+        price_matrix.invalidate()
+        self.console = ServiceType.objects.get(name='Console')
+        self.ps5 = GameType.objects.get(name='PS5')
+        self.one_hour = Duration.objects.get(type='HOUR', duration=1.0)
+
+    def test_lookup_is_served_from_memory_once_loaded(self):
+        price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.console.name, price_matrix.service_type_name(self.console.id))
+            self.assertEqual(120.0, price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1))
+            self.assertEqual(150.0, price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 2))
+
+    def test_invalidation_reaches_other_processes(self):
+        # Another worker's matrix: only the cache backend links the two
+        other = PriceMatrix()
+        self.assertEqual(120.0, other.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1))
+
+        ServicePrice.objects.filter(
+            service_type=self.console, game_type=self.ps5, duration=self.one_hour, player_count=1
+        ).update(price=125)
+        price_matrix.invalidate()
+
+        self.assertEqual(125, other.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1))
+
+    def test_missing_entries_return_none(self):
+        self.assertIsNone(price_matrix.service_type_name(0))
+        self.assertIsNone(price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 9))
+
+    def test_price_change_invalidates_matrix(self):
+        self.assertEqual(120.0, price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1))
+
+        service_price = ServicePrice.objects.get(
+            service_type=self.console, game_type=self.ps5, duration=self.one_hour, player_count=1
+        )
+        service_price.price = 130.0
+        service_price.save()
+
+        self.assertEqual(130.0, price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1))
+
+    def test_deleted_price_is_dropped(self):
+        ServicePrice.objects.get(
+            service_type=self.console, game_type=self.ps5, duration=self.one_hour, player_count=1
+        ).delete()
+
+        self.assertIsNone(price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 1))
+
+    def test_service_type_rename_invalidates_matrix(self):
+        self.assertEqual('Console', price_matrix.service_type_name(self.console.id))
+
+        self.console.name = 'Consoles'
+        self.console.save()
+
+        self.assertEqual('Consoles', price_matrix.service_type_name(self.console.id))
+
+    def test_price_resolves_within_player_range(self):
+        ServicePrice.objects.create(
+            service_type=self.console, game_type=self.ps5, duration=self.one_hour,
+            player_count=5, max_player_count=8, price=260.0
+        )
+
+        self.assertEqual(260.0, price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 6))
+        self.assertIsNone(price_matrix.get_price(self.console.id, self.ps5.id, self.one_hour.id, 9))
+
+
+class ServicePriceTransferTests(TestCase):
+    def setUp(self):
+        price_matrix.invalidate()
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def export(self, file_format='csv'):
+        response = self.client.get('/api/service-prices/export/', {'file_format': file_format})
+        self.assertEqual(200, response.status_code)
+        return b''.join(response.streaming_content).decode()
+
+    def upload(self, name, content):
+        return self.client.post(
+            '/api/service-prices/import/',
+            {'file': SimpleUploadedFile(name, content.encode())},
+            format='multipart',
+        )
+
+    def test_export_lists_every_price(self):
+        rows = list(csv.DictReader(io.StringIO(self.export())))
+
+        self.assertEqual(ServicePrice.objects.count(), len(rows))
+        self.assertEqual(ServicePrice.objects.count(), len(json.loads(self.export('json'))))
+
+    def test_reimporting_an_export_changes_nothing_but_history(self):
+        prices = dict(ServicePrice.objects.values_list('id', 'price'))
+
+        response = self.upload('prices.csv', self.export())
+
+        self.assertEqual({'created': 0, 'updated': len(prices)}, response.data)
+        self.assertEqual(prices, dict(ServicePrice.objects.values_list('id', 'price')))
+        self.assertEqual(len(prices), ServicePrice.history.filter(history_type='~').count())
+
+    def test_import_upserts_on_the_unique_key(self):
+        console = ServiceType.objects.get(name='Console')
+        ps4 = GameType.objects.get(name='PS4')
+        one_hour = Duration.objects.get(type='HOUR', duration=1.0)
+        self.assertEqual(100, price_matrix.get_price(console.id, ps4.id, one_hour.id, 2))
+        rows = [
+            {'service_type_name': 'Console', 'game_type_name': 'PS4', 'duration_type': 'HOUR',
+             'duration_value': 1, 'player_count': 2, 'max_player_count': 2, 'price': '110'},
+            {'service_type_name': 'Console', 'game_type_name': 'PS4', 'duration_type': 'HOUR',
+             'duration_value': 1, 'player_count': 5, 'max_player_count': 6, 'price': '170'},
+        ]
+
+        with self.assertNumQueries(10):
+            response = self.upload('prices.json', json.dumps(rows))
+
+        self.assertEqual({'created': 1, 'updated': 1}, response.data)
+        self.assertEqual(110, price_matrix.get_price(console.id, ps4.id, one_hour.id, 2))
+        self.assertEqual(170, price_matrix.get_price(console.id, ps4.id, one_hour.id, 6))
+        created = ServicePrice.objects.get(player_count=5, max_player_count=6)
+        self.assertEqual('+', created.history.get().history_type)
+        self.assertEqual(self.staff, created.history.get().history_user)
+
+    def test_invalid_rows_are_reported_and_nothing_is_written(self):
+        content = (
+            "service_type_name,game_type_name,duration_type,duration_value,player_count,max_player_count,price\n"
+            "Console,PS4,HOUR,1,1,1,91.5\n"
+            "Console,PS9,HOUR,1,1,1,90\n"
+            "Console,PS4,HOUR,1,3,2,-5\n"
+            "Console,PS4,HOUR,1,1,1,95\n"
+        )
+
+        response = self.upload('prices.csv', content)
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(
+            [(2, {'game_type_name'}), (3, {'max_player_count', 'price'}), (4, {'row'})],
+            [(error['row'], set(error['errors'])) for error in response.data['errors']]
+        )
+        self.assertFalse(ServicePrice.history.exists())
+        self.assertFalse(ServicePrice.objects.filter(price=91.5).exists())
+
+    def test_prices_round_trip_to_the_paisa(self):
+        ServicePrice.objects.update(price=Decimal('99.99'))
+
+        rows = json.loads(self.export('json'))
+        self.assertEqual({'99.99'}, {row['price'] for row in rows})
 
-# Create your tests here.
+        rows[0]['price'] = '99.995'
+        response = self.upload('prices.json', json.dumps(rows))
+        self.assertEqual(400, response.status_code)
+        self.assertEqual({'price'}, set(response.data['errors'][0]['errors']))
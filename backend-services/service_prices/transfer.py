@@ -0,0 +1,232 @@
+"""
+Import and export of the whole price matrix.
+
+Rows are keyed by names rather than ids (the same shape as the seed data in
+migrations/0002_populate_default_service_prices.py), so a file exported
+from one branch imports into another.
+"""
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from durations.models import Duration
+from game_types.models import GameType
+from gamestop.money import to_money
+from gamestop.streaming import stream_json_array
+from service_types.models import ServiceType
+from .models import ServicePrice
+from .signals import prices_imported
+
+
+COLUMNS = (
+    'service_type_name',
+    'game_type_name',
+    'duration_type',
+    'duration_value',
+    'player_count',
+    'max_player_count',
+    'price',
+    'archive',
+)
+
+UNIQUE_FIELDS = ['service_type', 'game_type', 'duration', 'player_count', 'max_player_count']
+
+# Errors reported back before giving up on listing them all
+MAX_ERRORS = 50
+
+
+def price_key(price):
+    return (price.service_type_id, price.game_type_id, price.duration_id, price.player_count, price.max_player_count)
+
+
+def export_rows(chunk_size=2000):
+    """Yield every price as a dict of COLUMNS, straight from one joined query"""
+    rows = (
+        ServicePrice.objects
+        .order_by('service_type__name', 'game_type__name', 'duration__type', 'duration__duration',
+                  'player_count', 'max_player_count')
+        .values_list(
+            'service_type__name', 'game_type__name', 'duration__type', 'duration__duration',
+            'player_count', 'max_player_count', 'price', 'archive',
+        )
+    )
+    for values in rows.iterator(chunk_size=chunk_size):
+        row = dict(zip(COLUMNS, values))
+        # As a string, so JSON keeps the exact amount
+        row['price'] = str(row['price'])
+        yield row
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow(COLUMNS)
+    for row in export_rows(chunk_size):
+        yield writer.writerow([row[column] for column in COLUMNS])
+
+
+def export_json(chunk_size=2000):
+    return stream_json_array(export_rows(chunk_size))
+
+
+def read_csv(lines):
+    return csv.DictReader(lines)
+
+
+def read_json(stream):
+    rows = json.load(stream)
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of price rows")
+    return rows
+
+
+class PriceImportError(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+class PriceImporter:
+    """
+    Validate every row in one pass, then upsert the whole file.
+
+    Names are resolved from three small lookup queries, so validation does
+    not touch the database per row. Nothing is written unless every row
+    is valid.
+    """
+
+    def __init__(self, user=None, batch_size=1000):
+        self.user = user
+        self.batch_size = batch_size
+        self.service_types = dict(ServiceType.objects.values_list('name', 'id'))
+        self.game_types = dict(GameType.objects.values_list('name', 'id'))
+        self.durations = {
+            (duration_type, float(value)): duration_id
+            for duration_id, duration_type, value in Duration.objects.values_list('id', 'type', 'duration')
+        }
+
+    def validate(self, rows):
+        prices, errors, seen = [], [], {}
+        now = timezone.now()
+
+        for number, row in enumerate(rows, start=1):
+            row_errors = {}
+            try:
+                price = self.build(row, now, row_errors)
+            except AttributeError:
+                price, row_errors = None, {'row': "Expected an object with the price columns."}
+
+            if price is not None:
+                key = price_key(price)
+                if key in seen:
+                    row_errors['row'] = f"Duplicates row {seen[key]}."
+                seen.setdefault(key, number)
+
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+                if len(errors) >= MAX_ERRORS:
+                    break
+            else:
+                prices.append(price)
+
+        if errors:
+            raise PriceImportError(errors)
+        return prices
+
+    def build(self, row, now, errors):
+        service_type_id = self.service_types.get(row.get('service_type_name'))
+        if service_type_id is None:
+            errors['service_type_name'] = f"Unknown service type {row.get('service_type_name')!r}."
+        game_type_id = self.game_types.get(row.get('game_type_name'))
+        if game_type_id is None:
+            errors['game_type_name'] = f"Unknown game type {row.get('game_type_name')!r}."
+
+        duration_value = self.number(row, 'duration_value', float, errors)
+        duration_id = self.durations.get((row.get('duration_type'), duration_value))
+        if duration_id is None and 'duration_value' not in errors:
+            errors['duration_type'] = f"Unknown duration {row.get('duration_type')} {row.get('duration_value')}."
+
+        # A blank minimum means a single player, like the model default
+        player_count = self.number(row, 'player_count', int, errors, blank=1)
+        max_player_count = self.number(row, 'max_player_count', int, errors)
+        price = self.number(row, 'price', Decimal, errors)
+        archive = str(row.get('archive', '')).strip().lower() in ('1', 'true', 'yes')
+
+        if player_count is not None and player_count < 1:
+            errors['player_count'] = "Must be at least 1."
+        if max_player_count is not None and player_count is not None and max_player_count < player_count:
+            errors['max_player_count'] = "Must not be below player_count."
+        if price is not None and (not price.is_finite() or price < 0):
+            errors['price'] = "Must be a positive number or zero."
+        elif price is not None and price != to_money(price):
+            errors['price'] = "Must have at most two decimal places."
+        if errors:
+            return None
+
+        return ServicePrice(
+            service_type_id=service_type_id,
+            game_type_id=game_type_id,
+            duration_id=duration_id,
+            player_count=player_count,
+            max_player_count=max_player_count,
+            price=to_money(price),
+            archive=archive,
+            created_by=self.user,
+            updated_by=self.user,
+            created_at=now,
+            updated_at=now,
+        )
+
+    def number(self, row, column, cast, errors, blank=None):
+        value = row.get(column)
+        if value is None or str(value).strip() == '':
+            if blank is None:
+                errors[column] = "This field is required."
+            return blank
+        try:
+            return cast(str(value).strip())
+        except (TypeError, ValueError, InvalidOperation):
+            errors[column] = f"Not a number: {value!r}."
+            return None
+
+    @transaction.atomic
+    def save(self, prices):
+        """
+        Upsert prices on the unique_together key and record their history.
+
+        Returns (created, updated) counts.
+        """
+        existing = set(ServicePrice.objects.values_list(
+            'service_type_id', 'game_type_id', 'duration_id', 'player_count', 'max_player_count'
+        ))
+        saved = ServicePrice.objects.bulk_create(
+            prices,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=UNIQUE_FIELDS,
+            update_fields=['price', 'archive', 'updated_by', 'updated_at'],
+        )
+
+        # Re-read the upserted rows so history holds what is stored, not what was sent
+        stored = ServicePrice.objects.in_bulk([price.pk for price in saved])
+        created, updated = [], []
+        for price in saved:
+            (updated if price_key(price) in existing else created).append(stored[price.pk])
+        if created:
+            ServicePrice.history.bulk_history_create(created, default_user=self.user, batch_size=self.batch_size)
+        if updated:
+            ServicePrice.history.bulk_history_create(
+                updated, update=True, default_user=self.user, batch_size=self.batch_size
+            )
+
+        prices_imported.send(sender=ServicePrice, created=len(created), updated=len(updated))
+        return len(created), len(updated)
@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import ServicePriceListCreateView, ServicePriceRetrieveUpdateDestroyView
+from .views import (
+    ServicePriceListCreateView,
+    ServicePriceRetrieveUpdateDestroyView,
+    ServicePriceExportView,
+    ServicePriceImportView,
+)
 
 urlpatterns = [
     path('', ServicePriceListCreateView.as_view(), name='ServicePrice-list-create'),
     path('<int:pk>/', ServicePriceRetrieveUpdateDestroyView.as_view(), name='ServicePrice-detail'),
+    path('export/', ServicePriceExportView.as_view(), name='ServicePrice-export'),
+    path('import/', ServicePriceImportView.as_view(), name='ServicePrice-import'),
 ]
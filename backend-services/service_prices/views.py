@@ -1,8 +1,15 @@
-from rest_framework import generics
+import csv
+import io
+
+from django.http import StreamingHttpResponse
+from rest_framework import generics, status
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from .models import ServicePrice
-from .serializers import ServicePriceSerializer
+from .serializers import ServicePriceSerializer, ServicePriceImportSerializer
+from .transfer import PriceImporter, PriceImportError, export_csv, export_json, read_csv, read_json
 
 class ServicePriceListCreateView(generics.ListCreateAPIView):
     queryset = ServicePrice.objects.all()
@@ -31,3 +38,41 @@ class ServicePriceRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVie
         instance.archive = True
         instance.updated_by = self.request.user
         instance.save()
+
+class ServicePriceExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        # Streamed a chunk of rows at a time, the file is never held in memory
+        if request.query_params.get('file_format', 'csv') == 'json':
+            response = StreamingHttpResponse(export_json(), content_type='application/json')
+            response['Content-Disposition'] = 'attachment; filename="service-prices.json"'
+        else:
+            response = StreamingHttpResponse(export_csv(), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="service-prices.csv"'
+        return response
+
+class ServicePriceImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = ServicePriceImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+
+        try:
+            if serializer.validated_data['file_format'] == 'json':
+                rows = read_json(text)
+            else:
+                rows = read_csv(text)
+            importer = PriceImporter(user=request.user)
+            prices = importer.validate(rows)
+        except PriceImportError as error:
+            return Response({'errors': error.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except (ValueError, csv.Error) as error:
+            return Response({'file': [str(error)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = importer.save(prices)
+        return Response({'created': created, 'updated': updated}, status=status.HTTP_200_OK)
@@ -1,7 +1,7 @@
 # service_types/models.py
 from django.db import models
 from django.contrib.auth.models import User
-from simple_history.models import HistoricalRecords
+from gamestop.history import DeferredHistoricalRecords
 
 
 class ServiceType(models.Model):
@@ -30,7 +30,7 @@ class ServiceType(models.Model):
     archive = models.BooleanField(default=False)
 
     # History tracking
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     class Meta:
         ordering = ['-id']
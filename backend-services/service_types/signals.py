@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from gamestop.cache import get_namespace
+from .models import ServiceType
+
+
+@receiver([post_save, post_delete], sender=ServiceType)
+def invalidate_service_types_cache(sender, **kwargs):
+    get_namespace('service_types').invalidate()
@@ -1,10 +1,12 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from gamestop.conditional import CachedListMixin
 from .models import ServiceType
 from .serializers import ServiceTypeSerializer
 
-class ServiceTypeListCreateView(generics.ListCreateAPIView):
+class ServiceTypeListCreateView(CachedListMixin, generics.ListCreateAPIView):
+    cache_namespace = 'service_types'
     queryset = ServiceType.objects.all()
     serializer_class = ServiceTypeSerializer
     permission_classes = [IsAuthenticated]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from gamestop.money import to_money
 from gaming_sessions.models import GamingSession
 from snacks.models import Snack
 
@@ -27,5 +28,5 @@ class SessionSnack(models.Model):
 
     def save(self, *args, **kwargs):
         # Automatically calculate total_cost when saving
-        self.total_cost = self.quantity * self.unit_price_at_time
+        self.total_cost = to_money(self.quantity * to_money(self.unit_price_at_time))
         super().save(*args, **kwargs)
@@ -5,3 +5,17 @@ class SessionSnackSerializer(serializers.ModelSerializer):
     class Meta:
         model = SessionSnack
         fields = '__all__'
+        extra_kwargs = {'quantity': {'min_value': 1}}
+
+    def validate(self, data):
+        """A snack that is switched off cannot be ordered, nor ordered more of"""
+        instance = self.instance
+        snack = data.get('snack', instance.snack if instance else None)
+        ordering = (
+            instance is None
+            or 'snack' in data
+            or data.get('quantity', instance.quantity) > instance.quantity
+        )
+        if ordering and (snack.archive or not snack.is_available):
+            raise serializers.ValidationError({'snack': f"Snack with id {snack.id} does not exist or is unavailable."})
+        return data
@@ -1,3 +1,151 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from game_types.models import GameType
+from gaming_sessions.models import GamingSession
+from service_types.models import ServiceType
+from snacks.models import Snack
+from stations.models import Station
+from .models import SessionSnack
+
+
+class SessionSnackStockTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='password'))
+
+        self.session = GamingSession.objects.create(
+            user=User.objects.create(username='customer'),
+            station=Station.objects.order_by('id').first(),
+            check_in_time=timezone.now(),
+            calculated_gaming_cost=100,
+            total_session_cost=100,
+        )
+        self.cola = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40, stock_quantity=3)
+
+    def stock(self):
+        return Snack.objects.get(id=self.cola.id).stock_quantity
+
+    def order(self, quantity):
+        return self.client.post('/api/session-snacks/', {
+            'gaming_session': self.session.id,
+            'snack': self.cola.id,
+            'quantity': quantity,
+            'unit_price_at_time': '40.00',
+            'total_cost': '0.00',
+        }, format='json')
+
+    def test_ordering_takes_stock_and_refuses_to_oversell(self):
+        self.assertEqual(201, self.order(2).status_code)
+        self.assertEqual(1, self.stock())
+
+        response = self.order(2)
+        self.assertEqual(400, response.status_code)
+        self.assertIn('quantity', response.data)
+        self.assertEqual(1, SessionSnack.objects.count())
+        self.assertEqual(1, self.stock())
+
+    def test_changing_the_quantity_moves_the_difference(self):
+        line = self.order(1).data['id']
+
+        self.assertEqual(200, self.client.patch(f'/api/session-snacks/{line}/', {'quantity': 3}, format='json').status_code)
+        self.assertEqual(0, self.stock())
+        self.assertEqual(400, self.client.patch(f'/api/session-snacks/{line}/', {'quantity': 4}, format='json').status_code)
+        self.assertEqual(3, SessionSnack.objects.get(id=line).quantity)
+
+    def test_archiving_restores_stock_once(self):
+        line = self.order(2).data['id']
+
+        self.assertEqual(204, self.client.delete(f'/api/session-snacks/{line}/').status_code)
+        self.assertEqual(3, self.stock())
+        self.client.delete(f'/api/session-snacks/{line}/')
+        self.assertEqual(3, self.stock())
+
+    def test_unavailable_snacks_cannot_be_ordered(self):
+        line = self.order(1).data['id']
+        Snack.objects.filter(id=self.cola.id).update(is_available=False)
+
+        response = self.order(1)
+        self.assertEqual(400, response.status_code)
+        self.assertIn('snack', response.data)
+        self.assertEqual(400, self.client.patch(f'/api/session-snacks/{line}/', {'quantity': 2}, format='json').status_code)
+        self.assertEqual(2, self.stock())
+
+        # Taking the line off the bill still works
+        self.assertEqual(204, self.client.delete(f'/api/session-snacks/{line}/').status_code)
+        self.assertEqual(3, self.stock())
+
+
+class ConcurrentSessionSnackOrderTests(TransactionTestCase):
+    attempts = 8
+
+    def setUp(self):
+        service_type = ServiceType.objects.create(name='Race Console')
+        game_type = GameType.objects.create(name='Race PS5', service_type=service_type)
+        self.staff = User.objects.create_user(username='staff', password='password')
+        # One session per terminal tells the orders apart
+        self.sessions = [
+            GamingSession.objects.create(
+                user=User.objects.create(username=f'customer {number}'),
+                station=Station.objects.create(name=f'Race Station {number}', game_type=game_type),
+                check_in_time=timezone.now(),
+                calculated_gaming_cost=100,
+                total_session_cost=100,
+            )
+            for number in range(self.attempts)
+        ]
+        self.cola = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40, stock_quantity=3)
+
+    def retry(self, call):
+        while True:
+            try:
+                return call()
+            except OperationalError:
+                # SQLite reports lock contention instead of waiting
+                time.sleep(0.001)
+
+    def test_parallel_orders_never_oversell_the_last_units(self):
+        barrier = threading.Barrier(self.attempts)
+        statuses = []
+
+        def order(session):
+            client = APIClient()
+            client.force_authenticate(self.staff)
+            payload = {
+                'gaming_session': session.id,
+                'snack': self.cola.id,
+                'quantity': 1,
+                'unit_price_at_time': '40.00',
+                'total_cost': '0.00',
+            }
+            ordered = SessionSnack.objects.filter(gaming_session=session)
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        statuses.append(client.post('/api/session-snacks/', payload, format='json').status_code)
+                        return
+                    except OperationalError:
+                        # Rolled back, unless the lock was hit after the commit
+                        if self.retry(ordered.exists):
+                            statuses.append(201)
+                            return
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=order, args=(session,)) for session in self.sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([201] * 3 + [400] * (self.attempts - 3), sorted(statuses))
+        self.assertEqual(3, SessionSnack.objects.filter(snack=self.cola).count())
+        self.assertEqual(0, Snack.objects.get(id=self.cola.id).stock_quantity)
@@ -1,9 +1,17 @@
+from django.db import transaction
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from snacks.stock import move_stock
 from .models import SessionSnack
 from .serializers import SessionSnackSerializer
 
+
+def _held(snack_id, quantity, archive):
+    """(snack id, units) an order line keeps off the shelf"""
+    return snack_id, 0 if archive else quantity
+
+
 class SessionSnackListCreateView(generics.ListCreateAPIView):
     queryset = SessionSnack.objects.all()
     serializer_class = SessionSnackSerializer
@@ -12,7 +20,14 @@ class SessionSnackListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         return SessionSnack.objects.filter(archive=False)
 
+    @transaction.atomic
     def perform_create(self, serializer):
+        data = serializer.validated_data
+        move_stock(
+            (None, 0),
+            _held(data['snack'].id, data.get('quantity', 1), data.get('archive', False)),
+            self.request.user,
+        )
         serializer.save(
             created_by=self.request.user,
             updated_by=self.request.user
@@ -31,14 +46,30 @@ class SessionSnackRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIVie
     permission_classes = [IsAuthenticated]
     serializer_class = SessionSnackSerializer
 
+    @transaction.atomic
     def perform_update(self, serializer):
+        # Re-read under the row lock so two edits of one line cannot both move stock from the same quantity
+        stored = SessionSnack.objects.select_for_update().get(pk=serializer.instance.pk)
+        data = serializer.validated_data
+        move_stock(
+            _held(stored.snack_id, stored.quantity, stored.archive),
+            _held(
+                data['snack'].id if 'snack' in data else stored.snack_id,
+                data.get('quantity', stored.quantity),
+                data.get('archive', stored.archive),
+            ),
+            self.request.user,
+        )
         serializer.save(
             updated_by=self.request.user
         )
 
         return Response(serializer.data)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
+        stored = SessionSnack.objects.select_for_update().get(pk=instance.pk)
+        move_stock(_held(stored.snack_id, stored.quantity, stored.archive), (None, 0), self.request.user)
         instance.archive = True
         instance.updated_by = self.request.user
         instance.save()
@@ -0,0 +1,56 @@
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Snack
+
+
+def take_stock(snack_id, quantity, user=None):
+    """
+    Take quantity units off the shelf with a conditional UPDATE.
+
+    The stock_quantity >= quantity guard is re-checked under the row lock,
+    so two orders racing for the last units cannot both get them. Returns
+    1 if the units were taken, 0 if there were not enough.
+    """
+    if quantity <= 0:
+        return 1
+    return Snack.objects.filter(id=snack_id, stock_quantity__gte=quantity).update(
+        stock_quantity=F('stock_quantity') - quantity,
+        updated_by=user,
+        updated_at=timezone.now(),
+    )
+
+
+def return_stock(snack_id, quantity, user=None):
+    """Put quantity units back on the shelf. Returns the rows changed"""
+    if quantity <= 0:
+        return 0
+    return Snack.objects.filter(id=snack_id).update(
+        stock_quantity=F('stock_quantity') + quantity,
+        updated_by=user,
+        updated_at=timezone.now(),
+    )
+
+
+def move_stock(taken, wanted, user=None):
+    """
+    Go from holding taken to holding wanted, each a (snack id, quantity)
+    pair; use quantity 0 for nothing (a new or archived order line).
+
+    Raises ValidationError, before anything is returned, when the extra
+    units are not in stock. Run it in the transaction that saves the
+    order line so a failed save gives the units back.
+    """
+    taken_id, taken_quantity = taken
+    wanted_id, wanted_quantity = wanted
+
+    if taken_id == wanted_id:
+        # Same snack: only the difference moves
+        difference = wanted_quantity - taken_quantity
+        taken_quantity, wanted_quantity = max(-difference, 0), max(difference, 0)
+
+    if wanted_quantity and not take_stock(wanted_id, wanted_quantity, user):
+        available = Snack.objects.filter(id=wanted_id).values_list('stock_quantity', flat=True).first()
+        raise ValidationError({'quantity': f"Only {available or 0} left in stock."})
+    return_stock(taken_id, taken_quantity, user)
@@ -1,3 +1,35 @@
 from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from .models import Snack
+from .stock import move_stock, return_stock, take_stock
+
+
+class SnackStockTests(TestCase):
+    def setUp(self):
+        self.cola = Snack.objects.create(name='Cola', category='DRINKS', unit_price=40, stock_quantity=3)
+        self.chips = Snack.objects.create(name='Chips', category='SNACKS', unit_price=20, stock_quantity=1)
+
+    def stock(self, snack):
+        return Snack.objects.get(id=snack.id).stock_quantity
+
+    def test_take_stock_never_goes_below_zero(self):
+        self.assertEqual(1, take_stock(self.cola.id, 2))
+        self.assertEqual(0, take_stock(self.cola.id, 2))
+        self.assertEqual(1, self.stock(self.cola))
+
+        self.assertEqual(1, return_stock(self.cola.id, 2))
+        self.assertEqual(3, self.stock(self.cola))
+
+    def test_move_stock_only_moves_the_difference(self):
+        move_stock((None, 0), (self.cola.id, 2))
+        move_stock((self.cola.id, 2), (self.cola.id, 3))
+        self.assertEqual(0, self.stock(self.cola))
+
+        move_stock((self.cola.id, 3), (self.chips.id, 1))
+        self.assertEqual((3, 0), (self.stock(self.cola), self.stock(self.chips)))
+
+        with self.assertRaises(ValidationError):
+            move_stock((self.chips.id, 1), (self.cola.id, 4))
+        self.assertEqual((3, 0), (self.stock(self.cola), self.stock(self.chips)))
 
-# Create your tests here.
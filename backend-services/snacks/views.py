@@ -1,10 +1,11 @@
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from gamestop.conditional import ConditionalListMixin
 from .models import Snack
 from .serializers import SnackSerializer
 
-class SnackListCreateView(generics.ListCreateAPIView):
+class SnackListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = Snack.objects.all()
     serializer_class = SnackSerializer
     permission_classes = [IsAuthenticated]
@@ -2,7 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from game_types.models import GameType
 from service_types.models import ServiceType
-from simple_history.models import HistoricalRecords
+from gamestop.history import DeferredHistoricalRecords
 
 
 class Station(models.Model):
@@ -37,7 +37,7 @@ class Station(models.Model):
     archive = models.BooleanField(default=False)
 
     # History tracking
-    history = HistoricalRecords()
+    history = DeferredHistoricalRecords()
 
     class Meta:
         ordering = ['-id']
@@ -0,0 +1,48 @@
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import Station
+from .signals import occupancy_changed
+
+
+class StationOccupied(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The station is already occupied.'
+    default_code = 'station_occupied'
+
+
+def _flip_station(station, is_active, user):
+    """
+    Flip is_active with a conditional UPDATE so only one caller can win.
+
+    The WHERE clause is re-checked under the row lock, which means two
+    terminals racing for the same station cannot both book it, while
+    check-ins on other stations never wait on each other. Returns the
+    number of rows changed (0 or 1).
+    """
+    updated_at = timezone.now()
+    changed = Station.objects.filter(id=station.id, is_active=not is_active).update(
+        is_active=is_active,
+        updated_by=user,
+        updated_at=updated_at,
+    )
+
+    if changed:
+        station.is_active = is_active
+        station.updated_by = user
+        station.updated_at = updated_at
+        Station.history.bulk_history_create([station], update=True, default_user=user)
+        occupancy_changed.send(sender=Station, instance=station)
+
+    return changed
+
+
+def occupy_station(station, user=None):
+    """Mark a free station as occupied. Returns 1 if booked, 0 if it was taken"""
+    return _flip_station(station, False, user)
+
+
+def release_station(station, user=None):
+    """Mark an occupied station as free again. Returns the rows changed"""
+    return _flip_station(station, True, user)
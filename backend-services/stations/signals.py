@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+
+# Sent by stations.occupancy after a conditional UPDATE flips is_active.
+# The queryset update bypasses post_save, so listeners subscribe here.
+# Arguments: instance (the Station, already updated in memory)
+occupancy_changed = Signal()
@@ -1,3 +1,82 @@
-from django.test import TestCase
+import threading
+import time
 
-# Create your tests here.
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase
+
+from game_types.models import GameType
+from service_types.models import ServiceType
+from .models import Station
+from .occupancy import occupy_station, release_station
+
+
+class StationOccupancyTests(TestCase):
+    def setUp(self):
+        self.station = Station.objects.get(name='Station 1')
+
+    def test_occupy_and_release_report_rows_changed(self):
+        self.assertEqual(1, occupy_station(self.station))
+        self.assertEqual(0, occupy_station(Station.objects.get(id=self.station.id)))
+        self.assertFalse(Station.objects.get(id=self.station.id).is_active)
+
+        self.assertEqual(1, release_station(self.station))
+        self.assertEqual(0, release_station(self.station))
+        self.assertTrue(Station.objects.get(id=self.station.id).is_active)
+
+    def test_each_flip_is_recorded_in_history(self):
+        occupy_station(self.station)
+        release_station(self.station)
+
+        history = list(self.station.history.values_list('is_active', flat=True)[:2])
+        self.assertEqual([True, False], history)
+
+
+class ConcurrentStationOccupancyTests(TransactionTestCase):
+    attempts = 8
+
+    def setUp(self):
+        service_type = ServiceType.objects.create(name='Race Console')
+        game_type = GameType.objects.create(name='Race PS5', service_type=service_type)
+        self.stations = [
+            Station.objects.create(name=f'Race Station {number}', game_type=game_type)
+            for number in range(2)
+        ]
+
+    def race(self, stations):
+        barrier = threading.Barrier(len(stations))
+        results = []
+
+        def book(station_id):
+            try:
+                station = Station.objects.get(id=station_id)
+                barrier.wait()
+                while True:
+                    try:
+                        results.append((station_id, occupy_station(station)))
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(station.id,)) for station in stations]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_parallel_check_ins_book_a_station_once(self):
+        station = self.stations[0]
+
+        results = self.race([station] * self.attempts)
+
+        self.assertEqual(self.attempts, len(results))
+        self.assertEqual(1, sum(changed for _, changed in results))
+        self.assertEqual(2, station.history.count())
+
+    def test_different_stations_do_not_block_each_other(self):
+        results = self.race(self.stations)
+
+        self.assertEqual({(station.id, 1) for station in self.stations}, set(results))
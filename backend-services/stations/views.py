@@ -1,10 +1,11 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from gamestop.conditional import ConditionalListMixin
 from .models import Station
 from .serializers import StationSerializer
 
-class StationListCreateView(generics.ListCreateAPIView):
+class StationListCreateView(ConditionalListMixin, generics.ListCreateAPIView):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from user_profiles.models import UserProfile
+from user_profiles.search import backend, index_profiles, search_profiles
+
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Ananya', 'Diya', 'Isha', 'Kavya', 'Meera']
+LAST_NAMES = ['Sharma', 'Verma', 'Iyer', 'Nair', 'Reddy', 'Patel', 'Gupta', 'Menon', 'Joshi', 'Kulkarni', 'Das', 'Rao']
+
+
+class Command(BaseCommand):
+    help = "Compare the old icontains filter with the search index for customer search (all writes are rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        queries = ['aar', 'sharma', 'kavya iyer', 'shrama', '98450']
+        with transaction.atomic():
+            started = time.perf_counter()
+            self._seed(options['customers'])
+            self.stdout.write(
+                f"seeded and indexed {options['customers']} customers in {time.perf_counter() - started:.1f}s "
+                f"(backend: {backend()})"
+            )
+
+            for query in queries:
+                legacy = self._time(options['repeat'], lambda: self._first_page(self._icontains(query)))
+                indexed = self._time(options['repeat'], lambda: self._first_page(search_profiles(query)))
+                self.stdout.write(
+                    f"{query!r:>14}: icontains {legacy[0] * 1000:8.1f} ms ({legacy[1]} hits), "
+                    f"index {indexed[0] * 1000:8.1f} ms ({indexed[1]} hits)"
+                )
+
+            transaction.set_rollback(True)
+
+    def _seed(self, customers):
+        generator = random.Random(19)
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f'bench{number}',
+                    first_name=generator.choice(FIRST_NAMES),
+                    last_name=generator.choice(LAST_NAMES),
+                )
+                for number in range(customers)
+            ),
+            batch_size=2000,
+        )
+        profiles = UserProfile.objects.bulk_create(
+            (
+                UserProfile(user=user, phone_number=f'+91{9800000000 + generator.randrange(10 ** 8)}')
+                for user in users
+            ),
+            batch_size=2000,
+        )
+        for profile, user in zip(profiles, users):
+            profile.user = user
+        index_profiles(profiles, batch_size=2000)
+
+    def _icontains(self, query):
+        # The filter UserProfileListCreateView used before the index
+        return UserProfile.objects.filter(archive=False).select_related('user').filter(
+            Q(user__username__icontains=query) |
+            Q(user__first_name__icontains=query) |
+            Q(user__last_name__icontains=query)
+        )
+
+    def _first_page(self, queryset):
+        # What a paginated response costs: the count and the first 20 rows
+        count = queryset.count()
+        list(queryset[:20])
+        return count
+
+    def _time(self, repeat, run):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = run()
+            timings.append(time.perf_counter() - started)
+        return min(timings), hits
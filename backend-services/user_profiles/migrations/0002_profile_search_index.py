@@ -0,0 +1,115 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:10
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FTS_TABLE = 'user_profiles_search_fts'
+ENTRY_TABLE = 'user_profiles_profilesearchentry'
+
+SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"document, content='{ENTRY_TABLE}', content_rowid='profile_id', tokenize='trigram')",
+    f"CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {ENTRY_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.profile_id, new.document); END",
+    f"CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {ENTRY_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.profile_id, old.document); END",
+    f"CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON {ENTRY_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.profile_id, old.document); "
+    f"INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.profile_id, new.document); END",
+]
+
+POSTGRES_TRIGRAM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX profile_search_trgm_idx ON {ENTRY_TABLE} USING gin (document gin_trgm_ops)",
+]
+
+
+# Copies of user_profiles.search.normalize and build_document as of this
+# migration, so the backfill does not change when that module does
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    return ' '.join(re.sub(r'[\W_]+', ' ', text.casefold()).split())
+
+
+def build_document(username, first_name, last_name, phone_number):
+    words = normalize(f"{username} {first_name} {last_name}")
+    phone = re.sub(r'\D', '', phone_number or '')
+    return f"{words} {phone}".strip()[:400]
+
+
+def sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Add the trigram index (Postgres) or FTS5 table (SQLite). An SQLite
+    built without FTS5 keeps the LIKE fallback; any other failure, such as
+    a role that may not create pg_trgm, fails the migration.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        statements = POSTGRES_TRIGRAM
+    elif connection.vendor == 'sqlite' and sqlite_has_fts5(connection):
+        statements = SQLITE_FTS
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS profile_search_trgm_idx")
+    elif schema_editor.connection.vendor == 'sqlite':
+        for action in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{action}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def index_existing_profiles(apps, schema_editor):
+    """
+    Index the profiles created before this migration, a batch at a time
+    """
+    UserProfile = apps.get_model('user_profiles', 'UserProfile')
+    ProfileSearchEntry = apps.get_model('user_profiles', 'ProfileSearchEntry')
+
+    profiles = UserProfile.objects.select_related('user').order_by('id')
+    batch = []
+    for profile in profiles.iterator(chunk_size=1000):
+        batch.append(ProfileSearchEntry(
+            profile_id=profile.id,
+            document=build_document(
+                profile.user.username, profile.user.first_name, profile.user.last_name, profile.phone_number
+            ),
+        ))
+        if len(batch) == 1000:
+            ProfileSearchEntry.objects.bulk_create(batch)
+            batch = []
+    ProfileSearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSearchEntry',
+            fields=[
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='user_profiles.userprofile')),
+                ('document', models.CharField(max_length=400)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_profiles, migrations.RunPython.noop),
+    ]
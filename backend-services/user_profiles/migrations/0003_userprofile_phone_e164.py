@@ -0,0 +1,92 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:12
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+
+BATCH_SIZE = 1000
+
+
+# Copy of user_profiles.phones.to_e164 as of this migration, so the
+# backfill does not change when that module does
+def to_e164_or_none(value):
+    country_code = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')
+    raw = re.sub(r'[\s\-().]', '', value or '')
+    if not re.fullmatch(r'\+?\d+', raw):
+        return None
+
+    if raw.startswith('+'):
+        number = raw[1:]
+    elif raw.startswith('00'):
+        number = raw[2:]
+    else:
+        national = raw[1:] if raw.startswith('0') else raw
+        if national.startswith(country_code) and len(national) > 10:
+            number = national
+        else:
+            number = country_code + national
+
+    if not 8 <= len(number) <= 15 or number.startswith('0'):
+        return None
+    if number.startswith('91') and not re.match(r'^91[6-9]\d{9}$', number):
+        return None
+    return f'+{number}'
+
+
+def backfill_phone_e164(apps, schema_editor):
+    """
+    Canonicalize every existing phone number, a batch per transaction.
+
+    When several profiles share a number the oldest keeps it; the others
+    stay null (and out of the unique index) until staff correct them.
+    """
+    UserProfile = apps.get_model('user_profiles', 'UserProfile')
+    claimed = set()
+    last_id = 0
+    while True:
+        batch = list(
+            UserProfile.objects.filter(id__gt=last_id).order_by('id').only('id', 'phone_number')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        for profile in batch:
+            phone_e164 = to_e164_or_none(profile.phone_number)
+            if phone_e164 in claimed:
+                phone_e164 = None
+            profile.phone_e164 = phone_e164
+            claimed.add(phone_e164)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            UserProfile.objects.bulk_update(batch, ['phone_e164'])
+
+
+class Migration(migrations.Migration):
+
+    # Each backfill batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('user_profiles', '0002_profile_search_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='phone_number',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True, unique=True),
+        ),
+    ]
@@ -7,7 +7,10 @@ class UserProfile(models.Model):
     updated_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='user_profiles_updated')
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
-    phone_number = models.CharField(max_length=15, blank=True, null=True)
+    phone_number = models.CharField(max_length=16, blank=True, null=True)
+    # phone_number in E.164, kept in step by user_profiles/signals.py; null when it
+    # does not parse or another profile already holds it
+    phone_e164 = models.CharField(max_length=16, unique=True, null=True, blank=True, editable=False)
     address = models.TextField(blank=True, null=True)
     date_of_birth = models.DateField(blank=True, null=True)
 
@@ -21,3 +24,18 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+class ProfileSearchEntry(models.Model):
+    """
+    The normalized text a customer is found by (see user_profiles/search.py).
+
+    One row per profile, rewritten by user_profiles/signals.py whenever the
+    profile or its auth user is saved. Migration 0002 adds a trigram index
+    on Postgres and an FTS5 table kept in step by triggers on SQLite.
+    """
+    profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, primary_key=True, related_name='search_entry')
+    document = models.CharField(max_length=400)
+
+    def __str__(self):
+        return self.document
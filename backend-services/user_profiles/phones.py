@@ -0,0 +1,68 @@
+"""
+Phone numbers in canonical E.164 form ('+' and up to 15 digits).
+
+Front desk types numbers every which way ('98450 12345', '+91-98450-12345',
+'098450 12345'); all of them must land on the same UserProfile.phone_e164.
+"""
+import re
+
+from django.conf import settings
+
+
+# Characters people type between digits
+SEPARATORS = re.compile(r'[\s\-().]')
+
+# Indian mobile numbers: the only numbers the front desk registers today
+INDIAN_MOBILE = re.compile(r'^91[6-9]\d{9}$')
+
+
+class InvalidPhoneNumber(ValueError):
+    pass
+
+
+def to_e164(value, country_code=None):
+    """
+    Return value as '+<country code><number>' or raise InvalidPhoneNumber.
+
+    Numbers without a '+' or '00' prefix are national: a trunk '0' is
+    dropped and the default country code (PHONE_DEFAULT_COUNTRY_CODE)
+    is prepended unless the number already starts with it.
+    """
+    country_code = country_code or settings.PHONE_DEFAULT_COUNTRY_CODE
+    raw = SEPARATORS.sub('', value or '')
+    if not re.fullmatch(r'\+?\d+', raw):
+        raise InvalidPhoneNumber(value)
+
+    if raw.startswith('+'):
+        number = raw[1:]
+    elif raw.startswith('00'):
+        number = raw[2:]
+    else:
+        national = raw[1:] if raw.startswith('0') else raw
+        if national.startswith(country_code) and len(national) > 10:
+            number = national
+        else:
+            number = country_code + national
+
+    if not 8 <= len(number) <= 15 or number.startswith('0'):
+        raise InvalidPhoneNumber(value)
+    if number.startswith('91') and not INDIAN_MOBILE.match(number):
+        raise InvalidPhoneNumber(value)
+    return f'+{number}'
+
+
+def to_e164_or_none(value):
+    try:
+        return to_e164(value)
+    except InvalidPhoneNumber:
+        return None
+
+
+def phone_number_taken(phone_e164, exclude=None):
+    """True if a profile other than exclude already holds phone_e164"""
+    from .models import UserProfile
+
+    profiles = UserProfile.objects.filter(phone_e164=phone_e164)
+    if exclude is not None and exclude.pk is not None:
+        profiles = profiles.exclude(pk=exclude.pk)
+    return profiles.exists()
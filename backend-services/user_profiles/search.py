@@ -0,0 +1,137 @@
+"""
+Customer search over ProfileSearchEntry.document.
+
+The document is the username, first and last name and the phone digits,
+case-folded with accents stripped, so every backend compares like with
+like. Matching depends on what the database offers:
+
+- Postgres: substring (LIKE) or pg_trgm word similarity (%>) per term, so
+  typos match; both operators are served by the GIN trigram index, with
+  the cut-off in pg_trgm.word_similarity_threshold (user_profiles/signals.py);
+- SQLite with FTS5: substring match through the trigram tokenizer for
+  terms of three characters or more;
+- anything else, and shorter terms: word-prefix LIKE.
+
+Results are ranked by how many terms start a word of the document, then
+by trigram similarity on Postgres, newest profile first on ties.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, CharField, F, FloatField, Func, IntegerField, Lookup, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import ProfileSearchEntry, UserProfile
+
+
+FTS_TABLE = 'user_profiles_search_fts'
+
+# pg_trgm word similarity below this is not a match
+SIMILARITY_THRESHOLD = 0.4
+
+# Shorter terms are too short for trigrams
+MIN_TRIGRAM_LENGTH = 3
+
+_capabilities = {}
+
+
+@CharField.register_lookup
+class WordSimilar(Lookup):
+    """
+    document %> term: pg_trgm word similarity of at least
+    pg_trgm.word_similarity_threshold. Unlike comparing word_similarity()
+    to a number, the operator can use the gin_trgm_ops index.
+    """
+    lookup_name = 'word_similar'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} %%> {rhs}', (*lhs_params, *rhs_params)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+    return ' '.join(re.sub(r'[\W_]+', ' ', text.casefold()).split())
+
+
+def build_document(username, first_name, last_name, phone_number):
+    words = normalize(f"{username} {first_name} {last_name}")
+    phone = re.sub(r'\D', '', phone_number or '')
+    return f"{words} {phone}".strip()[:400]
+
+
+def index_profiles(profiles, batch_size=1000):
+    """Write the search entries of profiles (with user selected). Returns the count"""
+    entries = [
+        ProfileSearchEntry(
+            profile_id=profile.id,
+            document=build_document(
+                profile.user.username, profile.user.first_name, profile.user.last_name, profile.phone_number
+            ),
+        )
+        for profile in profiles
+    ]
+    ProfileSearchEntry.objects.bulk_create(
+        entries,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['profile'],
+        update_fields=['document'],
+    )
+    return len(entries)
+
+
+def backend():
+    """'postgres', 'fts5' or 'like' for the current database"""
+    key = (connection.vendor, connection.settings_dict['NAME'])
+    if key not in _capabilities:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _capabilities[key] = 'postgres' if cursor.fetchone() else 'like'
+        elif connection.vendor == 'sqlite':
+            _capabilities[key] = 'fts5' if FTS_TABLE in connection.introspection.table_names() else 'like'
+        else:
+            _capabilities[key] = 'like'
+    return _capabilities[key]
+
+
+def prefix_match(term):
+    return Q(search_entry__document__startswith=term) | Q(search_entry__document__contains=f' {term}')
+
+
+def search_profiles(query):
+    """Active profiles matching every term of query, best match first"""
+    terms = normalize(query).split()
+    profiles = UserProfile.objects.filter(archive=False).select_related('user')
+    if not terms:
+        return profiles.none()
+
+    kind = backend()
+    score = Value(0.0, output_field=FloatField())
+    for number, term in enumerate(terms):
+        if kind == 'postgres':
+            profiles = profiles.filter(
+                Q(search_entry__document__contains=term) | Q(search_entry__document__word_similar=term)
+            )
+            # Only ranks the rows the index found
+            score = score + Func(
+                Value(term), F('search_entry__document'), function='word_similarity', output_field=FloatField()
+            )
+        elif kind == 'fts5' and len(term) >= MIN_TRIGRAM_LENGTH:
+            # FTS5 strings are double-quoted, with embedded quotes doubled
+            match = '"{}"'.format(term.replace('"', '""'))
+            profiles = profiles.filter(
+                id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+            )
+        else:
+            profiles = profiles.filter(prefix_match(term))
+
+    prefix_hits = sum(
+        (Case(When(prefix_match(term), then=Value(1)), default=Value(0), output_field=IntegerField()) for term in terms),
+        Value(0),
+    )
+    return profiles.annotate(prefix_hits=prefix_hits, score=score).order_by('-prefix_hits', '-score', '-id')
@@ -3,13 +3,33 @@ from .models import UserProfile
 from roles.models import Role
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-import re
+from .phones import InvalidPhoneNumber, phone_number_taken, to_e164
+
+class PhoneNumberField(serializers.CharField):
+    """A phone number in any common notation, validated to E.164"""
+    default_error_messages = {
+        'invalid_phone': 'Please enter a valid phone number.',
+    }
+
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        try:
+            return to_e164(value)
+        except InvalidPhoneNumber:
+            self.fail('invalid_phone')
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    phone_number = PhoneNumberField(max_length=16, required=False, allow_blank=True, allow_null=True)
+
     class Meta:
         model = UserProfile
         fields = '__all__'
 
+    def validate_phone_number(self, value):
+        if value and phone_number_taken(value, exclude=self.instance):
+            raise serializers.ValidationError("A user with this phone number already exists.")
+        return value
+
 class UserMeSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
@@ -44,9 +64,9 @@ class LoginSerializer(serializers.Serializer):
 
             if login_type == 'phone':
                 try:
-                    user_profile_obj = UserProfile.objects.get(phone_number=identifier)
+                    user_profile_obj = UserProfile.objects.select_related('user').get(phone_e164=to_e164(identifier))
                     user = authenticate(username=user_profile_obj.user.username, password=password)
-                except UserProfile.DoesNotExist:
+                except (InvalidPhoneNumber, UserProfile.DoesNotExist):
                     raise serializers.ValidationError("Invalid phone number or password")
                 except Exception as e:
                     print(f"An error occurred: {e}")
@@ -66,7 +86,7 @@ class RegisterSerializer(serializers.ModelSerializer):
     password_confirm = serializers.CharField(write_only=True)
 
     # Required UserProfile fields
-    phone_number = serializers.CharField(max_length=15, required=True)
+    phone_number = PhoneNumberField(max_length=20, required=True)
 
     # Optional UserProfile fields
     address = serializers.CharField(required=False, allow_blank=True)
@@ -87,7 +107,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         """
         Check that phone number is unique across all UserProfiles
         """
-        if UserProfile.objects.filter(phone_number=value).exists():
+        if phone_number_taken(value):
             raise serializers.ValidationError("A user with this phone number already exists.")
         return value
 
@@ -120,22 +140,21 @@ class UserProfileListSerializer(serializers.ModelSerializer):
             'is_active'
         ]
 
+class PhoneLookupSerializer(serializers.Serializer):
+    phone = PhoneNumberField(max_length=20)
+
 class UserProfileCreateAdminSerializer(serializers.Serializer):
     first_name = serializers.CharField(required=True, max_length=100)
     last_name = serializers.CharField(required=True, max_length=150)
     username = serializers.CharField(required=True, max_length=150)
-    phone_number = serializers.CharField(required=True, max_length=15)
+    phone_number = PhoneNumberField(required=True, max_length=20)
     email = serializers.CharField(required=False, allow_blank=True)
     role = serializers.IntegerField(required=True)
     password = serializers.CharField(required=False, write_only=True, min_length=8)
     confirm_password = serializers.CharField(required=False, write_only=True)
 
     def validate_phone_number(self, value):
-        phone_regex = re.compile(r'^\+91[6-9]\d{9}$')
-        if phone_regex.match(value):
-            raise serializers.ValidationError("Please Enter an Valid Phone number")
-
-        if UserProfile.objects.filter(phone_number=value).exists():
+        if phone_number_taken(value):
             raise serializers.ValidationError("Phone number already exists")
 
         return value
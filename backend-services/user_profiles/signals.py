@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import UserProfile
+from .phones import phone_number_taken, to_e164_or_none
+from .search import SIMILARITY_THRESHOLD, index_profiles
+
+
+@receiver(pre_save, sender=UserProfile)
+def canonicalize_phone_number(sender, instance, **kwargs):
+    phone_e164 = to_e164_or_none(instance.phone_number)
+    # Serializers refuse a number that is taken; anything else saving a
+    # profile (legacy duplicates left null by migration 0003, admin, shell)
+    # keeps it null rather than failing on the unique index
+    if phone_e164 is not None and phone_e164 != instance.phone_e164 and phone_number_taken(phone_e164, exclude=instance):
+        phone_e164 = None
+    instance.phone_e164 = phone_e164
+
+
+@receiver(post_save, sender=UserProfile)
+def index_profile(sender, instance, **kwargs):
+    index_profiles([instance])
+
+
+@receiver(post_save, sender=User)
+def index_user_profile(sender, instance, created, **kwargs):
+    # A brand new user has no profile yet; the profile's own save indexes it
+    if created:
+        return
+    profile = UserProfile.objects.filter(user=instance).only('id', 'phone_number').first()
+    if profile is not None:
+        profile.user = instance
+        index_profiles([profile])
+
+
+@receiver(connection_created)
+def set_word_similarity_threshold(sender, connection, **kwargs):
+    # Cut-off of the %> operator customer search filters with
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)", [str(SIMILARITY_THRESHOLD)])
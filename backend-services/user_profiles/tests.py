@@ -1,3 +1,192 @@
+import importlib
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from roles.models import Role
+from .models import ProfileSearchEntry, UserProfile
+from .phones import InvalidPhoneNumber, to_e164
+from .search import normalize, search_profiles
+
+
+class ProfileSearchTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+        self.ananya = self.customer('ananya_s', 'Ananya', 'Sharma', '+91 98450 12345')
+        self.arjun = self.customer('arjun', 'Arjun', 'Iyer', '+919812300000')
+        self.zoe = self.customer('zoe', 'Zoë', 'Banerjee', '')
+
+    def customer(self, username, first_name, last_name, phone_number):
+        user = User.objects.create(username=username, first_name=first_name, last_name=last_name)
+        return UserProfile.objects.create(user=user, phone_number=phone_number)
+
+    def test_documents_are_normalized(self):
+        self.assertEqual('ananya s ananya sharma 919845012345', self.ananya.search_entry.document)
+        self.assertEqual('zoe', normalize(' ZOË '))
+
+    def test_renaming_the_user_reindexes_the_profile(self):
+        self.arjun.user.last_name = 'Menon'
+        self.arjun.user.save()
+
+        self.assertEqual([self.arjun], list(search_profiles('menon')))
+        self.assertFalse(search_profiles('iyer').exists())
+
+    def test_every_term_must_match_by_prefix_or_substring(self):
+        self.assertEqual([self.ananya], list(search_profiles('SHARMA ana')))
+        self.assertEqual([self.ananya], list(search_profiles('45012')))
+        self.assertEqual([self.zoe], list(search_profiles('zo')))
+        self.assertFalse(search_profiles('').exists())
+
+    def test_word_prefixes_rank_first(self):
+        # 'arj' starts Arjun's name but sits inside nobody else's
+        marjorie = self.customer('marjorie', 'Marjorie', 'Dsouza', '')
+
+        self.assertEqual([self.arjun, marjorie], list(search_profiles('arj')))
+
+    def test_archived_profiles_are_left_out(self):
+        self.arjun.archive = True
+        self.arjun.save()
+
+        self.assertFalse(search_profiles('arjun').exists())
+
+    def test_search_endpoint_is_paginated(self):
+        response = self.client.get('/api/user-profiles/search/', {'search': 'a'})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.data['count'])
+        self.assertEqual(['arjun', 'ananya_s'], [row['username'] for row in response.data['results']])
+
+    def test_postgres_filters_with_indexable_operators(self):
+        with mock.patch('user_profiles.search.backend', return_value='postgres'):
+            sql = str(search_profiles('arjn').query)
+
+        where = sql.split(' WHERE ')[1].split(' ORDER BY ')[0]
+        self.assertIn('"document" %> arjn', where)
+        self.assertNotIn('word_similarity', where)
+
+    def test_list_search_uses_the_index(self):
+        ProfileSearchEntry.objects.filter(profile=self.zoe).update(document='zoe zoe banerjee regular')
+
+        response = self.client.get('/api/user-profiles/', {'search': 'regular'})
+
+        self.assertEqual(['zoe'], [row['username'] for row in response.data])
+
+
+class PhoneNumberTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def register(self, username, phone_number):
+        return APIClient().post('/api/user-profiles/register/', {
+            'username': username,
+            'password': 'password123',
+            'password_confirm': 'password123',
+            'phone_number': phone_number,
+        }, format='json')
+
+    def test_common_notations_share_one_canonical_form(self):
+        for notation in ('98450 12345', '+91-98450-12345', '098450 12345', '0091 98450 12345', '919845012345'):
+            self.assertEqual('+919845012345', to_e164(notation), notation)
+        for invalid in ('12345', '+91 12345 67890', 'call me', ''):
+            with self.assertRaises(InvalidPhoneNumber, msg=invalid):
+                to_e164(invalid)
+
+    def test_the_same_number_cannot_register_twice(self):
+        self.assertEqual(201, self.register('first', '98450 12345').status_code)
+
+        response = self.register('second', '+91 (98450) 12345')
+
+        self.assertEqual(400, response.status_code)
+        self.assertIn('phone_number', response.data)
+        self.assertEqual('+919845012345', UserProfile.objects.get().phone_e164)
+
+    def test_admin_created_customer_keeps_the_typed_password(self):
+        customer = Role.objects.get(role_name='Customer')
+
+        response = self.client.post('/api/user-profiles/create/', {
+            'first_name': 'Kavya', 'last_name': 'Iyer', 'username': 'kavya',
+            'phone_number': '+91 9845012345', 'role': customer.id,
+            'password': 'unused123', 'confirm_password': 'unused123',
+        }, format='json')
+
+        self.assertEqual(201, response.status_code)
+        self.assertEqual('+919845012345', response.data['phone_number'])
+        login = APIClient().post('/api/user-profiles/login/', {
+            'identifier': '09845012345', 'loginType': 'phone', 'password': '+91 9845012345@gamestop',
+        }, format='json')
+        self.assertEqual(200, login.status_code)
+
+    def test_profile_edits_cannot_take_another_customers_number(self):
+        self.register('first', '98450 12345')
+        self.register('second', '98450 54321')
+        first, second = UserProfile.objects.get(user__username='first'), UserProfile.objects.get(user__username='second')
+
+        response = self.client.patch(f'/api/user-profiles/{second.id}/', {'phone_number': '+91 (98450) 12345'}, format='json')
+        self.assertEqual(400, response.status_code)
+        self.assertIn('phone_number', response.data)
+
+        # Its own number in another notation is fine
+        response = self.client.patch(f'/api/user-profiles/{first.id}/', {'phone_number': '098450 12345'}, format='json')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('+919845012345', response.data['phone_number'])
+
+    def test_legacy_duplicates_stay_unlinked_when_saved(self):
+        self.register('first', '98450 12345')
+        legacy = UserProfile.objects.create(user=User.objects.create(username='legacy'))
+        UserProfile.objects.filter(id=legacy.id).update(phone_number='+919845012345')
+
+        response = self.client.patch(f'/api/user-profiles/{legacy.id}/', {'address': 'MG Road'}, format='json')
+
+        self.assertEqual(200, response.status_code)
+        self.assertIsNone(UserProfile.objects.get(id=legacy.id).phone_e164)
+
+    def test_lookup_matches_any_notation_with_one_query(self):
+        self.register('returning', '9845012345')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/user-profiles/phone-lookup/', {'phone': '+91 98450-12345'})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('returning', response.data['username'])
+        self.assertEqual(404, self.client.get('/api/user-profiles/phone-lookup/', {'phone': '9876543210'}).status_code)
+        self.assertEqual(400, self.client.get('/api/user-profiles/phone-lookup/', {'phone': 'nope'}).status_code)
+
+    def test_backfill_gives_a_shared_number_to_the_oldest_profile(self):
+        profiles = [
+            UserProfile.objects.create(user=User.objects.create(username=f'legacy{number}'))
+            for number in range(3)
+        ]
+        UserProfile.objects.filter(id=profiles[0].id).update(phone_number='98450 12345')
+        UserProfile.objects.filter(id=profiles[1].id).update(phone_number='+919845012345')
+        UserProfile.objects.filter(id=profiles[2].id).update(phone_number='not a number')
+        migration = importlib.import_module('user_profiles.migrations.0003_userprofile_phone_e164')
+
+        with mock.patch.object(migration, 'BATCH_SIZE', 2):
+            migration.backfill_phone_e164(apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(
+            ['+919845012345', None, None],
+            [UserProfile.objects.get(id=profile.id).phone_e164 for profile in profiles],
+        )
+
+
+class BenchmarkProfileSearchTests(TestCase):
+    def test_benchmark_rolls_back(self):
+        out = StringIO()
+
+        call_command('benchmark_profile_search', customers=50, repeat=1, stdout=out)
 
-# Create your tests here.
+        self.assertIn('icontains', out.getvalue())
+        self.assertFalse(UserProfile.objects.exists())
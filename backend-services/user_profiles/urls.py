@@ -1,6 +1,8 @@
 from django.urls import path
 from .views import (
     UserProfileListCreateView,
+    UserProfileSearchView,
+    UserProfilePhoneLookupView,
     UserProfileRetrieveUpdateDestroyView,
     LoginView,
     RegisterView,
@@ -10,6 +12,8 @@ from .views import (
 
 urlpatterns = [
     path('', UserProfileListCreateView.as_view(), name='UserProfile-list-create'),
+    path('search/', UserProfileSearchView.as_view(), name='UserProfile-search'),
+    path('phone-lookup/', UserProfilePhoneLookupView.as_view(), name='UserProfile-phone-lookup'),
     path('<int:pk>/', UserProfileRetrieveUpdateDestroyView.as_view(), name='UserProfile-retrieve-update-destroy'),
     path('me/', UserProfileMeView.as_view(), name='UserProfile-me'),
     path('create/', UserProfileCreateByAdminView.as_view(), name='UserProfile-create-user-by-admin'),
@@ -1,14 +1,15 @@
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db.models import Q
 
 # Import Models
 from roles.models import Role
 from django.contrib.auth.models import User
 from .models import UserProfile
 from user_roles.models import UserRole
+from .search import search_profiles
 
 # Serializers
 from .serializers import (
@@ -17,7 +18,8 @@ from .serializers import (
     RegisterSerializer,
     UserMeSerializer,
     UserProfileListSerializer,
-    UserProfileCreateAdminSerializer
+    UserProfileCreateAdminSerializer,
+    PhoneLookupSerializer
 )
 
 class UserProfileListCreateView(generics.ListCreateAPIView):
@@ -31,16 +33,10 @@ class UserProfileListCreateView(generics.ListCreateAPIView):
         return UserProfileSerializer
 
     def get_queryset(self):
-        queryset = UserProfile.objects.filter(archive=False).select_related('user')
-
         search = self.request.query_params.get("search")
         if search:
-            queryset = queryset.filter(
-                Q(user__username__icontains=search) |
-                Q(user__first_name__icontains=search) |
-                Q(user__last_name__icontains=search)
-            )
-        return queryset
+            return search_profiles(search)
+        return UserProfile.objects.filter(archive=False).select_related('user')
 
     def perform_create(self, serializer):
         serializer.save(
@@ -56,6 +52,38 @@ class UserProfileListCreateView(generics.ListCreateAPIView):
 
         return Response(serializer.data)
 
+class UserProfileSearchView(generics.ListAPIView):
+    """
+    Ranked, paginated customer search over the search index.
+
+    ?search= matches every term by prefix or approximately (see search.py).
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserProfileListSerializer
+
+    def get_queryset(self):
+        return search_profiles(self.request.query_params.get('search', ''))
+
+class UserProfilePhoneLookupView(generics.RetrieveAPIView):
+    """
+    Find a returning customer by phone, in any notation.
+
+    ?phone= is canonicalized to E.164 and matched exactly against the
+    unique phone_e164 index.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserProfileListSerializer
+
+    def get_object(self):
+        lookup = PhoneLookupSerializer(data=self.request.query_params)
+        lookup.is_valid(raise_exception=True)
+        try:
+            return UserProfile.objects.select_related('user').get(
+                phone_e164=lookup.validated_data['phone'], archive=False
+            )
+        except UserProfile.DoesNotExist:
+            raise NotFound("No customer with this phone number.")
+
 class UserProfileRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     queryset = UserProfile.objects.all()
     permission_classes = [IsAuthenticated]
@@ -193,7 +221,8 @@ class UserProfileCreateByAdminView(generics.CreateAPIView):
         if role_type.role_name.lower() == "admin":
             user_password=password
         elif role_type.role_name.lower() == "customer":
-            user_password=f"{phone_number}@gamestop"
+            # The default password keeps the number as it was typed at the desk
+            user_password=f"{request.data.get('phone_number')}@gamestop"
 
         # Create the Auth User
         user = User.objects.create_user(
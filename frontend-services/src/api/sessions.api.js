@@ -1,13 +1,24 @@
 import apiClient from "./client";
 
+const BASE_URL = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000";
+
 export const createNewSession = async (data) => {
   const response = await apiClient.post("/api/gaming-sessions/", data);
   return response.data;
 };
 
+// Last bundle received; the server answers { changed: false } while it is current
+let dropdownBundle = null;
+
 export const getDropdownOptions = async () => {
-  const response = await apiClient.get("/api/gaming-sessions/drop-downs/");
-  return response.data;
+  const response = await apiClient.get("/api/gaming-sessions/drop-downs/", {
+    params: dropdownBundle ? { version: dropdownBundle.version } : {},
+  });
+  if (response.data.changed === false && dropdownBundle) {
+    return dropdownBundle;
+  }
+  dropdownBundle = response.data;
+  return dropdownBundle;
 };
 
 export const getActiveSessions = async () => {
@@ -15,8 +26,16 @@ export const getActiveSessions = async () => {
   return response.data;
 };
 
-export const getPastSessions = async () => {
-  const response = await apiClient.get("/api/gaming-sessions/past/");
+// Returns { next, previous, results }; pass a next/previous URL to follow the cursor
+export const getPastSessions = async (cursorUrl = "/api/gaming-sessions/past/") => {
+  const response = await apiClient.get(cursorUrl);
+  return response.data;
+};
+
+// Ends the given sessions, or every active one when no ids are passed
+export const checkoutSessions = async (sessionIds = null) => {
+  const payload = sessionIds ? { session_ids: sessionIds } : { all_active: true };
+  const response = await apiClient.post("/api/gaming-sessions/checkout/", payload);
   return response.data;
 };
 
@@ -63,3 +82,69 @@ export const getSessionDetails = async (sessionId) => {
   const response = await apiClient.get(`/api/gaming-sessions/${sessionId}/`);
   return response.data;
 };
+
+// Live session/station changes over Server-Sent Events. Session events
+// carry the session's dashboard row; "resync" means events were missed and
+// the lists have to be re-fetched.
+// EventSource cannot send headers, so each connection opens with a
+// short-lived stream ticket fetched with the access token. When the
+// connection drops we reconnect with a fresh ticket and resume from the
+// last event id we saw.
+const EVENT_TYPES = [
+  "session.created",
+  "session.updated",
+  "session.checked_out",
+  "station.updated",
+  "resync",
+];
+const RECONNECT_DELAY_MS = 3000;
+
+export const subscribeToSessionEvents = (onEvent) => {
+  let source = null;
+  let reconnectTimer = null;
+  let lastEventId = null;
+  let closed = false;
+
+  const reconnect = () => {
+    if (closed) return;
+    reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+  };
+
+  const connect = async () => {
+    let ticket;
+    try {
+      const response = await apiClient.post("/api/events/sessions/ticket/");
+      ticket = response.data.ticket;
+    } catch (err) {
+      console.error("Error fetching event stream ticket:", err);
+      reconnect();
+      return;
+    }
+    if (closed) return;
+
+    const params = new URLSearchParams({ ticket });
+    if (lastEventId) params.set("last_event_id", lastEventId);
+    source = new EventSource(`${BASE_URL}/api/events/sessions/?${params}`);
+
+    EVENT_TYPES.forEach((type) =>
+      source.addEventListener(type, (event) => {
+        if (event.lastEventId) lastEventId = event.lastEventId;
+        onEvent(type, JSON.parse(event.data));
+      }),
+    );
+
+    // The ticket in the URL has expired by the time the browser would retry
+    source.onerror = () => {
+      source.close();
+      reconnect();
+    };
+  };
+
+  connect();
+
+  return () => {
+    closed = true;
+    clearTimeout(reconnectTimer);
+    if (source) source.close();
+  };
+};
@@ -6,12 +6,12 @@ export const getAllUsers = async () => {
   return response.data;
 };
 
-// Get all users with filters
+// Search users, best matches first (first page of the ranked results)
 export const getUsersWithFilters = async (searchTerm) => {
-  const response = await apiClient.get(
-    `/api/user-profiles/?search=${searchTerm}`,
-  );
-  return response.data;
+  const response = await apiClient.get("/api/user-profiles/search/", {
+    params: { search: searchTerm },
+  });
+  return response.data.results;
 };
 
 // Create a user from the user management page
@@ -19,3 +19,11 @@ export const createUserByAdmin = async (userData) => {
   const response = await apiClient.post(`/api/user-profiles/create/`, userData);
   return response.data;
 };
+
+// Find a returning customer by phone number (any notation)
+export const getUserByPhone = async (phone) => {
+  const response = await apiClient.get("/api/user-profiles/phone-lookup/", {
+    params: { phone },
+  });
+  return response.data;
+};
@@ -112,6 +112,11 @@ const SessionCard = ({
           <div>
             <p className="text-lg font-bold text-white">{session.station}</p>
             <p className="text-sm text-white/60">{session.customer}</p>
+            {session.overdueAt && (
+              <span className="mt-1 inline-block rounded bg-red-500/20 px-2 py-0.5 text-xs font-semibold text-red-400">
+                Overdue: end or extend
+              </span>
+            )}
           </div>
           <div className="text-right">
             <p className={`text-3xl font-bold ${getTimeColor()}`}>
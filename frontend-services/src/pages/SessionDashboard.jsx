@@ -44,6 +44,8 @@ const SessionDashboard = () => {
   const [searchQuery, setSearchQuery] = useState("");
   const [sessions, setSessions] = useState([]);
   const [pastSessions, setPastSessions] = useState([]);
+  const [pastNextUrl, setPastNextUrl] = useState(null);
+  const [pastLoadingMore, setPastLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [pastLoading, setPastLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -59,8 +61,9 @@ const SessionDashboard = () => {
   const [dropdownError, setDropdownError] = useState(null);
 
   // Utility functions for session data
-  const calculateRemainingTime = (checkInTime, checkOutTime) => {
-    const now = new Date();
+  // A paused session's clock stands still at paused_at
+  const calculateRemainingTime = (checkInTime, checkOutTime, pausedAt) => {
+    const now = pausedAt ? new Date(pausedAt) : new Date();
     const checkOut = new Date(checkOutTime);
     const timeDiff = checkOut.getTime() - now.getTime();
 
@@ -115,6 +118,7 @@ const SessionDashboard = () => {
     const remainingTime = calculateRemainingTime(
       apiSession.check_in_time,
       apiSession.check_out_time,
+      apiSession.paused_at,
     );
     const color = getSessionColor(
       apiSession.check_in_time,
@@ -129,9 +133,12 @@ const SessionDashboard = () => {
       charges: parseFloat(apiSession.total_session_cost),
       platform: `${apiSession.gaming_service__service_type} Gaming`,
       status: apiSession.session_status.toLowerCase(),
-      color: color,
+      color: apiSession.paused_at ? "blue" : color,
       checkInTime: apiSession.check_in_time,
       checkOutTime: apiSession.check_out_time,
+      pausedAt: apiSession.paused_at,
+      // Stamped by the expiry worker (run_scheduler --action flag)
+      overdueAt: apiSession.overdue_at,
     };
   };
 
@@ -281,12 +288,13 @@ const SessionDashboard = () => {
     }
   };
 
-  // Fetch past sessions
+  // Fetch the first page of past sessions
   const fetchPastSessions = async () => {
     try {
       setPastLoading(true);
       const data = await sessionsApi.getPastSessions();
-      setPastSessions(data);
+      setPastSessions(data.results);
+      setPastNextUrl(data.next);
       setPastError(null);
     } catch (err) {
       const errorMessage =
@@ -300,12 +308,73 @@ const SessionDashboard = () => {
     }
   };
 
+  // Follow the cursor to the next page of past sessions
+  const loadMorePastSessions = async () => {
+    if (!pastNextUrl) return;
+    try {
+      setPastLoadingMore(true);
+      const data = await sessionsApi.getPastSessions(pastNextUrl);
+      setPastSessions((prevSessions) => [...prevSessions, ...data.results]);
+      setPastNextUrl(data.next);
+      setPastError(null);
+    } catch (err) {
+      const errorMessage =
+        err.response?.data?.message ||
+        err.message ||
+        "Failed to fetch past sessions";
+      setPastError(errorMessage);
+      console.error("Error fetching more past sessions:", err);
+    } finally {
+      setPastLoadingMore(false);
+    }
+  };
+
   // Fetch data on component mount
   useEffect(() => {
     fetchActiveSessions();
     fetchPastSessions();
   }, []);
 
+  // Session events carry the session's row as the lists render it, so we
+  // patch that one row; only a resync re-fetches the lists
+  const applySessionEvent = (type, row) => {
+    const isOpen =
+      !row.archive &&
+      (row.session_status === "ACTIVE" || row.session_status === "PAUSED");
+
+    setSessions((prevSessions) => {
+      const others = prevSessions.filter((s) => s.id !== row.id);
+      if (!isOpen) return others;
+      const session = transformSessionData(row);
+      return others.length === prevSessions.length
+        ? [...prevSessions, session]
+        : prevSessions.map((s) => (s.id === row.id ? session : s));
+    });
+
+    if (type === "session.checked_out" && !row.archive) {
+      setPastSessions((prevSessions) => [
+        row,
+        ...prevSessions.filter((s) => s.id !== row.id),
+      ]);
+    } else if (row.archive) {
+      setPastSessions((prevSessions) =>
+        prevSessions.filter((s) => s.id !== row.id),
+      );
+    }
+  };
+
+  useEffect(() => {
+    return sessionsApi.subscribeToSessionEvents((type, data) => {
+      if (type === "station.updated") return;
+      if (type === "resync") {
+        fetchActiveSessions();
+        fetchPastSessions();
+        return;
+      }
+      applySessionEvent(type, data);
+    });
+  }, []);
+
   // Update timers every second
   useEffect(() => {
     const timerInterval = setInterval(() => {
@@ -315,8 +384,12 @@ const SessionDashboard = () => {
           time: calculateRemainingTime(
             session.checkInTime,
             session.checkOutTime,
+            session.pausedAt,
           ),
-          color: getSessionColor(session.checkInTime, session.checkOutTime),
+          color:
+            session.status === "paused"
+              ? "blue"
+              : getSessionColor(session.checkInTime, session.checkOutTime),
         })),
       );
     }, 1000);
@@ -339,12 +412,24 @@ const SessionDashboard = () => {
     // Optimistic update - immediately update UI
     setSessions((prevSessions) =>
       prevSessions.map((s) =>
-        s.id === session.id ? { ...s, status: "paused", color: "blue" } : s,
+        s.id === session.id
+          ? {
+              ...s,
+              status: "paused",
+              color: "blue",
+              pausedAt: new Date().toISOString(),
+            }
+          : s,
       ),
     );
 
     try {
-      await sessionsApi.pauseSession(session.id);
+      // The server decides when the pause started
+      const updatedSessionData = await sessionsApi.pauseSession(session.id);
+      const updatedSession = transformSessionData(updatedSessionData);
+      setSessions((prevSessions) =>
+        prevSessions.map((s) => (s.id === session.id ? updatedSession : s)),
+      );
     } catch (error) {
       // Revert optimistic update on error
       fetchActiveSessions();
@@ -363,6 +448,7 @@ const SessionDashboard = () => {
           ? {
               ...s,
               status: "active",
+              pausedAt: null,
               color: getSessionColor(s.checkInTime, s.checkOutTime),
             }
           : s,
@@ -370,7 +456,12 @@ const SessionDashboard = () => {
     );
 
     try {
-      await sessionsApi.resumeSession(session.id);
+      // Resuming moves the check-out time by the length of the pause
+      const updatedSessionData = await sessionsApi.resumeSession(session.id);
+      const updatedSession = transformSessionData(updatedSessionData);
+      setSessions((prevSessions) =>
+        prevSessions.map((s) => (s.id === session.id ? updatedSession : s)),
+      );
     } catch (error) {
       fetchActiveSessions();
       console.error("Error resuming session:", error);
@@ -642,19 +733,35 @@ const SessionDashboard = () => {
                   <p className="text-red-400">{pastError}</p>
                 </div>
               ) : pastSessions.length > 0 ? (
-                <div style={{ height: "500px", width: "100%" }}>
-                  <AgGridReact
-                    rowData={pastSessions}
-                    columnDefs={columnDefs}
-                    defaultColDef={defaultColDef}
-                    pagination={true}
-                    paginationPageSize={10}
-                    paginationPageSizeSelector={[10, 20, 50]}
-                    theme={customDarkTheme}
-                    domLayout="normal"
-                    rowHeight={60}
-                    headerHeight={50}
-                  />
+                <div>
+                  <div style={{ height: "500px", width: "100%" }}>
+                    <AgGridReact
+                      rowData={pastSessions}
+                      columnDefs={columnDefs}
+                      defaultColDef={defaultColDef}
+                      pagination={true}
+                      paginationPageSize={10}
+                      paginationPageSizeSelector={[10, 20, 50]}
+                      theme={customDarkTheme}
+                      domLayout="normal"
+                      rowHeight={60}
+                      headerHeight={50}
+                    />
+                  </div>
+                  {pastNextUrl && (
+                    <div className="flex justify-center mt-4">
+                      <button
+                        onClick={loadMorePastSessions}
+                        disabled={pastLoadingMore}
+                        className="flex items-center justify-center gap-2 rounded-lg bg-white/10 px-4 py-2 text-sm font-bold text-white transition-all hover:bg-white/20 disabled:opacity-50"
+                      >
+                        {pastLoadingMore && (
+                          <RefreshCw className="w-4 h-4 animate-spin" />
+                        )}
+                        <span>Load more</span>
+                      </button>
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="text-center py-16 bg-white/5 rounded-lg border border-white/10">
@@ -14,7 +14,8 @@ tmux new-window -t $SESSION:2 -n backend
 tmux send-keys -t $SESSION:backend 'cd backend-services' C-m
 tmux send-keys -t $SESSION:backend 'conda activate gamestop' C-m
 tmux send-keys -t $SESSION:backend 'source venv/bin/activate' C-m
-tmux send-keys -t $SESSION:backend 'python manage.py runserver' C-m
+# ASGI, so the dashboard's live event stream is served (see gamestop/asgi.py)
+tmux send-keys -t $SESSION:backend 'uvicorn gamestop.asgi:application --reload --port 8000' C-m
 
 # Attach to the session
 tmux attach -t $SESSION